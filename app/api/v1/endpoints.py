@@ -5,18 +5,21 @@ FinAgent — B2B KYC & Due Diligence API  (FastAPI + Jinja2)
 import os
 import uuid
 import threading
-from typing import Optional
+from typing import Literal, Optional
 
+import aiofiles
 import uvicorn
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from werkzeug.utils import secure_filename
 
+from app.core.config import settings
 from app.core.logging import get_logger, setup_logging
+from app.services.ingestion_jobs import IngestionJobManager, QueueFullError
 
 setup_logging()
 logger = get_logger(__name__)
@@ -48,6 +51,8 @@ templates = Jinja2Templates(directory=_template_dir)
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+UPLOAD_BLOCK_SIZE = 1024 * 1024   # uploads are streamed to disk 1 MiB at a time
+
 # Heavy services — lazy-loaded on first use to speed up startup
 _extractor = None
 _kyc_agent  = None
@@ -61,6 +66,43 @@ def _get_extractor():
     return _extractor
 
 
+def _run_ingestion_job(job) -> bool:
+    return _get_extractor().process_uploaded_file_from_api(job.filepath, job.filename, job=job)
+
+
+# Uploads are extracted here, off the event loop
+_ingestion_jobs = IngestionJobManager(
+    worker      = _run_ingestion_job,
+    max_workers = settings.INGEST_MAX_WORKERS,
+    max_queue   = settings.INGEST_MAX_QUEUE,
+)
+
+
+def _bootstrap_schema() -> None:
+    """Create constraints/indexes off the request path — AuraDB may be paused."""
+    from app.db.schema import ensure_schema
+    try:
+        ensure_schema()
+    except Exception as exc:
+        logger.warning(f"Schema bootstrap skipped: {exc}")
+
+
+@app.on_event("startup")
+async def _on_startup():
+    from app.db.driver_registry import get_driver_registry
+    get_driver_registry().start_keepalive()     # warm the pool off the request path
+    if settings.NEO4J_SCHEMA_BOOTSTRAP:
+        threading.Thread(target=_bootstrap_schema, name="schema-bootstrap", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def _on_shutdown():
+    from app.db.driver_registry import get_driver_registry
+    registry = get_driver_registry()
+    await registry.aclose()
+    registry.close()
+
+
 def _get_kyc_agent():
     global _kyc_agent
     if _kyc_agent is None:
@@ -108,6 +150,9 @@ class InvestigateRequest(BaseModel):
     investigation_depth: str          = "basic"
     session_id:          Optional[str] = None
     payment_status:      Optional[str] = "UNPAID"
+    # "single" = plan + Cypher in one LLM call, "two_step" = planning → write_query;
+    # None = the configured mode for the depth (PLANNING_MODE_BASIC / _DEEP)
+    planning_mode:       Optional[Literal["two_step", "single"]] = None
 
 
 class DokuWebhookPayload(BaseModel):
@@ -128,11 +173,15 @@ class InvestigateResponse(BaseModel):
     session_id:     Optional[str] = None
     invoice_number: Optional[str] = None
     message:        Optional[str] = None
+    cached:         bool          = False   # answered from the semantic answer cache
+    route:          Optional[str] = None    # fast-path intent when planning + write_query were skipped
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def _init_inputs(question, depth, payment_status, session_id) -> dict:
+def _init_inputs(question, depth, payment_status, session_id, planning_mode=None) -> dict:
+    from app.services.graph_retriever import resolve_planning_mode
+
     return {
         "question":            question,
         "investigation_depth": depth,
@@ -145,35 +194,192 @@ def _init_inputs(question, depth, payment_status, session_id) -> dict:
         "answer":              None,
         "query_decomposition": "",
         "query_advice":        "",
+        "linked_entities":     [],
+        "route":               None,
+        "cypher_params":       None,
+        "planning_mode":       resolve_planning_mode(depth, planning_mode),
+        "row_count":           0,
+        "cypher_guard":        None,
     }
 
 
-def _resume_investigation(session_id: str, question: str) -> None:
+def _store_answer(question: str, depth: str, result: dict, version: int) -> None:
+    """Answer-cache a result the gatekeeper let through."""
+    from app.services.answer_cache import get_answer_cache
+
+    cache = get_answer_cache()
+    if cache and not result.get("doku_link"):
+        cache.store(question, depth, result, version)
+
+
+async def _run_cached_pipeline(
+    question: str, depth: str, payment_status: str, session_id: str, planning_mode: Optional[str] = None,
+) -> dict:
+    """
+    Run the KYC graph on the async path (ainvoke), storing the answer in the
+    semantic answer cache when the gatekeeper let the request through.
+    """
+    from app.db.query_cache import graph_version
+
+    version = graph_version()
+    result  = await _get_kyc_agent().ainvoke(
+        _init_inputs(question, depth, payment_status, session_id, planning_mode)
+    )
+    _store_answer(question, depth, result, version)
+    return result
+
+
+async def _stream_cached_pipeline(
+    question: str, depth: str, payment_status: str, session_id: str, planning_mode: Optional[str] = None,
+):
+    """
+    _run_cached_pipeline as a stream of (event, data): node progress and
+    answer tokens, then ("result", final_state).
+    """
+    from app.db.query_cache import graph_version
+    from app.services.investigation_stream import stream_investigation
+
+    version = graph_version()
+    inputs  = _init_inputs(question, depth, payment_status, session_id, planning_mode)
+    async for event, data in stream_investigation(_get_kyc_agent(), inputs):
+        if event == "result":
+            _store_answer(question, depth, data, version)
+        yield event, data
+
+
+def _cached_answer(question: str, depth: str, payment_status: str, session_id: str):
+    """
+    Semantic answer-cache hit for the request, recorded as a completed
+    session — or None. Never consulted where the paywall would stop the run.
+    """
+    from app.services.answer_cache import get_answer_cache
+
+    answer_cache = get_answer_cache()
+    if not answer_cache or (depth == "deep" and payment_status == "UNPAID"):
+        return None
+    hit = answer_cache.lookup(question, depth)
+    if not hit:
+        return None
+    entry, similarity = hit
+    logger.info(f"⚡ Answer cache hit ({similarity:.3f}) ← \"{entry.question[:60]}\"")
+    with _lock:
+        _sessions[session_id] = {
+            "question":       question,
+            "depth":          depth,
+            "payment_status": payment_status,
+            "answer":         entry.answer,
+            "cypher_used":    entry.cypher,
+            "raw_context":    entry.context,
+            "status":         "COMPLETE",
+            "cached":         True,
+        }
+    return entry, similarity
+
+
+def _record_payment_wall(result: dict, question: str, depth: str, planning_mode: Optional[str]) -> str:
+    """Remember a session stopped by the paywall; returns its session id."""
+    sid        = result["session_id"]
+    inv_number = result.get("invoice_number", "")
+    with _lock:
+        _sessions[sid] = {
+            "question":       question,
+            "depth":          depth,
+            "payment_status": "UNPAID",
+            "doku_link":      result["doku_link"],
+            "invoice_number": inv_number,
+            "planning_mode":  planning_mode,
+            "answer":         None,
+            "status":         "AWAITING_PAYMENT",
+        }
+        if inv_number:
+            _invoice_map[inv_number] = sid
+        _save_sessions()
+    return sid
+
+
+def _record_answer(session_id: str, question: str, depth: str, payment_status: str, result: dict) -> str:
+    """Remember a completed investigation; returns the answer."""
+    answer = result.get("answer") or "No answer generated."
+    with _lock:
+        _sessions[session_id] = {
+            "question":            question,
+            "depth":               depth,
+            "payment_status":      payment_status,
+            "answer":              answer,
+            "cypher_used":         result.get("cypher_query", ""),
+            "raw_context":         result.get("graph_context", ""),
+            "query_decomposition": result.get("query_decomposition", ""),
+            "row_count":           result.get("row_count", 0),
+            "planning_mode":       result.get("planning_mode"),
+            "status":              "COMPLETE",
+        }
+    return answer
+
+
+_PAYMENT_MESSAGE = (
+    "Deep investigation requires payment (Rp 50,000). "
+    "Complete the DOKU checkout to unlock full Neo4j graph extraction."
+)
+
+
+def _done_event(session_id: str) -> dict:
+    """Final summary of a session, as sent in the SSE `done` event."""
+    with _lock:
+        session = dict(_sessions.get(session_id) or {})
+    return {
+        "status":              "SUCCESS",
+        "session_id":          session_id,
+        "answer":              session.get("answer"),
+        "cypher_used":         session.get("cypher_used", ""),
+        "query_decomposition": session.get("query_decomposition", ""),
+        "row_count":           session.get("row_count", 0),
+        "cached":              bool(session.get("cached")),
+    }
+
+
+async def _resume_investigation(session_id: str, question: str) -> None:
+    """Paid deep run in the background; progress goes to the session's event log."""
+    from app.services.investigation_stream import session_event_logs
+
     logger.info(f"🚀 Resuming deep investigation for session {session_id}")
+    if not session_event_logs.has(session_id):
+        session_event_logs.open(session_id)
     try:
-        result = _get_kyc_agent().invoke(
-            _init_inputs(question, "deep", "PAID", session_id)
-        )
-        answer       = result.get("answer") or "Investigation complete — no answer generated."
-        cypher       = result.get("cypher_query", "")
-        ctx          = result.get("graph_context", "")
-        decomp       = result.get("query_decomposition", "")
-        row_count    = len(ctx.splitlines()) if ctx else 0
+        with _lock:
+            planning_mode = _sessions.get(session_id, {}).get("planning_mode")
+        result = {}
+        async for event, data in _stream_cached_pipeline(question, "deep", "PAID", session_id, planning_mode):
+            if event == "result":
+                result = data
+            else:
+                session_event_logs.publish(session_id, event, data)
+        answer = result.get("answer") or "Investigation complete — no answer generated."
         with _lock:
             _sessions[session_id].update(
                 answer=answer,
-                cypher_used=cypher,
-                raw_context=ctx,
-                query_decomposition=decomp,
-                row_count=row_count,
+                cypher_used=result.get("cypher_query", ""),
+                raw_context=result.get("graph_context", ""),
+                query_decomposition=result.get("query_decomposition", ""),
+                row_count=result.get("row_count", 0),
                 status="COMPLETE",
             )
             _save_sessions()
+        session_event_logs.publish(session_id, "done", {**_done_event(session_id), "route": result.get("route")})
         logger.info(f"✅ Deep investigation COMPLETE for session {session_id}")
     except Exception as exc:
         logger.error(f"❌ Background investigation failed [{session_id}]: {exc}")
         with _lock:
             _sessions[session_id].update(status="ERROR", answer=str(exc))
+        session_event_logs.publish(session_id, "error", {"message": str(exc), "session_id": session_id})
+
+
+def _sse_response(events) -> StreamingResponse:
+    """text/event-stream response for an async iterator of SSE frames."""
+    return StreamingResponse(
+        events,
+        media_type = "text/event-stream",
+        headers    = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -203,24 +409,61 @@ async def payment_cancelled(request: Request):
 # API — DOCUMENT UPLOAD
 # ════════════════════════════════════════════════════════════════════════════
 
-@app.post("/api/upload", tags=["Documents"])
+@app.post("/api/upload", status_code=202, tags=["Documents"])
 async def upload_document(file: UploadFile = File(...)):
+    """Save the upload and queue it for extraction — returns a job id immediately."""
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file selected")
 
     filename = secure_filename(file.filename)
     filepath = os.path.join(UPLOAD_FOLDER, filename)
 
-    content = await file.read()
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Stream to disk — never hold the whole upload in memory
+    size = 0
+    async with aiofiles.open(filepath, "wb") as f:
+        while block := await file.read(UPLOAD_BLOCK_SIZE):
+            await f.write(block)
+            size += len(block)
+    logger.info(f"📥 Saved upload {filename} ({size // 1024} KB)")
 
-    logger.info(f"📄 Processing: {filename}")
-    ok = _get_extractor().process_uploaded_file_from_api(filepath, filename)
+    try:
+        job = _ingestion_jobs.submit(filepath, filename)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=429, detail=f"{exc} — try again shortly")
+
+    logger.info(f"📄 Queued: {filename} | job={job.id}")
+    return {
+        "status":  "queued",
+        "job_id":  job.id,
+        "message": f"{filename} queued for Knowledge Graph ingestion.",
+    }
+
+
+@app.get("/api/jobs", tags=["Documents"])
+async def list_ingestion_jobs():
+    """All known ingestion jobs, oldest first, plus current queue depth."""
+    return {
+        "queue_depth": _ingestion_jobs.depth,
+        "jobs":        [j.to_dict() for j in _ingestion_jobs.list()],
+    }
+
+
+@app.get("/api/jobs/{job_id}", tags=["Documents"])
+async def get_ingestion_job(job_id: str):
+    """Progress of one ingestion job: per-chunk status, node/rel counts, elapsed time."""
+    job = _ingestion_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
-    if ok:
-        return {"status": "success", "message": f"{filename} ingested into Knowledge Graph!"}
-    raise HTTPException(status_code=500, detail="Failed to extract text from document")
+
+@app.delete("/api/jobs/{job_id}", tags=["Documents"])
+async def cancel_ingestion_job(job_id: str):
+    """Cancel a queued or running job. Chunks already in flight finish; nothing is saved."""
+    job = _ingestion_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -288,9 +531,21 @@ async def investigate(req: InvestigateRequest):
 
     logger.info(f"🔍 /investigate | depth={req.investigation_depth} | paid={payment_status} | sid={session_id}")
 
+    # ── Semantic answer cache (only where the paywall would let it through) ──
+    hit = _cached_answer(req.question, req.investigation_depth, payment_status, session_id)
+    if hit:
+        entry, similarity = hit
+        return InvestigateResponse(
+            status     = "SUCCESS",
+            answer     = entry.answer,
+            session_id = session_id,
+            cached     = True,
+            message    = f"Cached answer (similarity {similarity:.2f}) to: {entry.question}",
+        )
+
     try:
-        result = _get_kyc_agent().invoke(
-            _init_inputs(req.question, req.investigation_depth, payment_status, session_id)
+        result = await _run_cached_pipeline(
+            req.question, req.investigation_depth, payment_status, session_id, req.planning_mode
         )
     except Exception as exc:
         logger.error(f"❌ Graph error: {exc}")
@@ -298,48 +553,82 @@ async def investigate(req: InvestigateRequest):
 
     # ── Payment wall triggered ───────────────────────────────────────────
     if result.get("payment_status") == "UNPAID" and result.get("doku_link"):
-        doku_link  = result["doku_link"]
-        inv_number = result.get("invoice_number", "")
-        sid        = result["session_id"]
-
-        with _lock:
-            _sessions[sid] = {
-                "question":       req.question,
-                "depth":          req.investigation_depth,
-                "payment_status": "UNPAID",
-                "doku_link":      doku_link,
-                "invoice_number": inv_number,
-                "answer":         None,
-                "status":         "AWAITING_PAYMENT",
-            }
-            if inv_number:
-                _invoice_map[inv_number] = sid
-            _save_sessions()
-
+        sid = _record_payment_wall(result, req.question, req.investigation_depth, req.planning_mode)
         return InvestigateResponse(
             status         = "PAYMENT_REQUIRED",
-            doku_link      = doku_link,
+            doku_link      = result["doku_link"],
             session_id     = sid,
-            invoice_number = inv_number,
-            message        = (
-                f"Deep investigation requires payment (Rp 50,000). "
-                f"Complete the DOKU checkout to unlock full Neo4j graph extraction."
-            ),
+            invoice_number = result.get("invoice_number", ""),
+            message        = _PAYMENT_MESSAGE,
         )
 
     # ── Successful investigation ─────────────────────────────────────────
-    answer = result.get("answer") or "No answer generated."
+    answer = _record_answer(session_id, req.question, req.investigation_depth, payment_status, result)
+    return InvestigateResponse(
+        status="SUCCESS", answer=answer, session_id=session_id, route=result.get("route"),
+    )
+
+
+@app.get("/api/investigate/stream", tags=["Investigation"])
+async def investigate_stream(
+    question: str,
+    investigation_depth: str = "basic",
+    session_id: Optional[str] = None,
+    planning_mode: Optional[Literal["two_step", "single"]] = None,
+):
+    """
+    /api/investigate as server-sent events: `node` progress (linked
+    entities, route, plan, Cypher, row count), answer `token`s, then `done`
+    — or `payment_required` / `error`. Payment is taken only from the
+    stored session (webhook-confirmed), never from the request.
+    """
+    from app.services.investigation_stream import sse
+
+    session_id = session_id or str(uuid.uuid4())
     with _lock:
-        _sessions[session_id] = {
-            "question":       req.question,
-            "depth":          req.investigation_depth,
-            "payment_status": payment_status,
-            "answer":         answer,
-            "cypher_used":    result.get("cypher_query", ""),
-            "raw_context":    result.get("graph_context", ""),
-            "status":         "COMPLETE",
-        }
-    return InvestigateResponse(status="SUCCESS", answer=answer, session_id=session_id)
+        stored = _sessions.get(session_id)
+    payment_status = "PAID" if stored and stored.get("payment_status") == "PAID" else "UNPAID"
+    logger.info(f"🔍 /investigate/stream | depth={investigation_depth} | paid={payment_status} | sid={session_id}")
+
+    async def events():
+        hit = _cached_answer(question, investigation_depth, payment_status, session_id)
+        if hit:
+            entry, similarity = hit
+            yield sse("done", {
+                **_done_event(session_id),
+                "message": f"Cached answer (similarity {similarity:.2f}) to: {entry.question}",
+            })
+            return
+
+        result = {}
+        try:
+            async for event, data in _stream_cached_pipeline(
+                question, investigation_depth, payment_status, session_id, planning_mode
+            ):
+                if event == "result":
+                    result = data
+                else:
+                    yield sse(event, data)
+        except Exception as exc:
+            logger.error(f"❌ Graph error: {exc}")
+            yield sse("error", {"message": str(exc), "session_id": session_id})
+            return
+
+        if result.get("payment_status") == "UNPAID" and result.get("doku_link"):
+            sid = _record_payment_wall(result, question, investigation_depth, planning_mode)
+            yield sse("payment_required", {
+                "status":         "PAYMENT_REQUIRED",
+                "doku_link":      result["doku_link"],
+                "session_id":     sid,
+                "invoice_number": result.get("invoice_number", ""),
+                "message":        _PAYMENT_MESSAGE,
+            })
+            return
+
+        _record_answer(session_id, question, investigation_depth, payment_status, result)
+        yield sse("done", {**_done_event(session_id), "route": result.get("route")})
+
+    return _sse_response(events())
 
 
 # ── Result polling ────────────────────────────────────────────────────────────
@@ -362,6 +651,37 @@ async def get_result(session_id: str):
     }
 
 
+@app.get("/api/result/{session_id}/stream", tags=["Investigation"])
+async def stream_result(session_id: str):
+    """
+    The paid deep investigation of a session as server-sent events —
+    replayed from the start, then live until `done` / `error`. A session
+    with no running investigation gets a single `pending` event (poll
+    /api/result instead).
+    """
+    from app.services.investigation_stream import session_event_logs, sse
+
+    with _lock:
+        session = _sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async def events():
+        if session_event_logs.has(session_id):
+            async for event, data in session_event_logs.follow(session_id):
+                yield sse(event, data)
+            return
+        status = session.get("status", "UNKNOWN")
+        if status == "COMPLETE":
+            yield sse("done", _done_event(session_id))
+        elif status == "ERROR":
+            yield sse("error", {"message": session.get("answer") or "Investigation failed", "session_id": session_id})
+        else:
+            yield sse("pending", {"status": status, "session_id": session_id})
+
+    return _sse_response(events())
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # API — DOKU PAYMENT WEBHOOK
 # ════════════════════════════════════════════════════════════════════════════
@@ -442,6 +762,10 @@ async def doku_payment_webhook(
         _sessions[session_id]["status"]         = "PROCESSING"
         _save_sessions()
 
+    # Open the event log now, so a client streaming /api/result/{sid}/stream
+    # right after this response sees the run from its first event
+    from app.services.investigation_stream import session_event_logs
+    session_event_logs.open(session_id)
     background_tasks.add_task(_resume_investigation, session_id, session["question"])
 
     return {
@@ -464,7 +788,7 @@ async def get_graph(entity: str = ""):
         loop = asyncio.get_running_loop()
         data = await asyncio.wait_for(
             loop.run_in_executor(None, retriever_service.get_graph_visualization, entity),
-            timeout=15.0
+            timeout=_outer_timeout("visualization", queries=2),
         )
         return data
     except asyncio.TimeoutError:
@@ -474,15 +798,29 @@ async def get_graph(entity: str = ""):
         return {"nodes": [], "edges": [], "error": str(exc)}
 
 
+def _outer_timeout(site: str, queries: int = 1) -> Optional[float]:
+    """
+    Client-side safety net around a thread-pool Neo4j call: the server-side
+    timeout of each of its queries plus connection slack. The query itself
+    is bounded by the transaction timeout (app/db/query_limits.py).
+    """
+    from app.db.query_limits import get_policy
+    timeout_s = get_policy(site).timeout_s
+    return queries * timeout_s + 5.0 if timeout_s else None
+
+
 def _fetch_graph_stats() -> dict:
     """Blocking Neo4j stats call — run in thread pool only."""
+    from app.db.schema import ALIAS_LABEL
     from app.services.graph_retriever import retriever_service
-    results = retriever_service.graph.query(
-        "MATCH (n) RETURN labels(n)[0] AS type, count(n) AS count"
+    client  = retriever_service.sync_client
+    results = client.query(
+        f"MATCH (n) WHERE NOT n:{ALIAS_LABEL} RETURN labels(n)[0] AS type, count(n) AS count",
+        site="stats",
     )
     total_nodes = sum(r["count"] for r in results)
-    rel_results = retriever_service.graph.query(
-        "MATCH ()-[r]->() RETURN count(r) AS total"
+    rel_results = client.query(
+        "MATCH ()-[r]->() RETURN count(r) AS total", site="stats",
     )
     total_rels = rel_results[0]["total"] if rel_results else 0
     breakdown  = {r["type"]: r["count"] for r in results if r.get("type")}
@@ -495,13 +833,13 @@ def _fetch_graph_stats() -> dict:
 
 @app.get("/api/graph/stats", tags=["Graph"])
 async def get_graph_stats():
-    """Return high-level graph statistics (non-blocking, 12 s timeout)."""
+    """Return high-level graph statistics (non-blocking, NEO4J_STATS_TIMEOUT_S per query)."""
     import asyncio
     try:
         loop = asyncio.get_running_loop()
         data = await asyncio.wait_for(
             loop.run_in_executor(None, _fetch_graph_stats),
-            timeout=12.0
+            timeout=_outer_timeout("stats", queries=2),
         )
         return data
     except asyncio.TimeoutError:
@@ -511,10 +849,106 @@ async def get_graph_stats():
         return {"total_nodes": 0, "total_relations": 0, "breakdown": {}, "error": str(exc)}
 
 
+async def _export_lines():
+    """NDJSON lines of every node, then every relationship, then a summary."""
+    from app.db.neo4j_client import AsyncNeo4jClient
+    from app.db.schema import ALIAS_LABEL
+    client  = AsyncNeo4jClient()
+    streams = {
+        "node": client.stream(f"""
+            MATCH (n) WHERE NOT n:{ALIAS_LABEL}
+            RETURN coalesce(n.id, elementId(n)) AS id, labels(n) AS labels, properties(n) AS properties
+        """),
+        "relationship": client.stream("""
+            MATCH (n)-[r]->(m)
+            RETURN coalesce(n.id, elementId(n)) AS source, type(r) AS rel_type,
+                   properties(r) AS properties, coalesce(m.id, elementId(m)) AS target
+        """),
+    }
+    try:
+        for kind, stream in streams.items():
+            async for row in stream:
+                yield _json.dumps({"type": kind, **row}, ensure_ascii=False, default=str) + "\n"
+        summary = {kind: stream.summary for kind, stream in streams.items()}
+        yield _json.dumps({"type": "summary", **summary}) + "\n"
+    except Exception as exc:
+        logger.error(f"Graph export error: {exc}")
+        yield _json.dumps({"type": "error", "message": str(exc)}) + "\n"
+
+
+@app.get("/api/graph/export", tags=["Graph"])
+async def export_graph():
+    """
+    Stream the whole graph as NDJSON. Records are pulled from Neo4j
+    NEO4J_FETCH_SIZE at a time as the client reads, so memory stays flat
+    however large the graph is.
+    """
+    return StreamingResponse(
+        _export_lines(),
+        media_type = "application/x-ndjson",
+        headers    = {"Content-Disposition": 'attachment; filename="finagent-graph.ndjson"'},
+    )
+
+
+@app.post("/api/graph/merge", status_code=202, tags=["Graph"])
+async def start_entity_merge(full: bool = False, batch_size: Optional[int] = None):
+    """
+    Start the cross-document entity merge in the background. Incremental by
+    default (nodes written since the last run); `full=true` examines every node.
+    """
+    from app.services.entity_merge import MergeAlreadyRunning, entity_merge_job
+    try:
+        return entity_merge_job.start(full=full, batch_size=batch_size)
+    except MergeAlreadyRunning as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@app.get("/api/graph/merge", tags=["Graph"])
+async def get_entity_merge_status():
+    """Progress / result metrics of the current or last entity merge run."""
+    from app.services.entity_merge import entity_merge_job
+    return entity_merge_job.status()
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # API — HEALTH
 # ════════════════════════════════════════════════════════════════════════════
 
+@app.get("/api/metrics", tags=["Health"])
+async def metrics():
+    """Cache hit rates and graph write throughput for this process."""
+    from app.db.extraction_cache import get_extraction_cache
+    from app.db.driver_registry import get_driver_registry
+    from app.db.graph_writer import get_graph_writer
+    from app.db.query_cache import get_query_cache
+    from app.db.query_limits import limit_stats
+    from app.db.vector_store import get_vector_store
+    from app.services.answer_cache import get_answer_cache
+    from app.services.cypher_guard import get_cypher_guard
+    from app.services.cypher_params import get_shape_stats
+    from app.services.graph_retriever import retriever_service
+
+    query_cache      = get_query_cache()
+    answer_cache     = get_answer_cache()
+    extraction_cache = get_extraction_cache()
+    vector_store     = get_vector_store()
+    cypher_guard     = get_cypher_guard()
+    shape_stats      = get_shape_stats()
+    return {
+        "query_cache":      query_cache.stats() if query_cache else {"enabled": False},
+        "extraction_cache": extraction_cache.stats() if extraction_cache else {"enabled": False},
+        "graph_writer":     get_graph_writer().stats(),
+        "answer_cache":     answer_cache.stats() if answer_cache else {"enabled": False},
+        "vector_store":     vector_store.stats() if vector_store else {"enabled": False},
+        "planning":         retriever_service.planning_stats(),
+        "fallback":         retriever_service.fallback_stats(),
+        "cypher_guard":     cypher_guard.stats() if cypher_guard else {"enabled": False},
+        "cypher_params":    shape_stats.stats() if shape_stats else {"enabled": False},
+        "neo4j_limits":     limit_stats.stats(),
+        "neo4j_pool":       get_driver_registry().stats(),
+    }
+
+
 @app.get("/api/health", tags=["Health"])
 async def health():
     return {
@@ -530,7 +964,7 @@ async def get_data_legacy(question: str):
     if not question:
         raise HTTPException(status_code=400, detail="'question' required")
     try:
-        result = _get_kyc_agent().invoke(_init_inputs(question, "basic", "PAID", str(uuid.uuid4())))
+        result = await _get_kyc_agent().ainvoke(_init_inputs(question, "basic", "PAID", str(uuid.uuid4())))
         return {"status": "success", "answer": result.get("answer"), "cypher_used": result.get("cypher_query")}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
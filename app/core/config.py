@@ -10,11 +10,91 @@ class Settings:
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
     NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+    NEO4J_SCHEMA_BOOTSTRAP = os.getenv("NEO4J_SCHEMA_BOOTSTRAP", "true").lower() == "true"
+    NEO4J_POOL_MAX_SIZE          = int(os.getenv("NEO4J_POOL_MAX_SIZE",            "50"))
+    NEO4J_POOL_ACQUIRE_TIMEOUT_S = float(os.getenv("NEO4J_POOL_ACQUIRE_TIMEOUT_S", "30"))
+    NEO4J_POOL_MAX_LIFETIME_S    = float(os.getenv("NEO4J_POOL_MAX_LIFETIME_S",    "1800"))
+    NEO4J_KEEPALIVE_S            = float(os.getenv("NEO4J_KEEPALIVE_S",            "240"))    # 0 = warm once at startup
+    NEO4J_FETCH_SIZE             = int(os.getenv("NEO4J_FETCH_SIZE",               "1000"))   # records per PULL when streaming
+    NEO4J_MAX_RETRY_TIME_S       = float(os.getenv("NEO4J_MAX_RETRY_TIME_S",       "15"))     # managed-transaction retry budget
 
     # ── LLM ───────────────────────────────────────────────────────────────
     GROQ_API_KEY   = os.getenv("GROQ_API_KEY",   "")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
+    # ── Ingestion ─────────────────────────────────────────────────────────
+    EXTRACTION_MAX_CONCURRENCY  = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", "4"))
+    EXTRACTION_CACHE_ENABLED    = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_PATH       = os.getenv("EXTRACTION_CACHE_PATH",    "data/extraction_cache.sqlite3")
+    EXTRACTION_CACHE_MAX_MB     = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+    CHUNK_MAX_TOKENS            = int(os.getenv("CHUNK_MAX_TOKENS",            "8000"))
+    CHUNK_OVERLAP_TOKENS        = int(os.getenv("CHUNK_OVERLAP_TOKENS",        "150"))
+    CHUNK_OUTPUT_RESERVE_TOKENS = int(os.getenv("CHUNK_OUTPUT_RESERVE_TOKENS", "4096"))
+    INGEST_MAX_WORKERS          = int(os.getenv("INGEST_MAX_WORKERS",      "1"))
+    INGEST_MAX_QUEUE            = int(os.getenv("INGEST_MAX_QUEUE",        "10"))
+    GRAPH_WRITE_BATCH_SIZE      = int(os.getenv("GRAPH_WRITE_BATCH_SIZE",  "0"))
+    GRAPH_WRITE_COALESCE_MS     = int(os.getenv("GRAPH_WRITE_COALESCE_MS", "50"))
+    GRAPH_WRITE_MAX_ROWS        = int(os.getenv("GRAPH_WRITE_MAX_ROWS",    "20000"))
+
+    # ── Query result cache ────────────────────────────────────────────────
+    QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+    QUERY_CACHE_MAX_MB  = int(os.getenv("QUERY_CACHE_MAX_MB", "64"))
+    QUERY_CACHE_TTL_S   = int(os.getenv("QUERY_CACHE_TTL_S",  "300"))
+
+    # ── Semantic answer cache ─────────────────────────────────────────────
+    ANSWER_CACHE_ENABLED     = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD   = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.88"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_TTL_S       = int(os.getenv("ANSWER_CACHE_TTL_S", "300"))
+    EMBEDDING_MODEL          = os.getenv("EMBEDDING_MODEL", "")   # sentence-transformers name; empty = hashing
+
+    # ── Entity vector store ───────────────────────────────────────────────
+    VECTOR_STORE_ENABLED  = os.getenv("VECTOR_STORE_ENABLED", "true").lower() == "true"
+    VECTOR_STORE_DIR      = os.getenv("VECTOR_STORE_DIR", "data/vector_store")
+    VECTOR_LINK_TOP_K     = int(os.getenv("VECTOR_LINK_TOP_K", "5"))
+    VECTOR_LINK_MIN_SCORE = float(os.getenv("VECTOR_LINK_MIN_SCORE", "0.45"))
+
+    # ── LLM planning mode per depth: "two_step" | "single" ────────────────
+    PLANNING_MODE_BASIC = os.getenv("PLANNING_MODE_BASIC", "two_step")
+    PLANNING_MODE_DEEP  = os.getenv("PLANNING_MODE_DEEP",  "single")
+
+    # ── Fast-path query router ────────────────────────────────────────────
+    ROUTER_ENABLED        = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+    ROUTER_MIN_LINK_SCORE = float(os.getenv("ROUTER_MIN_LINK_SCORE", "0.5"))
+
+    # ── Cypher cost guard (EXPLAIN before running LLM Cypher) ─────────────
+    CYPHER_GUARD_ENABLED            = os.getenv("CYPHER_GUARD_ENABLED", "true").lower() == "true"
+    CYPHER_GUARD_MAX_ESTIMATED_ROWS = int(os.getenv("CYPHER_GUARD_MAX_ESTIMATED_ROWS", "1000000"))
+    CYPHER_GUARD_MAX_CARTESIAN_ROWS = int(os.getenv("CYPHER_GUARD_MAX_CARTESIAN_ROWS", "10000"))
+    CYPHER_GUARD_MAX_HOPS           = int(os.getenv("CYPHER_GUARD_MAX_HOPS",   "4"))
+    CYPHER_GUARD_ROW_LIMIT          = int(os.getenv("CYPHER_GUARD_ROW_LIMIT",  "200"))
+    CYPHER_GUARD_CACHE_SIZE         = int(os.getenv("CYPHER_GUARD_CACHE_SIZE", "512"))
+
+    # ── Neo4j query limits per call site (0 = none) ───────────────────────
+    NEO4J_INVESTIGATION_TIMEOUT_S = float(os.getenv("NEO4J_INVESTIGATION_TIMEOUT_S", "30"))
+    NEO4J_INVESTIGATION_MAX_ROWS  = int(os.getenv("NEO4J_INVESTIGATION_MAX_ROWS",    "1000"))
+    NEO4J_VISUALIZATION_TIMEOUT_S = float(os.getenv("NEO4J_VISUALIZATION_TIMEOUT_S", "10"))
+    NEO4J_VISUALIZATION_MAX_ROWS  = int(os.getenv("NEO4J_VISUALIZATION_MAX_ROWS",    "2000"))
+    NEO4J_STATS_TIMEOUT_S         = float(os.getenv("NEO4J_STATS_TIMEOUT_S",         "10"))
+    NEO4J_STATS_MAX_ROWS          = int(os.getenv("NEO4J_STATS_MAX_ROWS",            "1000"))
+    NEO4J_INGEST_TIMEOUT_S        = float(os.getenv("NEO4J_INGEST_TIMEOUT_S",        "300"))
+    NEO4J_INGEST_MAX_ROWS         = int(os.getenv("NEO4J_INGEST_MAX_ROWS",           "0"))     # paging needs full pages
+    NEO4J_EXPORT_TIMEOUT_S        = float(os.getenv("NEO4J_EXPORT_TIMEOUT_S",        "600"))
+    NEO4J_EXPORT_MAX_ROWS         = int(os.getenv("NEO4J_EXPORT_MAX_ROWS",           "0"))
+
+    # ── Cypher auto-parameterisation (plan-cache reuse) ───────────────────
+    CYPHER_AUTOPARAM_ENABLED        = os.getenv("CYPHER_AUTOPARAM_ENABLED", "true").lower() == "true"
+    CYPHER_AUTOPARAM_RENAME         = os.getenv("CYPHER_AUTOPARAM_RENAME",  "true").lower() == "true"
+    CYPHER_AUTOPARAM_TRACKED_SHAPES = int(os.getenv("CYPHER_AUTOPARAM_TRACKED_SHAPES", "1000"))
+
+    # ── Answer context encoding ───────────────────────────────────────────
+    GRAPH_CONTEXT_COMPACT    = os.getenv("GRAPH_CONTEXT_COMPACT", "true").lower() == "true"   # false = str(rows)
+    GRAPH_CONTEXT_MAX_TOKENS = int(os.getenv("GRAPH_CONTEXT_MAX_TOKENS", "3000"))
+
+    # ── Cross-document entity merge ───────────────────────────────────────
+    ENTITY_MERGE_BATCH_SIZE = int(os.getenv("ENTITY_MERGE_BATCH_SIZE", "200"))
+    ENTITY_MERGE_STATE_PATH = os.getenv("ENTITY_MERGE_STATE_PATH", "data/entity_merge_state.json")
+
     # ── DOKU Payment Gateway ──────────────────────────────────────────────
     DOKU_CLIENT_ID  = os.getenv("DOKU_CLIENT_ID",  "demo-client-id")
     DOKU_SECRET_KEY = os.getenv("DOKU_SECRET_KEY", "demo-secret-key")
@@ -0,0 +1,222 @@
+"""
+FinAgent — Neo4j Driver Registry
+One pooled driver per process (plus one async driver for the event loop).
+Every Neo4jClient / AsyncNeo4jClient borrows its sessions from here, so an
+upload, a merge run and an investigation share warm TLS connections instead
+of each opening — and verifying — a driver of its own.
+
+  pool       — NEO4J_POOL_MAX_SIZE connections; a session waits at most
+               NEO4J_POOL_ACQUIRE_TIMEOUT_S for one; connections are
+               recycled after NEO4J_POOL_MAX_LIFETIME_S (AuraDB drops idle
+               ones on its side)
+  keep-alive — a daemon thread connects at startup and runs RETURN 1 every
+               NEO4J_KEEPALIVE_S, so a paused / cold AuraDB wakes on the
+               warmer instead of on a user request; pooled connections idle
+               longer than that are liveness-checked before reuse
+  retries    — managed transactions (execute_read / execute_write) are
+               retried with exponential backoff for up to
+               NEO4J_MAX_RETRY_TIME_S on transient errors and leader switches
+  metrics    — sessions in use / peak / borrowed per driver, keep-alive pings
+               (/api/metrics → neo4j_pool)
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from neo4j import AsyncGraphDatabase, GraphDatabase
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _driver_config() -> dict:
+    keepalive = settings.NEO4J_KEEPALIVE_S or None
+    return {
+        "max_connection_pool_size":       settings.NEO4J_POOL_MAX_SIZE,
+        "connection_acquisition_timeout": settings.NEO4J_POOL_ACQUIRE_TIMEOUT_S,
+        "max_connection_lifetime":        settings.NEO4J_POOL_MAX_LIFETIME_S,
+        "liveness_check_timeout":         keepalive,
+        "max_transaction_retry_time":     settings.NEO4J_MAX_RETRY_TIME_S,
+    }
+
+
+class _PoolStats:
+    def __init__(self):
+        self.in_use   = 0
+        self.peak     = 0
+        self.borrowed = 0
+        self.failed   = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "sessions_in_use": self.in_use,
+            "peak_in_use":     self.peak,
+            "utilization":     round(self.in_use / settings.NEO4J_POOL_MAX_SIZE, 3),
+            "borrowed":        self.borrowed,
+            "failed":          self.failed,
+        }
+
+
+class DriverRegistry:
+    def __init__(self):
+        self._driver       = None
+        self._async_driver = None
+        self._lock         = threading.Lock()
+        self._async_lock   = asyncio.Lock()
+        self._sync_stats   = _PoolStats()
+        self._async_stats  = _PoolStats()
+        self._stats_lock   = threading.Lock()
+        self._keepalive: Optional[threading.Thread] = None
+        self._stop         = threading.Event()
+        self._pings        = {"ok": 0, "failed": 0, "last_ms": None}
+
+    # ── Drivers ──────────────────────────────────────────────────────────
+
+    def driver(self):
+        """The process-wide sync driver, created on first use."""
+        with self._lock:
+            if self._driver is None:
+                self._driver = GraphDatabase.driver(
+                    settings.NEO4J_URI,
+                    auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+                    **_driver_config(),
+                )
+                logger.info(
+                    f"✅ Neo4j driver pool dibuat: {settings.NEO4J_URI} "
+                    f"(db={settings.NEO4J_DATABASE}, max={settings.NEO4J_POOL_MAX_SIZE})"
+                )
+            return self._driver
+
+    async def async_driver(self):
+        """The async driver — it belongs to the event loop that first used it."""
+        async with self._async_lock:
+            if self._async_driver is None:
+                self._async_driver = AsyncGraphDatabase.driver(
+                    settings.NEO4J_URI,
+                    auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+                    **_driver_config(),
+                )
+                logger.info(f"✅ Async Neo4j driver pool dibuat: {settings.NEO4J_URI}")
+            return self._async_driver
+
+    # ── Sessions ─────────────────────────────────────────────────────────
+
+    def _borrow(self, stats: _PoolStats) -> None:
+        with self._stats_lock:
+            stats.in_use   += 1
+            stats.borrowed += 1
+            stats.peak      = max(stats.peak, stats.in_use)
+
+    def _give_back(self, stats: _PoolStats, failed: bool) -> None:
+        with self._stats_lock:
+            stats.in_use -= 1
+            stats.failed += int(failed)
+
+    @contextmanager
+    def session(self, **config):
+        """A session on the shared pool (database defaults to NEO4J_DATABASE)."""
+        config.setdefault("database", settings.NEO4J_DATABASE)
+        self._borrow(self._sync_stats)
+        failed = False
+        try:
+            with self.driver().session(**config) as session:
+                yield session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._give_back(self._sync_stats, failed)
+
+    @asynccontextmanager
+    async def async_session(self, **config):
+        """session() on the async driver."""
+        config.setdefault("database", settings.NEO4J_DATABASE)
+        driver = await self.async_driver()
+        self._borrow(self._async_stats)
+        failed = False
+        try:
+            async with driver.session(**config) as session:
+                yield session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._give_back(self._async_stats, failed)
+
+    # ── Keep-alive ───────────────────────────────────────────────────────
+
+    def ping(self) -> bool:
+        """One RETURN 1 round trip on the pool; records its latency."""
+        t0 = time.perf_counter()
+        try:
+            with self.session() as session:
+                session.run("RETURN 1").consume()
+        except Exception as exc:
+            self._pings["failed"] += 1
+            logger.warning(f"⚠️ Neo4j keep-alive gagal: {exc}")
+            return False
+        self._pings["ok"] += 1
+        self._pings["last_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return True
+
+    def start_keepalive(self) -> None:
+        """Warm the pool now and every NEO4J_KEEPALIVE_S (0 = warm once)."""
+        if self._keepalive is not None:
+            return
+
+        def _loop():
+            if self.ping():
+                logger.info(f"🔥 Neo4j pool warm ({self._pings['last_ms']} ms)")
+            while settings.NEO4J_KEEPALIVE_S and not self._stop.wait(settings.NEO4J_KEEPALIVE_S):
+                self.ping()
+
+        self._stop.clear()
+        self._keepalive = threading.Thread(target=_loop, name="neo4j-keepalive", daemon=True)
+        self._keepalive.start()
+
+    # ── Shutdown / metrics ───────────────────────────────────────────────
+
+    def close(self) -> None:
+        self._stop.set()
+        self._keepalive = None
+        with self._lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
+                logger.info("✅ Driver Neo4j ditutup.")
+
+    async def aclose(self) -> None:
+        async with self._async_lock:
+            if self._async_driver is not None:
+                await self._async_driver.close()
+                self._async_driver = None
+                logger.info("✅ Async driver Neo4j ditutup.")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_size":          settings.NEO4J_POOL_MAX_SIZE,
+                "acquire_timeout_s": settings.NEO4J_POOL_ACQUIRE_TIMEOUT_S,
+                "max_lifetime_s":    settings.NEO4J_POOL_MAX_LIFETIME_S,
+                "sync":              {"open": self._driver is not None, **self._sync_stats.to_dict()},
+                "async":             {"open": self._async_driver is not None, **self._async_stats.to_dict()},
+                "keepalive":         {"interval_s": settings.NEO4J_KEEPALIVE_S, **self._pings},
+            }
+
+
+_registry: Optional[DriverRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_driver_registry() -> DriverRegistry:
+    """Process-wide registry — one connection pool for every Neo4j caller."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DriverRegistry()
+        return _registry
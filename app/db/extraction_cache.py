@@ -0,0 +1,143 @@
+"""
+FinAgent — LLM Extraction Cache
+Content-addressed, on-disk cache of chunk extraction results (SQLite).
+
+  key   = sha256(system prompt ∥ model name ∥ chunk text)
+  value = ExtractionResult serialised as JSON
+
+Re-uploading a document (or an amended version with mostly unchanged
+pages) resolves every unchanged chunk from disk instead of calling the LLM.
+The store is bounded by total payload size; least-recently-used entries
+are evicted first.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExtractionCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self._lock     = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key       TEXT PRIMARY KEY,
+                payload   TEXT    NOT NULL,
+                size      INTEGER NOT NULL,
+                last_used REAL    NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extraction_cache_lru ON extraction_cache (last_used)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()
+        self._total_bytes = row[0]
+        logger.info(f"Extraction cache ready: {path} ({self._total_bytes // 1024} KB)")
+
+    @staticmethod
+    def make_key(text: str, system_prompt: str, model_name: str) -> str:
+        h = hashlib.sha256()
+        for part in (system_prompt, model_name, text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE extraction_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, payload: str) -> None:
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, payload, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the store fits max_bytes."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM extraction_cache ORDER BY last_used ASC"
+        ).fetchall():
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+            self._total_bytes -= size
+            evicted += 1
+        logger.info(f"Extraction cache evicted {evicted} entries ({self._total_bytes // 1024} KB kept)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        return {
+            "entries":     entries,
+            "bytes":       self._total_bytes,
+            "max_bytes":   self.max_bytes,
+            "hits":        self.hits,
+            "misses":      self.misses,
+        }
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_failed = False
+_cache_lock   = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Process-wide cache, or None when disabled / the file can't be opened."""
+    global _cache, _cache_failed
+    if not settings.EXTRACTION_CACHE_ENABLED or _cache_failed:
+        return None
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = ExtractionCache(
+                    settings.EXTRACTION_CACHE_PATH,
+                    settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+                )
+            except Exception as exc:
+                logger.warning(f"Extraction cache unavailable ({exc}) — caching disabled")
+                _cache_failed = True
+        return _cache
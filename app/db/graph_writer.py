@@ -0,0 +1,223 @@
+"""
+FinAgent — Graph Bulk Writer
+Writes extracted documents to Neo4j over one pooled driver:
+
+  • atomic        — a document's nodes, aliases and relationships commit in
+                    one managed transaction (GRAPH_WRITE_BATCH_SIZE=0), or in
+                    sub-batches of N rows via CALL (row) { ... } IN TRANSACTIONS
+  • group commit  — documents saved concurrently (INGEST_MAX_WORKERS > 1)
+                    are coalesced for GRAPH_WRITE_COALESCE_MS into one
+                    transaction (one commit); each document's statements
+                    still run on their own, so counters stay per document
+  • no result rows — statements return nothing; counts come from the summary
+  • rows/s        — reported per flush and cumulatively (stats())
+
+If a coalesced transaction fails, its documents are retried one by one so a
+bad document never takes the others down with it.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.neo4j_client import Neo4jClient
+from app.db.query_cache import bump_graph_version
+
+logger = get_logger(__name__)
+
+# Statement phases — all nodes are written before the aliases and
+# relationships that point at them, also inside a coalesced transaction
+PHASE_NODES         = 0
+PHASE_ALIASES       = 1
+PHASE_RELATIONSHIPS = 2
+
+_COUNTERS = ("nodes_created", "relationships_created", "properties_set", "nodes_deleted")
+
+
+class Statement(NamedTuple):
+    phase: int
+    body:  str      # Cypher run once per element of $rows, bound as `row`; no RETURN
+    rows:  list
+
+
+class DocumentWrite:
+    """Everything one document writes, as UNWIND-able statements."""
+
+    def __init__(self, source: str):
+        self.source     = source
+        self.statements: list[Statement] = []
+
+    def add(self, phase: int, body: str, rows: list) -> None:
+        if rows:
+            self.statements.append(Statement(phase, body, rows))
+
+    @property
+    def rows(self) -> int:
+        return sum(len(s.rows) for s in self.statements)
+
+
+def _ordered(doc: DocumentWrite) -> list[Statement]:
+    """A document's statements, nodes before the aliases / relationships using them."""
+    return sorted(doc.statements, key=lambda st: st.phase)
+
+
+def _add_counters(totals: dict, counters) -> None:
+    for key in _COUNTERS:
+        totals[key] += getattr(counters, key)
+
+
+def _run_documents_tx(tx, docs: list[DocumentWrite]) -> list[dict]:
+    """Counters per document, all written in the one transaction `tx`."""
+    per_doc = []
+    for doc in docs:
+        totals = dict.fromkeys(_COUNTERS, 0)
+        for st in _ordered(doc):
+            _add_counters(totals, tx.run(f"UNWIND $rows AS row\n{st.body}", rows=st.rows).consume().counters)
+        per_doc.append(totals)
+    return per_doc
+
+
+class GraphWriter:
+    def __init__(
+        self,
+        client: Optional[Neo4jClient] = None,
+        batch_size: Optional[int] = None,
+        coalesce_ms: Optional[int] = None,
+        max_rows: Optional[int] = None,
+    ):
+        """
+        batch_size  : rows per sub-transaction (0 = whole write in one transaction)
+        coalesce_ms : how long a flush waits for more documents to join it
+        max_rows    : rows at which a coalesced flush stops waiting
+        """
+        self.client      = client or Neo4jClient()
+        self.batch_size  = settings.GRAPH_WRITE_BATCH_SIZE if batch_size is None else batch_size
+        self.coalesce_s  = (settings.GRAPH_WRITE_COALESCE_MS if coalesce_ms is None else coalesce_ms) / 1000
+        self.max_rows    = max_rows or settings.GRAPH_WRITE_MAX_ROWS
+        self._queue:     "queue.Queue[tuple[DocumentWrite, Future]]" = queue.Queue()
+        self._thread:    Optional[threading.Thread] = None
+        self._lock       = threading.Lock()
+        self._stats      = {"documents": 0, "transactions": 0, "rows": 0, "seconds": 0.0, "failed": 0}
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def write(self, doc: DocumentWrite) -> dict:
+        """Write one document; blocks until committed. Raises if the write fails."""
+        return self.submit(doc).result()
+
+    def submit(self, doc: DocumentWrite) -> Future:
+        future: Future = Future()
+        if not doc.statements:
+            future.set_result(dict.fromkeys(_COUNTERS, 0))
+            return future
+        self._ensure_thread()
+        self._queue.put((doc, future))
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        s["rows_per_s"] = round(s["rows"] / s["seconds"], 1) if s["seconds"] else 0.0
+        s["seconds"]    = round(s["seconds"], 3)
+        return s
+
+    # ── Writer thread ────────────────────────────────────────────────────
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="graph-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            rows  = batch[0][0].rows
+            deadline = time.monotonic() + self.coalesce_s
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += item[0].rows
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple]) -> None:
+        docs = [doc for doc, _ in batch]
+        rows = sum(d.rows for d in docs)
+        t0   = time.perf_counter()
+        try:
+            per_doc = self._execute(docs)
+        except Exception as exc:
+            # Sub-batched writes may have committed part of the rows
+            if self.batch_size:
+                bump_graph_version("partial graph write")
+            if len(batch) > 1:
+                logger.warning(f"Coalesced write of {len(batch)} documents failed ({exc}) — retrying one by one")
+                for item in batch:
+                    self._flush([item])
+                return
+            with self._lock:
+                self._stats["failed"] += 1
+            logger.error(f"❌ Graph write failed for {docs[0].source}: {exc}")
+            batch[0][1].set_exception(exc)
+            return
+
+        elapsed = time.perf_counter() - t0
+        totals  = dict.fromkeys(_COUNTERS, 0)
+        for counters in per_doc:
+            for key in _COUNTERS:
+                totals[key] += counters[key]
+        bump_graph_version(f"graph write ({len(docs)} documents)")
+        with self._lock:
+            self._stats["documents"]    += len(docs)
+            self._stats["transactions"] += 1
+            self._stats["rows"]         += rows
+            self._stats["seconds"]      += elapsed
+        logger.info(
+            f"Graph write | docs={len(docs)} rows={rows} | {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s) | "
+            f"nodes+{totals['nodes_created']} rels+{totals['relationships_created']}"
+        )
+        for (doc, future), counters in zip(batch, per_doc):
+            future.set_result({**counters, "rows": doc.rows, "seconds": round(elapsed, 3)})
+
+    def _execute(self, docs: list[DocumentWrite]) -> list[dict]:
+        """Write `docs` and return each one's counters, in order."""
+        if not self.batch_size:
+            return self.client.execute_write(_run_documents_tx, docs)
+
+        # Sub-batches: each statement commits every batch_size rows (auto-commit only)
+        per_doc = []
+        for doc in docs:
+            totals = dict.fromkeys(_COUNTERS, 0)
+            for st in _ordered(doc):
+                summary = self.client.execute_autocommit(
+                    f"UNWIND $rows AS row\n"
+                    f"CALL (row) {{\n{st.body}\n}} IN TRANSACTIONS OF {int(self.batch_size)} ROWS",
+                    {"rows": st.rows},
+                )
+                _add_counters(totals, summary.counters)
+            per_doc.append(totals)
+        return per_doc
+
+
+_writer: Optional[GraphWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_graph_writer() -> GraphWriter:
+    """Process-wide writer — one coalescing queue for every save."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GraphWriter()
+        return _writer
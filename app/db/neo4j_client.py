@@ -1,46 +1,273 @@
-import os
-from neo4j import GraphDatabase
+from typing import AsyncIterator, Iterator, Optional
+from neo4j import READ_ACCESS, WRITE_ACCESS, unit_of_work
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.db.driver_registry import get_driver_registry
+from app.db.query_limits import QueryPolicy, get_policy, limit_stats
 
 logger = get_logger(__name__)
 
-URI      = os.getenv("NEO4J_URI",      "bolt://localhost:7687")
-USER     = os.getenv("NEO4J_USERNAME", "neo4j")
-PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
-DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+
+def _access(read: bool) -> str:
+    return READ_ACCESS if read else WRITE_ACCESS
+
+
+def _rows_tx(tx, query: str, parameters: dict, max_rows: int) -> tuple[list, bool]:
+    """Transaction function: (records as dicts, whether max_rows cut the result)."""
+    result = tx.run(query, parameters)
+    rows   = []
+    for record in result:
+        rows.append(record.data())
+        if max_rows and len(rows) >= max_rows:
+            return rows, result.peek() is not None
+    return rows, False
+
+
+async def _arows_tx(tx, query: str, parameters: dict, max_rows: int) -> tuple[list, bool]:
+    """Async _rows_tx."""
+    result = await tx.run(query, parameters)
+    rows   = []
+    async for record in result:
+        rows.append(record.data())
+        if max_rows and len(rows) >= max_rows:
+            return rows, await result.peek() is not None
+    return rows, False
+
+
+def _stream_summary(summary, records: int, capped: bool) -> dict:
+    """Counters of a finished stream: rows, timings and any non-zero update counts."""
+    counters = {
+        k: v for k, v in vars(summary.counters).items()
+        if not k.startswith("_") and isinstance(v, int) and not isinstance(v, bool) and v
+    }
+    return {
+        "records":            records,
+        "capped":             capped,
+        "available_after_ms": summary.result_available_after,
+        "consumed_after_ms":  summary.result_consumed_after,
+        "counters":           counters,
+    }
+
+
+class RecordStream:
+    """
+    Records of one statement as dicts, pulled from the server `fetch_size`
+    at a time as the caller iterates — the driver asks for the next batch
+    only when the previous one has been consumed, so a slow consumer holds
+    back the query instead of buffering it. `summary` is set once the
+    stream is exhausted. Iterate once; breaking out early closes the session.
+    """
+
+    def __init__(self, registry, query: str, parameters: Optional[dict], policy: QueryPolicy, fetch_size: int):
+        self.query       = query
+        self.summary:    Optional[dict] = None
+        self._registry   = registry
+        self._parameters = parameters or {}
+        self._policy     = policy
+        self._fetch_size = fetch_size
+
+    def __iter__(self) -> Iterator[dict]:
+        policy = self._policy
+        with limit_stats.track(policy, self.query), self._registry.session(fetch_size=self._fetch_size, default_access_mode=_access(policy.reads)) as session:
+            result = session.run(policy.statement(self.query), self._parameters)
+            count, capped = 0, False
+            for record in result:
+                yield record.data()
+                count += 1
+                if policy.capped(count):
+                    capped = result.peek() is not None
+                    break
+            if capped:
+                limit_stats.row_cap(policy, self.query)
+            self.summary = _stream_summary(result.consume(), count, capped)
+        logger.info(f"🌊 Stream selesai [{policy.site}]: {count} record")
+
+
+class AsyncRecordStream(RecordStream):
+    """RecordStream over the async driver — `async for` instead of `for`."""
+
+    def __iter__(self):
+        raise TypeError("AsyncRecordStream is consumed with async for")
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        policy = self._policy
+        with limit_stats.track(policy, self.query):
+            async with self._registry.async_session(
+                fetch_size=self._fetch_size, default_access_mode=_access(policy.reads),
+            ) as session:
+                result = await session.run(policy.statement(self.query), self._parameters)
+                count, capped = 0, False
+                async for record in result:
+                    yield record.data()
+                    count += 1
+                    if policy.capped(count):
+                        capped = await result.peek() is not None
+                        break
+                if capped:
+                    limit_stats.row_cap(policy, self.query)
+                self.summary = _stream_summary(await result.consume(), count, capped)
+        logger.info(f"🌊 Stream selesai [{policy.site}]: {count} record")
 
 
 class Neo4jClient:
+    """
+    Sessions are borrowed from the process-wide driver pool
+    (app/db/driver_registry.py), so a client is cheap to create and needs
+    no close — the pool is closed once, at shutdown.
+
+    Every statement runs under the timeout / row cap of its call site
+    (app/db/query_limits.py): `site` is "investigation", "visualization",
+    "stats", "export" or "ingest". Reads of the first four are routed to
+    followers / read replicas (neo4j:// URIs); ingest stays on the leader
+    so it sees its own writes.
+    """
+
     def __init__(self):
-        self.driver = None
+        self.registry = get_driver_registry()
 
-    def connect(self):
-        try:
-            self.driver = GraphDatabase.driver(URI, auth=(USER, PASSWORD))
-            self.driver.verify_connectivity()
-            logger.info(f"✅ Berhasil terhubung ke Neo4j: {URI} (db={DATABASE})")
-        except Exception as e:
-            logger.error(f"GAGAL KONEKSI KE NEO4J: {e}")
+    def _managed(self, read: bool, policy: QueryPolicy, label: str, work, *args, **kwargs):
+        """
+        Run work(tx, *args, **kwargs) in a driver-managed transaction: retried
+        with exponential backoff on transient errors / leader switches (up to
+        NEO4J_MAX_RETRY_TIME_S), routed to a reader when `read`.
+        """
+        attempts = 0
 
-    def close(self):
-        if self.driver:
-            self.driver.close()
-            logger.info("✅ Driver Neo4j ditutup.")
+        def _attempt(tx, *a, **kw):
+            nonlocal attempts
+            attempts += 1
+            return work(tx, *a, **kw)
 
-    def execute_query(self, query, parameters=None):
-        if not self.driver:
-            self.connect()
+        _attempt = unit_of_work(timeout=policy.timeout_s or None)(_attempt)
+        with limit_stats.track(policy, label), self.registry.session(default_access_mode=_access(read)) as session:
+            try:
+                return (session.execute_read if read else session.execute_write)(_attempt, *args, **kwargs)
+            finally:
+                if attempts > 1:
+                    limit_stats.retried(policy, label, attempts - 1)
+
+    def query(self, query, parameters=None, site="investigation") -> list:
+        """
+        Run one statement and return its records as dicts. Read sites go to a
+        reader, ingest to the leader; both retried. Raises on failure.
+        """
+        policy = get_policy(site)
+        rows, capped = self._managed(policy.reads, policy, query, _rows_tx, query, parameters or {}, policy.max_rows)
+        if capped:
+            limit_stats.row_cap(policy, query)
+        return rows
+
+    def execute_read(self, work, *args, site="investigation", **kwargs):
+        """
+        Run work(tx, *args, **kwargs) in one managed read transaction, routed
+        to a follower / read replica when the URI is neo4j:// (cluster).
+        Failures are raised to the caller.
+        """
+        return self._managed(True, get_policy(site), getattr(work, "__name__", "read"), work, *args, **kwargs)
+
+    def stream(self, query, parameters=None, site="ingest", fetch_size=None) -> RecordStream:
+        """Records as a lazy, constant-memory stream (fetch_size defaults to NEO4J_FETCH_SIZE)."""
+        return RecordStream(
+            self.registry, query, parameters, get_policy(site), fetch_size or settings.NEO4J_FETCH_SIZE,
+        )
+
+    def execute_query(self, query, parameters=None, site="ingest"):
         logger.debug(f"Menjalankan Query: {query}")
         try:
-            with self.driver.session(database=DATABASE) as session:
-                result = session.run(query, parameters or {})
-                records_list = [record.data() for record in result]
-                logger.info(f"Query selesai. Ditemukan {len(records_list)} record.")
-                return {"data": records_list, "query": query, "records_count": len(records_list)}
+            records_list = self.query(query, parameters, site)
+            logger.info(f"Query selesai. Ditemukan {len(records_list)} record.")
+            return {"data": records_list, "query": query, "records_count": len(records_list)}
         except Exception as e:
             logger.error(f"Gagal execute Query: {e}")
             return None
 
+    def execute_autocommit(self, query, parameters=None, site="ingest"):
+        """
+        Run one statement in an auto-commit transaction and return its
+        summary — required for CALL { ... } IN TRANSACTIONS. Raises on failure.
+        """
+        policy = get_policy(site)
+        with limit_stats.track(policy, query), self.registry.session() as session:
+            return session.run(policy.statement(query), parameters or {}).consume()
+
+    def explain(self, query, parameters=None, site="investigation") -> tuple:
+        """(plan, query_type) of EXPLAIN <query> — planned, never executed. Raises on failure."""
+        policy = get_policy(site)
+        with limit_stats.track(policy, query), self.registry.session(default_access_mode=READ_ACCESS) as session:
+            summary = session.run(policy.statement("EXPLAIN " + query), parameters or {}).consume()
+            return summary.plan, summary.query_type
+
+    def execute_write(self, work, *args, site="ingest", **kwargs):
+        """
+        Run work(tx, *args, **kwargs) in one managed write transaction on the
+        leader — committed as a unit, retried on transient errors. Unlike
+        execute_query, failures are raised to the caller.
+        """
+        return self._managed(False, get_policy(site), getattr(work, "__name__", "write"), work, *args, **kwargs)
+
+
+class AsyncNeo4jClient:
+    """
+    asyncio counterpart of Neo4jClient for the async investigation path —
+    queries wait on the socket without holding the event loop. Sessions
+    come from the registry's async driver, which belongs to the event loop
+    that first used it.
+    """
+
+    def __init__(self):
+        self.registry = get_driver_registry()
+
+    async def _managed(self, read: bool, policy: QueryPolicy, label: str, work, *args, **kwargs):
+        """Neo4jClient._managed over the async driver."""
+        attempts = 0
+
+        async def _attempt(tx, *a, **kw):
+            nonlocal attempts
+            attempts += 1
+            return await work(tx, *a, **kw)
+
+        _attempt = unit_of_work(timeout=policy.timeout_s or None)(_attempt)
+        with limit_stats.track(policy, label):
+            async with self.registry.async_session(default_access_mode=_access(read)) as session:
+                try:
+                    return await (session.execute_read if read else session.execute_write)(_attempt, *args, **kwargs)
+                finally:
+                    if attempts > 1:
+                        limit_stats.retried(policy, label, attempts - 1)
+
+    async def query(self, query, parameters=None, site="investigation") -> list:
+        """Run one statement and return its records as dicts. Raises on failure."""
+        policy = get_policy(site)
+        rows, capped = await self._managed(
+            policy.reads, policy, query, _arows_tx, query, parameters or {}, policy.max_rows,
+        )
+        if capped:
+            limit_stats.row_cap(policy, query)
+        return rows
+
+    async def execute_read(self, work, *args, site="investigation", **kwargs):
+        """Neo4jClient.execute_read with an async work(tx, ...)."""
+        return await self._managed(True, get_policy(site), getattr(work, "__name__", "read"), work, *args, **kwargs)
+
+    async def execute_write(self, work, *args, site="ingest", **kwargs):
+        """Neo4jClient.execute_write with an async work(tx, ...)."""
+        return await self._managed(False, get_policy(site), getattr(work, "__name__", "write"), work, *args, **kwargs)
+
+    def stream(self, query, parameters=None, site="export", fetch_size=None) -> AsyncRecordStream:
+        """Records as a lazy async stream (fetch_size defaults to NEO4J_FETCH_SIZE)."""
+        return AsyncRecordStream(
+            self.registry, query, parameters, get_policy(site), fetch_size or settings.NEO4J_FETCH_SIZE,
+        )
+
+    async def explain(self, query, parameters=None, site="investigation") -> tuple:
+        """(plan, query_type) of EXPLAIN <query> — planned, never executed. Raises on failure."""
+        policy = get_policy(site)
+        with limit_stats.track(policy, query):
+            async with self.registry.async_session(default_access_mode=READ_ACCESS) as session:
+                result  = await session.run(policy.statement("EXPLAIN " + query), parameters or {})
+                summary = await result.consume()
+                return summary.plan, summary.query_type
+
 
 if __name__ == "__main__":
     client = Neo4jClient()
@@ -50,4 +277,4 @@ if __name__ == "__main__":
     except Exception as e:
         print("Error:", e)
     finally:
-        client.close()
+        client.registry.close()
@@ -0,0 +1,174 @@
+"""
+FinAgent — Cypher Result Cache
+In-memory LRU cache in front of read queries, invalidated by graph version.
+
+  key   = normalised Cypher text ∥ parameters (JSON)
+  value = result rows, tagged with the graph version they were read at
+
+Every write path (GraphWriter flushes, the entity merge job) calls
+bump_graph_version(); entries read at an older version are never served.
+Writers outside this process (another API replica, the merge CLI) are not
+seen, so entries also expire after QUERY_CACHE_TTL_S as a safety net.
+The store is bounded by the estimated size of the cached rows.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# ── Graph version ─────────────────────────────────────────────────────────────
+
+_graph_version = 0
+_version_lock  = threading.Lock()
+
+
+def graph_version() -> int:
+    return _graph_version
+
+
+def bump_graph_version(reason: str = "") -> int:
+    """Mark the graph as changed — every cached result becomes stale."""
+    global _graph_version
+    with _version_lock:
+        _graph_version += 1
+        version = _graph_version
+    logger.debug(f"Graph version → {version} ({reason})")
+    return version
+
+
+# ── Cypher normalisation ─────────────────────────────────────────────────────
+
+# String literals are kept verbatim; whitespace and comments elsewhere collapse
+_CYPHER_TOKENS = re.compile(
+    r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|((?:\s+|//[^\n]*)+)"""
+)
+
+
+def normalize_cypher(query: str) -> str:
+    return _CYPHER_TOKENS.sub(lambda m: m.group(1) or " ", query).strip().rstrip(";").strip()
+
+
+# ── Cache ────────────────────────────────────────────────────────────────────
+
+class QueryResultCache:
+    def __init__(self, max_bytes: int, ttl_s: float = 0):
+        self.max_bytes = max_bytes
+        self.ttl_s     = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()   # key → (version, ts, rows, size)
+        self._bytes    = 0
+        self._lock     = threading.Lock()
+        self.hits      = 0
+        self.misses    = 0
+        self.stale     = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(query: str, params: Optional[dict] = None) -> str:
+        return normalize_cypher(query) + "\x00" + json.dumps(params or {}, sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[list]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            version, ts, rows, size = entry
+            if version != _graph_version or (self.ttl_s and time.time() - ts > self.ttl_s):
+                self._drop(key)
+                self.stale  += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(rows)
+
+    def put(self, key: str, rows: list, version: int) -> None:
+        """Store rows read at `version` (taken before the query ran)."""
+        size = len(key) + len(json.dumps(rows, default=str))
+        if size > self.max_bytes or version != _graph_version:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, time.time(), list(rows), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key)[3]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":       len(self._entries),
+                "bytes":         self._bytes,
+                "max_bytes":     self.max_bytes,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "stale":         self.stale,
+                "evictions":     self.evictions,
+                "hit_rate":      round(self.hits / lookups, 4) if lookups else 0.0,
+                "graph_version": _graph_version,
+            }
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryResultCache]:
+    """Process-wide cache, or None when disabled."""
+    global _cache
+    if not settings.QUERY_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache(settings.QUERY_CACHE_MAX_MB * 1024 * 1024, settings.QUERY_CACHE_TTL_S)
+        return _cache
+
+
+def cached_query(run: Callable[[str, dict], Any], query: str, params: Optional[dict] = None) -> list:
+    """Serve `query` from the cache, or run it via run(query, params) and cache the rows."""
+    cache = get_query_cache()
+    if cache is None:
+        return run(query, params or {})
+    key  = QueryResultCache.make_key(query, params)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+    version = _graph_version
+    rows    = run(query, params or {})
+    cache.put(key, rows, version)
+    return rows
+
+
+async def acached_query(run: Callable[[str, dict], Awaitable[list]], query: str, params: Optional[dict] = None) -> list:
+    """cached_query for an async run(query, params)."""
+    cache = get_query_cache()
+    if cache is None:
+        return await run(query, params or {})
+    key  = QueryResultCache.make_key(query, params)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+    version = _graph_version
+    rows    = await run(query, params or {})
+    cache.put(key, rows, version)
+    return rows
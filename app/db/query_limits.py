@@ -0,0 +1,115 @@
+"""
+FinAgent — Neo4j Query Limits
+Server-side transaction timeout and row cap per call site, applied by
+Neo4jClient / AsyncNeo4jClient to every statement they run.
+
+  site            used by                                   env
+  ─────────────   ───────────────────────────────────────   ─────────────────────────
+  investigation   run_query, fallback search, EXPLAIN,      NEO4J_INVESTIGATION_*
+                  schema lookups
+  visualization   /api/graph                                NEO4J_VISUALIZATION_*
+  stats           /api/graph/stats                          NEO4J_STATS_*
+  ingest          graph writes, alias lookups, entity       NEO4J_INGEST_*
+                  merge, vector store rebuild, schema
+  export          /api/graph/export (streamed)              NEO4J_EXPORT_*
+
+The timeout travels with the transaction (neo4j.Query / unit_of_work), so
+the server aborts the query itself — unlike a client-side wait_for, which
+leaves it running. A row cap stops reading after max_rows; the rest of the
+result is discarded when the session closes. Every site but ingest only
+reads, so its queries run in managed read transactions routed to followers
+/ read replicas; ingest stays on the leader. Timeouts, caps and transient-
+error retries are counted and logged per site (/api/metrics → neo4j_limits).
+"""
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from neo4j import Query
+from neo4j.exceptions import ClientError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SITES = ("investigation", "visualization", "stats", "ingest", "export")
+# Sites whose queries only read — routed to followers / read replicas
+READ_SITES = ("investigation", "visualization", "stats", "export")
+
+
+@dataclass(frozen=True)
+class QueryPolicy:
+    site:      str
+    timeout_s: float        # 0 = the server's default
+    max_rows:  int          # 0 = no cap
+    reads:     bool         # route to a reader (execute_read)
+
+    def statement(self, text: str) -> Query:
+        return Query(text, timeout=self.timeout_s or None)
+
+    def capped(self, count: int) -> bool:
+        return bool(self.max_rows) and count >= self.max_rows
+
+
+def get_policy(site: str) -> QueryPolicy:
+    prefix = site.upper()
+    return QueryPolicy(
+        site      = site,
+        timeout_s = getattr(settings, f"NEO4J_{prefix}_TIMEOUT_S"),
+        max_rows  = getattr(settings, f"NEO4J_{prefix}_MAX_ROWS"),
+        reads     = site in READ_SITES,
+    )
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """Transaction killed by its timeout (server-side)."""
+    return isinstance(exc, ClientError) and "TransactionTimedOut" in (exc.code or "")
+
+
+class _LimitStats:
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._counts = {s: {"queries": 0, "timeouts": 0, "row_caps": 0, "retries": 0} for s in SITES}
+
+    def _bump(self, site: str, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[site][key] += n
+
+    @contextmanager
+    def track(self, policy: QueryPolicy, query: str):
+        """Count the statement; count + log it when its timeout fires."""
+        self._bump(policy.site, "queries")
+        try:
+            yield
+        except Exception as exc:
+            if is_timeout(exc):
+                self._bump(policy.site, "timeouts")
+                logger.warning(
+                    f"⏱️ Neo4j timeout [{policy.site}] after {policy.timeout_s:g}s — "
+                    f"{' '.join(query.split())[:160]}"
+                )
+            raise
+
+    def retried(self, policy: QueryPolicy, label: str, retries: int) -> None:
+        self._bump(policy.site, "retries", retries)
+        logger.warning(f"🔁 Neo4j retry [{policy.site}] x{retries} — {' '.join(label.split())[:160]}")
+
+    def row_cap(self, policy: QueryPolicy, query: str) -> None:
+        self._bump(policy.site, "row_caps")
+        logger.warning(
+            f"✂️ Neo4j row cap [{policy.site}] {policy.max_rows} rows — "
+            f"{' '.join(query.split())[:160]}"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                site: {**counts, "timeout_s": get_policy(site).timeout_s, "max_rows": get_policy(site).max_rows}
+                for site, counts in self._counts.items()
+            }
+
+
+limit_stats = _LimitStats()
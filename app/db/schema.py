@@ -0,0 +1,91 @@
+"""
+FinAgent — Neo4j Schema Bootstrap
+Idempotent constraints and indexes for the KYC graph:
+  - uniqueness constraint on `id` for every entity label
+  - range index on `name_normalized` for every entity label
+  - range index on `updated_at` for every entity label (incremental merge)
+  - full-text index over `name` + `context`
+  - uniqueness constraint on the alias index key, range index on its target
+
+Runs in the background at API startup (NEO4J_SCHEMA_BOOTSTRAP) and from the CLI:
+
+    python -m app.db.schema
+"""
+
+from typing import Optional
+
+from app.core.logging import get_logger
+from app.db.neo4j_client import Neo4jClient
+
+logger = get_logger(__name__)
+
+ENTITY_LABELS  = ("Person", "Company", "Address", "Document", "Entity")
+ALIAS_LABEL    = "EntityAlias"
+FULLTEXT_INDEX = "entity_name_context"
+
+
+def schema_statements() -> list[str]:
+    statements = []
+    for label in ENTITY_LABELS:
+        statements.append(
+            f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS "
+            f"FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+        )
+    for label in ENTITY_LABELS:
+        statements.append(
+            f"CREATE INDEX {label.lower()}_name_normalized IF NOT EXISTS "
+            f"FOR (n:{label}) ON (n.name_normalized)"
+        )
+    for label in ENTITY_LABELS:
+        statements.append(
+            f"CREATE INDEX {label.lower()}_updated_at IF NOT EXISTS "
+            f"FOR (n:{label}) ON (n.updated_at)"
+        )
+    statements.append(
+        f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS "
+        f"FOR (n:{'|'.join(ENTITY_LABELS)}) ON EACH [n.name, n.context]"
+    )
+    statements.append(
+        f"CREATE CONSTRAINT entity_alias_key_unique IF NOT EXISTS "
+        f"FOR (a:{ALIAS_LABEL}) REQUIRE a.key IS UNIQUE"
+    )
+    statements.append(
+        f"CREATE INDEX entity_alias_canonical_id IF NOT EXISTS "
+        f"FOR (a:{ALIAS_LABEL}) ON (a.canonical_id)"
+    )
+    return statements
+
+
+def ensure_schema(client: Optional[Neo4jClient] = None) -> dict:
+    """
+    Apply every schema statement. Safe to run repeatedly; a statement that
+    fails (e.g. existing duplicate ids block a constraint) is logged and
+    skipped so the others still apply.
+    """
+    client   = client or Neo4jClient()
+    applied  = 0
+    failed: list[str] = []
+    for stmt in schema_statements():
+        if client.execute_query(stmt) is None:
+            failed.append(stmt)
+        else:
+            applied += 1
+    if failed:
+        logger.warning(f"Schema bootstrap: {applied} applied, {len(failed)} failed")
+    else:
+        logger.info(f"✅ Schema bootstrap: {applied} constraints/indexes in place")
+    return {"applied": applied, "failed": failed}
+
+
+if __name__ == "__main__":
+    from app.core.logging import setup_logging
+
+    setup_logging()
+    client = Neo4jClient()
+    try:
+        result = ensure_schema(client)
+        for stmt in result["failed"]:
+            print("FAILED:", stmt)
+        print(f"{result['applied']} applied, {len(result['failed'])} failed")
+    finally:
+        client.registry.close()
@@ -0,0 +1,417 @@
+"""
+FinAgent — Entity Vector Store
+Local, memory-mapped embedding index of graph entities (name + context), so
+a question can be linked to node ids before any Cypher is written, instead
+of `toLower(n.name) CONTAINS ...` scans over whole labels.
+
+  VECTOR_STORE_DIR/
+    vectors.f32    raw float32 matrix, one unit row per entity (np.memmap)
+    meta.jsonl     one record per row {key, id, label, name, context}; superseded or
+                   merged-away rows are tombstoned by a {"deleted": key} line
+    manifest.json  embedder name + dimension — a different embedder resets
+                   the store (vectors of two models are not comparable)
+
+  • incremental — save_to_neo4j appends the nodes it created; the entity
+                  merge job tombstones the duplicates it deleted
+  • search      — exact brute-force top-k over the memory map, in row
+                  blocks, so memory stays flat as the index grows
+  • embeddings  — app/services/embeddings.py (offline hashing by default,
+                  sentence-transformers when EMBEDDING_MODEL is set); any
+                  object with name / dim / embed_many() can be passed in
+
+One writer per directory: the API process appends; run the CLI rebuild
+while it is stopped (the API reloads the files when the manifest changes).
+
+    python -m app.db.vector_store --rebuild
+    python -m app.db.vector_store --query "siapa direktur PT Nebula"
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from itertools import islice
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.embeddings import FILLER_WORDS, get_embedder
+
+logger = get_logger(__name__)
+
+_VECTORS  = "vectors.f32"
+_META     = "meta.jsonl"
+_MANIFEST = "manifest.json"
+
+_CONTEXT_WEIGHT = 0.25      # share of the entity vector taken from its context
+_SEARCH_BLOCK   = 8192      # rows scored per matrix product
+_REBUILD_PAGE   = 1000      # entities embedded and appended per step of rebuild()
+_MAX_SPAN_WORDS = 4         # longest question span tried as an entity name
+_MAX_SPANS      = 40
+
+
+def entity_key(label: str, entity_id: str) -> str:
+    """Ids are unique per label, not across labels."""
+    return f"{label}:{entity_id}"
+
+
+class EntityVectorStore:
+    def __init__(self, directory: str, embedder=None):
+        self.directory = directory
+        self.embedder  = embedder or get_embedder()
+        self._lock     = threading.Lock()
+        self._meta:    list[dict] = []           # row → {key, id, label, name, context}
+        self._row_of:  dict[str, int] = {}       # key → live row
+        self._dead:    set[int] = set()
+        self._matrix:  Optional[np.memmap] = None
+        self._manifest_mtime = 0.0
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._load()
+
+    # ── Files ────────────────────────────────────────────────────────────
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        """Read manifest + metadata and map the vectors (caller holds the lock)."""
+        manifest = None
+        try:
+            with open(self._path(_MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning(f"Unreadable vector store manifest ({exc}) — resetting")
+
+        if manifest != {"embedder": self.embedder.name, "dim": self.embedder.dim}:
+            if manifest:
+                logger.warning(
+                    f"Vector store built with {manifest.get('embedder')} — "
+                    f"resetting for {self.embedder.name}"
+                )
+            self._reset_files()
+            return
+
+        records, tombstones = [], set()
+        try:
+            with open(self._path(_META), encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break                    # torn final line of an interrupted append
+                    if "deleted" in rec:
+                        tombstones.add((rec["deleted"], len(records)))
+                    else:
+                        records.append(rec)
+        except FileNotFoundError:
+            pass
+
+        row_bytes = 4 * self.embedder.dim
+        size      = os.path.getsize(self._path(_VECTORS)) if os.path.exists(self._path(_VECTORS)) else 0
+        rows      = min(len(records), size // row_bytes)
+        if rows != len(records) or rows * row_bytes != size:
+            # Interrupted append — the next add() trims the vector file
+            logger.warning(f"Vector store files disagree — using the first {rows} rows")
+            records = records[:rows]
+
+        self._meta, self._row_of, self._dead = records, {}, set()
+        for row, rec in enumerate(records):
+            if rec["key"] in self._row_of:
+                self._dead.add(self._row_of[rec["key"]])
+            self._row_of[rec["key"]] = row
+        # A tombstone only kills rows written before it
+        for key, written_before in tombstones:
+            row = self._row_of.get(key)
+            if row is not None and row < written_before:
+                self._dead.add(row)
+                del self._row_of[key]
+        self._remap()
+        self._manifest_mtime = os.path.getmtime(self._path(_MANIFEST))
+        logger.info(f"Vector store ready: {self.directory} ({len(self._row_of)} entities, {self.embedder.name})")
+
+    def _reset_files(self) -> None:
+        open(self._path(_VECTORS), "wb").close()
+        open(self._path(_META), "w", encoding="utf-8").close()
+        self._write_manifest()
+        self._meta, self._row_of, self._dead, self._matrix = [], {}, set(), None
+
+    def _write_manifest(self) -> None:
+        tmp = self._path(_MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.embedder.dim}, f)
+        os.replace(tmp, self._path(_MANIFEST))
+        self._manifest_mtime = os.path.getmtime(self._path(_MANIFEST))
+
+    def _remap(self) -> None:
+        rows = len(self._meta)
+        self._matrix = (
+            np.memmap(self._path(_VECTORS), dtype=np.float32, mode="r", shape=(rows, self.embedder.dim))
+            if rows else None
+        )
+
+    def _maybe_reload(self) -> None:
+        """Pick up a rebuild done by another process (caller holds the lock)."""
+        try:
+            mtime = os.path.getmtime(self._path(_MANIFEST))
+        except OSError:
+            return
+        if mtime != self._manifest_mtime:
+            logger.info("Vector store changed on disk — reloading")
+            self._load()
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    def _vectors_for(self, entities: list[dict]) -> np.ndarray:
+        names    = self.embedder.embed_many([e["name"] for e in entities])
+        contexts = self.embedder.embed_many([e.get("context") or e["name"] for e in entities])
+        vectors  = (1 - _CONTEXT_WEIGHT) * names + _CONTEXT_WEIGHT * contexts
+        norms    = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def add(self, entities: Iterable[dict]) -> int:
+        """
+        Index entities given as {id, label, name, context}. An entity already
+        indexed with the same name and context is skipped; a changed one is
+        re-embedded and its old row tombstoned. Returns rows appended.
+        """
+        fresh: dict[str, dict] = {}
+        for e in entities:
+            if not e.get("id") or not e.get("name"):
+                continue
+            key = entity_key(e["label"], e["id"])
+            fresh[key] = {
+                "key": key, "id": e["id"], "label": e["label"],
+                "name": e["name"], "context": (e.get("context") or "")[:500],
+            }
+
+        with self._lock:
+            self._maybe_reload()
+            todo = []
+            for key, rec in fresh.items():
+                row = self._row_of.get(key)
+                if row is not None and self._meta[row]["name"] == rec["name"] \
+                        and self._meta[row].get("context") == rec["context"]:
+                    continue
+                todo.append(rec)
+            if not todo:
+                return 0
+
+            vectors = self._vectors_for(todo)
+            with open(self._path(_VECTORS), "r+b") as f:
+                f.truncate(len(self._meta) * 4 * self.embedder.dim)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+            with open(self._path(_META), "a", encoding="utf-8") as f:
+                for rec in todo:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            for rec in todo:
+                old = self._row_of.get(rec["key"])
+                if old is not None:
+                    self._dead.add(old)
+                self._row_of[rec["key"]] = len(self._meta)
+                self._meta.append(rec)
+            self._remap()
+        logger.debug(f"Vector store +{len(todo)} entities")
+        return len(todo)
+
+    def remove(self, label: str, ids: Iterable[str]) -> int:
+        """Tombstone entities deleted from the graph. Returns rows removed."""
+        with self._lock:
+            self._maybe_reload()
+            keys = [k for k in (entity_key(label, i) for i in ids) if k in self._row_of]
+            if not keys:
+                return 0
+            with open(self._path(_META), "a", encoding="utf-8") as f:
+                for key in keys:
+                    f.write(json.dumps({"deleted": key}) + "\n")
+                    self._dead.add(self._row_of.pop(key))
+        return len(keys)
+
+    def rebuild(self, entities: Iterable[dict], page_size: int = _REBUILD_PAGE) -> int:
+        """
+        Replace the whole index with `entities`; compacts away dead rows.
+        Entities are embedded and appended page_size at a time, so memory
+        follows the page size, not the graph size.
+        """
+        with self._lock:
+            self._reset_files()
+        entities, added = iter(entities), 0
+        while page := list(islice(entities, page_size)):
+            added += self.add(page)
+        return added
+
+    # ── Search ───────────────────────────────────────────────────────────
+
+    def search(self, queries: np.ndarray, k: int = 5) -> list[list[tuple[dict, float]]]:
+        """
+        Exact top-k by cosine for each query vector (rows of `queries`).
+        Returns, per query, [(record, score)] best first.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            self._maybe_reload()
+            matrix, meta, dead = self._matrix, self._meta, self._dead
+            if matrix is None or not self._row_of:
+                return [[] for _ in range(len(queries))]
+            dead_rows = np.fromiter(dead, dtype=np.int64, count=len(dead))
+
+        best_rows   = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(matrix), _SEARCH_BLOCK):
+            block  = np.asarray(matrix[start:start + _SEARCH_BLOCK])
+            scores = queries @ block.T                                  # (q, block)
+            local_dead = dead_rows[(dead_rows >= start) & (dead_rows < start + len(block))] - start
+            scores[:, local_dead] = -np.inf
+            take = min(k, scores.shape[1])
+            top  = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_rows   = np.hstack([best_rows, top + start])
+            best_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows   = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        out = []
+        for rows, scores in zip(best_rows, best_scores):
+            order = np.argsort(-scores)
+            out.append([
+                (meta[rows[i]], float(scores[i]))
+                for i in order if np.isfinite(scores[i])
+            ])
+        return out
+
+    def link(self, question: str, k: Optional[int] = None, min_score: Optional[float] = None) -> list[dict]:
+        """
+        Entities named in a question: every span of 1–4 content words is
+        embedded and searched; each entity keeps its best-scoring span.
+        Returns [{id, label, name, score, span}] best first.
+        """
+        k         = k or settings.VECTOR_LINK_TOP_K
+        min_score = settings.VECTOR_LINK_MIN_SCORE if min_score is None else min_score
+        spans     = question_spans(question)
+        if not spans:
+            return []
+
+        best: dict[str, dict] = {}
+        for span, hits in zip(spans, self.search(self.embedder.embed_many(spans), k)):
+            for rec, score in hits:
+                if score < min_score:
+                    continue
+                prev = best.get(rec["key"])
+                if prev is None or score > prev["score"]:
+                    best[rec["key"]] = {
+                        "id": rec["id"], "label": rec["label"], "name": rec["name"],
+                        "score": round(score, 4), "span": span,
+                    }
+        return sorted(best.values(), key=lambda e: -e["score"])[:k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entities":  len(self._row_of),
+                "rows":      len(self._meta),
+                "dead_rows": len(self._dead),
+                "bytes":     len(self._meta) * 4 * self.embedder.dim,
+                "embedder":  self.embedder.name,
+            }
+
+
+def question_spans(question: str) -> list[str]:
+    """Runs of up to _MAX_SPAN_WORDS words that neither start nor end on a filler word."""
+    words = re.findall(r"[\w&.'-]+", question)
+    spans: list[str] = []
+    for n in range(_MAX_SPAN_WORDS, 0, -1):
+        for i in range(len(words) - n + 1):
+            run = words[i:i + n]
+            if run[0].lower() in FILLER_WORDS or run[-1].lower() in FILLER_WORDS:
+                continue
+            if n == 1 and len(run[0]) < 3:
+                continue
+            span = " ".join(run)
+            if span not in spans:
+                spans.append(span)
+    # Longest spans first; short ones are what gets cut on long questions
+    return spans[:_MAX_SPANS]
+
+
+_store: Optional[EntityVectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> Optional[EntityVectorStore]:
+    """Process-wide store, or None when disabled."""
+    global _store
+    if not settings.VECTOR_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = EntityVectorStore(settings.VECTOR_STORE_DIR)
+        return _store
+
+
+# ── Rebuild from Neo4j ───────────────────────────────────────────────────────
+
+def iter_graph_entities(client, page_size: int = 1000) -> Iterable[dict]:
+    """
+    Every entity node, paged by id per label (uses the id uniqueness index).
+    A page is read in one short transaction and handed out once it has
+    closed, so no transaction stays open while the consumer embeds; at most
+    one page is held in memory.
+    """
+    from app.db.schema import ENTITY_LABELS
+
+    for label in ENTITY_LABELS:
+        after = ""
+        while True:
+            page = [
+                {"id": row["id"], "label": label, "name": row["name"], "context": row["context"]}
+                for row in client.stream(
+                    f"""
+                    MATCH (n:{label}) WHERE n.id > $after AND n.name IS NOT NULL
+                    RETURN n.id AS id, n.name AS name, n.context AS context
+                    ORDER BY n.id LIMIT $limit
+                    """,
+                    {"after": after, "limit": page_size},
+                )
+            ]
+            yield from page
+            if len(page) < page_size:
+                break
+            after = page[-1]["id"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.logging import setup_logging
+    from app.db.neo4j_client import Neo4jClient
+
+    parser = argparse.ArgumentParser(description="Entity vector store maintenance.")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every entity node in Neo4j")
+    parser.add_argument("--query", default=None, help="link the entities named in a question")
+    args = parser.parse_args()
+
+    setup_logging()
+    store = EntityVectorStore(settings.VECTOR_STORE_DIR)
+    if args.rebuild:
+        client = Neo4jClient()
+        t0 = time.perf_counter()
+        try:
+            added = store.rebuild(iter_graph_entities(client, _REBUILD_PAGE), _REBUILD_PAGE)
+        finally:
+            client.registry.close()
+        print(f"Indexed {added} entities in {time.perf_counter() - t0:.1f}s")
+    if args.query:
+        print(json.dumps(store.link(args.query), indent=2, ensure_ascii=False))
+    if not args.rebuild and not args.query:
+        print(json.dumps(store.stats(), indent=2))
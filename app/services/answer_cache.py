@@ -0,0 +1,206 @@
+"""
+FinAgent — Semantic Answer Cache
+Answers of completed investigations, looked up by question similarity so a
+rephrased repeat ("siapa direktur PT Nebula?" / "direksi PT Nebula siapa
+saja") skips the LangGraph pipeline — planning, write_query, run_query
+and answer_user — entirely.
+
+  match = same investigation depth
+        ∧ cosine(local embedding of the content words, KYC synonyms
+          folded) ≥ ANSWER_CACHE_THRESHOLD
+        ∧ same entity tokens (capitalised / numeric words) — a near-identical
+          question about a *different* company never matches
+
+Every entry is tagged with the graph version it was answered at; once
+ingestion or the merge job changes the graph, the whole cache is dropped.
+Writers outside this process (the merge CLI, the vector-store rebuild,
+another worker) are not seen, so entries also expire after
+ANSWER_CACHE_TTL_S as a safety net.
+The paywall is never bypassed: callers only consult the cache for requests
+the gatekeeper would let through.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.query_cache import graph_version
+from app.services.embeddings import FILLER_WORDS, QUESTION_WORDS, get_embedder
+
+logger = get_logger(__name__)
+
+# KYC synonyms folded together before embedding, so the vector reflects
+# what is asked, not how
+_SYNONYMS = {
+    "direksi": "direktur", "direkturnya": "direktur", "dirut": "direktur",
+    "director": "direktur", "directors": "direktur",
+    "komisarisnya": "komisaris", "commissioner": "komisaris", "commissioners": "komisaris",
+    "pemiliknya": "pemilik", "owner": "pemilik", "owners": "pemilik", "owns": "pemilik",
+    "alamat": "lokasi", "alamatnya": "lokasi", "domisili": "lokasi", "address": "lokasi",
+    "location": "lokasi", "company": "perusahaan", "companies": "perusahaan",
+}
+
+
+def canonical_question(question: str) -> str:
+    """Lower-cased content words with synonyms folded — the text that is embedded."""
+    words = [w.lower() for w in re.findall(r"\w+", question)]
+    return " ".join(_SYNONYMS.get(w, w) for w in words if w not in FILLER_WORDS)
+
+
+def entity_tokens(question: str) -> frozenset:
+    """
+    Words that name something: capitalised (after the first word) or
+    containing a digit. Lower-cased for comparison.
+    """
+    words = re.findall(r"\w+", question)
+    out = set()
+    for i, w in enumerate(words):
+        if w.lower() in QUESTION_WORDS:
+            continue
+        if any(ch.isdigit() for ch in w) or (i > 0 and w[0].isupper()) or (w.isupper() and len(w) > 1):
+            out.add(w.lower())
+    return frozenset(out)
+
+
+@dataclass
+class CachedAnswer:
+    question:   str
+    depth:      str
+    answer:     str
+    cypher:     str
+    context:    str
+    entities:   frozenset
+    version:    int
+    created_at: float = field(default_factory=time.time)
+    last_used:  float = field(default_factory=time.time)
+    hits:       int   = 0
+
+
+class AnswerCache:
+    def __init__(self, threshold: float, max_entries: int, ttl_s: float = 0):
+        self.threshold   = threshold
+        self.max_entries = max_entries
+        self.ttl_s       = ttl_s
+        self._entries:   list[CachedAnswer] = []
+        self._vectors:   Optional[np.ndarray] = None    # rows aligned with _entries
+        self._version    = graph_version()
+        self._lock       = threading.Lock()
+        self.hits        = 0
+        self.misses      = 0
+        self.invalidations = 0
+        self.expired     = 0
+
+    def _check_version(self) -> None:
+        """Drop everything once the graph has changed (caller holds the lock)."""
+        current = graph_version()
+        if current != self._version:
+            if self._entries:
+                self.invalidations += 1
+                logger.info(f"Answer cache invalidated ({len(self._entries)} entries) — graph changed")
+            self._entries, self._vectors, self._version = [], None, current
+
+    def _expire(self) -> None:
+        """Drop entries older than ttl_s (caller holds the lock)."""
+        if not self.ttl_s or not self._entries:
+            return
+        cutoff = time.time() - self.ttl_s
+        keep   = [i for i, e in enumerate(self._entries) if e.created_at >= cutoff]
+        if len(keep) == len(self._entries):
+            return
+        self.expired += len(self._entries) - len(keep)
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else None
+
+    def lookup(self, question: str, depth: str) -> Optional[tuple[CachedAnswer, float]]:
+        """Best cached answer for the question, with its similarity, or None."""
+        vector   = get_embedder().embed(canonical_question(question))
+        entities = entity_tokens(question)
+        with self._lock:
+            self._check_version()
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            sims = self._vectors @ vector
+            for idx in np.argsort(-sims):
+                sim = float(sims[idx])
+                if sim < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if entry.depth == depth and entry.entities == entities:
+                    entry.hits     += 1
+                    entry.last_used = time.time()
+                    self.hits      += 1
+                    return entry, sim
+            self.misses += 1
+            return None
+
+    def store(self, question: str, depth: str, result: dict, version: int) -> None:
+        """
+        Cache a finished pipeline result. `version` is the graph version read
+        before the pipeline ran; a result that raced a graph write is skipped.
+        """
+        answer = result.get("answer")
+        if not answer:
+            return
+        vector = get_embedder().embed(canonical_question(question))
+        entry  = CachedAnswer(
+            question = question,
+            depth    = depth,
+            answer   = answer,
+            cypher   = result.get("cypher_query") or "",
+            context  = result.get("graph_context") or "",
+            entities = entity_tokens(question),
+            version  = version,
+        )
+        with self._lock:
+            self._check_version()
+            self._expire()
+            if version != self._version:
+                return
+            self._entries.append(entry)
+            row = vector[None, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            if len(self._entries) > self.max_entries:
+                keep = np.argsort([-e.last_used for e in self._entries])[: self.max_entries]
+                keep.sort()
+                self._entries = [self._entries[i] for i in keep]
+                self._vectors = self._vectors[keep]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":       len(self._entries),
+                "threshold":     self.threshold,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "hit_rate":      round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "expired":       self.expired,
+                "ttl_s":         self.ttl_s,
+                "embedder":      get_embedder().name,
+            }
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Process-wide cache, or None when disabled."""
+    global _cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                settings.ANSWER_CACHE_THRESHOLD, settings.ANSWER_CACHE_MAX_ENTRIES, settings.ANSWER_CACHE_TTL_S,
+            )
+        return _cache
@@ -0,0 +1,358 @@
+"""
+FinAgent — Document Chunker
+Token-aware, boundary-respecting chunking for LLM extraction:
+  1. TokenCounter         — real token counts for the configured model
+                            (tiktoken; ~4 chars/token when it is unavailable)
+  2. chunk_token_budget() — chunk size derived from the model's context window
+  3. iter_chunks()        — packs whole paragraphs into chunks lazily, page by
+                            page; a page / paragraph / sentence is only cut when
+                            it alone exceeds the budget. Overlap is whole
+                            trailing sentences of the previous chunk.
+  4. OverlapFilter        — drops entities and relations a chunk only re-read
+                            in its overlap and the previous chunk already produced
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.entity_resolution import normalize_name
+
+logger = get_logger(__name__)
+
+# ── Optional tokenizer (graceful degradation) ────────────────────────────────
+try:
+    import tiktoken as _tiktoken
+    _HAS_TIKTOKEN = True
+except ImportError:
+    _HAS_TIKTOKEN = False
+    logger.warning("tiktoken not installed — chunk sizes use a chars/token estimate")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 1. TOKEN COUNTING
+# ══════════════════════════════════════════════════════════════════════════════
+
+_CHARS_PER_TOKEN  = 4               # estimate when no tokenizer is available
+_FALLBACK_ENCODING = "o200k_base"   # non-OpenAI models (Groq llama): close enough
+
+
+class TokenCounter:
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._enc       = None
+        if _HAS_TIKTOKEN:
+            try:
+                try:
+                    self._enc = _tiktoken.encoding_for_model(model_name)
+                except KeyError:
+                    self._enc = _tiktoken.get_encoding(_FALLBACK_ENCODING)
+            except Exception as exc:
+                # encodings are downloaded on first use — offline hosts end up here
+                logger.warning(f"Tokenizer for {model_name} unavailable ({exc}) — estimating tokens")
+
+    @property
+    def exact(self) -> bool:
+        return self._enc is not None
+
+    def count(self, text: str) -> int:
+        if self._enc is not None:
+            return len(self._enc.encode(text, disallowed_special=()))
+        return -(-len(text) // _CHARS_PER_TOKEN)
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Cut text into consecutive pieces of at most max_tokens (last resort)."""
+        if self._enc is not None:
+            tokens = self._enc.encode(text, disallowed_special=())
+            return [
+                self._enc.decode(tokens[i:i + max_tokens])
+                for i in range(0, len(tokens), max_tokens)
+            ]
+        step = max_tokens * _CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model_name: str) -> TokenCounter:
+    return TokenCounter(model_name)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 2. CHUNK BUDGET
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Context window per model family (prefix match, longest wins)
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o":        128_000,
+    "gpt-4.1":     1_047_576,
+    "gpt-4-turbo":   128_000,
+    "gpt-4":           8_192,
+    "gpt-3.5-turbo":  16_385,
+    "llama-3.3-70b": 131_072,
+    "llama-3.1":     131_072,
+}
+_DEFAULT_CONTEXT_TOKENS = 8_192
+_MIN_CHUNK_TOKENS       = 512
+
+
+def context_window(model_name: str) -> int:
+    matches = [k for k in MODEL_CONTEXT_TOKENS if model_name.startswith(k)]
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)] if matches else _DEFAULT_CONTEXT_TOKENS
+
+
+def chunk_token_budget(model_name: str, prompt_tokens: int = 0) -> int:
+    """
+    Tokens of document text per chunk: CHUNK_MAX_TOKENS, capped by what is
+    left of the model's context window after the system prompt and the
+    reserve kept for the structured output.
+    """
+    room = context_window(model_name) - prompt_tokens - settings.CHUNK_OUTPUT_RESERVE_TOKENS
+    return max(_MIN_CHUNK_TOKENS, min(settings.CHUNK_MAX_TOKENS, room))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 3. CHUNKING
+# ══════════════════════════════════════════════════════════════════════════════
+
+_PARAGRAPH_END = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_END  = re.compile(r"(?<=[.!?])\s+")
+
+# Plain text arrives in arbitrary blocks: a paragraph still open after this
+# many chars is packed anyway, so memory stays bounded
+_MAX_PENDING_CHARS = 1024 * 1024
+
+
+@dataclass
+class Chunk:
+    number:         int     # 1-based, document order
+    start:          int     # char offset of text[0] in the document
+    text:           str
+    tokens:         int
+    overlap_chars:  int     # leading chars repeated from the previous chunk
+    overlap_tokens: int
+    first_page:     int     # PDF page (or text block) numbers, 1-based
+    last_page:      int
+
+    @property
+    def body(self) -> str:
+        """The text this chunk is the first to see."""
+        return self.text[self.overlap_chars:]
+
+
+@dataclass
+class _Unit:
+    start:  int
+    text:   str
+    tokens: int
+    page:   int
+
+
+def _split_keep(text: str, pattern: re.Pattern) -> List[str]:
+    """Split after each delimiter match; the pieces concatenate back to text."""
+    pieces, pos = [], 0
+    for m in pattern.finditer(text):
+        if m.end() > pos:
+            pieces.append(text[pos:m.end()])
+            pos = m.end()
+    if pos < len(text):
+        pieces.append(text[pos:])
+    return pieces
+
+
+class _Splitter:
+    def __init__(self, counter: TokenCounter, max_tokens: int):
+        self.counter    = counter
+        self.max_tokens = max_tokens
+
+    def sentences(self, unit: _Unit) -> List[_Unit]:
+        out, start = [], unit.start
+        for sent in _split_keep(unit.text, _SENTENCE_END):
+            out.append(_Unit(start, sent, self.counter.count(sent), unit.page))
+            start += len(sent)
+        return out
+
+    def units(self, text: str, start: int, page: int) -> Iterator[_Unit]:
+        """Paragraphs of text; sentences / token slices only when one is too big."""
+        for para in _split_keep(text, _PARAGRAPH_END):
+            unit = _Unit(start, para, self.counter.count(para), page)
+            start += len(para)
+            if unit.tokens <= self.max_tokens:
+                yield unit
+                continue
+            for sent in self.sentences(unit):
+                if sent.tokens <= self.max_tokens:
+                    yield sent
+                    continue
+                pos = sent.start
+                for piece in self.counter.split(sent.text, self.max_tokens):
+                    yield _Unit(pos, piece, self.counter.count(piece), page)
+                    pos += len(piece)
+
+
+def _iter_units(
+    splitter: _Splitter,
+    pages: Iterable[str],
+    separator: str,
+    page_boundaries: bool,
+) -> Iterator[_Unit]:
+    """
+    Units in document order. With page_boundaries every page ends a unit
+    (PDF pages); otherwise pages are arbitrary blocks and a paragraph left
+    open at the end of one is completed by the next.
+    """
+    pending, pending_start, pending_page = "", 0, 1
+    offset = 0
+    for page_no, page in enumerate(pages, 1):
+        if page_no > 1:
+            page = separator + page
+        if page_boundaries:
+            yield from splitter.units(page, offset, page_no)
+            offset += len(page)
+            continue
+
+        if not pending:
+            pending_start, pending_page = offset, page_no
+        pending += page
+        offset  += len(page)
+        paragraphs = _split_keep(pending, _PARAGRAPH_END)
+        if len(paragraphs) > 1:
+            complete = "".join(paragraphs[:-1])
+            yield from splitter.units(complete, pending_start, pending_page)
+            pending        = paragraphs[-1]
+            pending_start += len(complete)
+            pending_page   = page_no
+        if len(pending) > _MAX_PENDING_CHARS:
+            yield from splitter.units(pending, pending_start, pending_page)
+            pending = ""
+
+    if pending:
+        yield from splitter.units(pending, pending_start, pending_page)
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    counter: TokenCounter,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    separator: str = "\n",
+    page_boundaries: bool = True,
+) -> Iterator[Chunk]:
+    """
+    Yield Chunks of at most ~max_tokens over the concatenated pages without
+    materialising the whole document. Units (paragraphs, or sentences of an
+    oversized paragraph) are packed greedily; when the next one does not
+    fit, the chunk is closed and the next starts with up to overlap_tokens
+    of whole trailing sentences. Whitespace-only chunks are skipped.
+    """
+    splitter = _Splitter(counter, max_tokens)
+    current:  List[_Unit] = []
+    used      = 0
+    n_overlap = 0          # leading units of `current` carried over as overlap
+    chunk_no  = 0
+
+    def _close() -> Optional[Chunk]:
+        fresh = current[n_overlap:]
+        if not any(u.text.strip() for u in fresh):
+            return None
+        overlap = current[:n_overlap]
+        return Chunk(
+            number         = chunk_no + 1,
+            start          = current[0].start,
+            text           = "".join(u.text for u in current),
+            tokens         = used,
+            overlap_chars  = sum(len(u.text) for u in overlap),
+            overlap_tokens = sum(u.tokens for u in overlap),
+            first_page     = current[0].page,
+            last_page      = current[-1].page,
+        )
+
+    def _tail(units: List[_Unit]) -> List[_Unit]:
+        """Trailing whole sentences of units, up to overlap_tokens."""
+        tail, budget = [], overlap_tokens
+        for unit in reversed(units):
+            if unit.tokens <= budget:
+                tail.append(unit)
+                budget -= unit.tokens
+                continue
+            for sent in reversed(splitter.sentences(unit)):
+                if sent.tokens > budget:
+                    break
+                tail.append(sent)
+                budget -= sent.tokens
+            break
+        return tail[::-1]
+
+    for unit in _iter_units(splitter, pages, separator, page_boundaries):
+        if current and used + unit.tokens > max_tokens and len(current) > n_overlap:
+            chunk = _close()
+            if chunk is not None:
+                chunk_no += 1
+                yield chunk
+            current   = _tail(current[n_overlap:]) if overlap_tokens > 0 else []
+            n_overlap = len(current)
+            used      = sum(u.tokens for u in current)
+        # Overlap gives way when it would push the next unit over the budget
+        while n_overlap and used + unit.tokens > max_tokens:
+            used      -= current.pop(0).tokens
+            n_overlap -= 1
+        current.append(unit)
+        used += unit.tokens
+
+    if current:
+        chunk = _close()
+        if chunk is not None:
+            yield chunk
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 4. OVERLAP ENTITY TRACKING
+# ══════════════════════════════════════════════════════════════════════════════
+
+class OverlapFilter:
+    """
+    Applied to chunk results in document order. An entity (or relation) the
+    previous chunk already produced is dropped from the next chunk's result
+    when it is mentioned there only inside the overlap region — it is the
+    same text read twice, not a new mention.
+    """
+
+    def __init__(self):
+        self._prev_nodes: set[str]   = set()
+        self._prev_rels:  set[tuple] = set()
+        self.dropped_nodes = 0
+        self.dropped_rels  = 0
+
+    def apply(self, chunk: Chunk, nodes: list, relationships: list) -> tuple[list, list]:
+        overlap = chunk.text[:chunk.overlap_chars].lower()
+        body    = chunk.body.lower()
+
+        def _overlap_only(name: str) -> bool:
+            name = name.lower()
+            return bool(overlap) and name in overlap and name not in body
+
+        kept_nodes = [
+            n for n in nodes
+            if not (normalize_name(n.name) in self._prev_nodes and _overlap_only(n.name))
+        ]
+        kept_rels = [
+            r for r in relationships
+            if not (self._rel_key(r) in self._prev_rels
+                    and (_overlap_only(r.source) or _overlap_only(r.target)))
+        ]
+        self.dropped_nodes += len(nodes) - len(kept_nodes)
+        self.dropped_rels  += len(relationships) - len(kept_rels)
+
+        self._prev_nodes = {normalize_name(n.name) for n in nodes}
+        self._prev_rels  = {self._rel_key(r) for r in relationships}
+        return kept_nodes, kept_rels
+
+    def skip(self) -> None:
+        """The previous chunk produced nothing (failed) — nothing to compare against."""
+        self._prev_nodes, self._prev_rels = set(), set()
+
+    @staticmethod
+    def _rel_key(rel) -> tuple:
+        return normalize_name(rel.source), normalize_name(rel.target), rel.type
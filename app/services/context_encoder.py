@@ -0,0 +1,244 @@
+"""
+FinAgent — Graph Context Encoder
+Turns Neo4j result rows into the compact text the answer LLM reads, in
+place of str(rows) — which repeats every key on every row and the same
+entity name + context on every OPTIONAL MATCH fan-out row.
+
+  ## Entities
+  E1 PT Nebula [Company] — Perusahaan cangkang di Jakarta…
+  E2 Budi Santoso [Person] — Direktur utama
+  ## Rows (12, 61 less relevant rows left out)
+  entity | rel | rel_details | connected
+  E1 | DIRECTOR_OF | sejak 2019 | E2
+
+  1. symbol table   — an entity column plus its context / label columns
+                      (entity+context+node_label, connected+connected_context,
+                      owner+owner_context+owner_type, node maps…) becomes one
+                      `E<n>` line, referenced from the rows; a type / label
+                      column is folded in only when it holds node labels
+                      (type(r) AS type stays a row column)
+  2. tabular rows   — header once, then `|`-separated values; rows that are
+                      identical once entities are symbols appear once
+  3. null columns   — columns empty in every kept row are dropped
+  4. token budget   — rows are ranked by word overlap with the question and
+                      kept, best first, until GRAPH_CONTEXT_MAX_TOKENS; kept
+                      rows are printed in their original (query) order
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.db.schema import ENTITY_LABELS
+from app.services.chunker import TokenCounter
+from app.services.embeddings import FILLER_WORDS
+
+# Columns that describe the entity named in another column
+_ATTR_SUFFIXES = ("_context", "_type", "_label", "_detail")
+# Bare describing columns and the entity columns they belong to, by preference
+_BARE_ATTRS   = ("context", "node_label", "type", "label")
+_BARE_ENTITY  = ("entity", "name", "company", "person", "node")
+
+_MAX_VALUE_CHARS = 300      # one cell / one entity description
+
+
+@dataclass
+class EncodedContext:
+    text:       str
+    rows_in:    int
+    rows_kept:  int
+    entities:   int
+    tokens:     int
+
+
+def _flatten(value) -> str:
+    """One cell as a single line of text; '' for null / empty."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        items = [_flatten(v) for v in value]
+        items = [v for v in items if v]
+        return "[" + "; ".join(items) + "]" if items else ""
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {_flatten(v)}" for k, v in value.items() if _flatten(v))
+    text = re.sub(r"\s+", " ", str(value)).replace("|", "/").strip()
+    return text if len(text) <= _MAX_VALUE_CHARS else text[: _MAX_VALUE_CHARS - 1] + "…"
+
+
+def _is_label_column(col: str) -> bool:
+    return col.endswith(("_type", "_label")) or col in ("node_label", "type", "label")
+
+
+def _foldable(col: str, rows: list) -> bool:
+    """
+    A describing column may join its entity's symbol. A type / label column
+    only when every value is a node label (labels(n) lists included) —
+    type(r) AS type is a fact of the row, not of the entity.
+    """
+    if not _is_label_column(col) or col == "node_label":
+        return True
+    for row in rows:
+        value  = row.get(col)
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if any(v is not None and v not in ENTITY_LABELS for v in values):
+            return False
+    return True
+
+
+def _entity_columns(columns: list, rows: list) -> dict:
+    """{entity column: [describing columns]} from the column names and label values."""
+    groups: dict = {}
+    for col in columns:
+        if not _foldable(col, rows):
+            continue
+        for suffix in _ATTR_SUFFIXES:
+            base = col[: -len(suffix)]
+            if col.endswith(suffix) and base in columns:
+                groups.setdefault(base, []).append(col)
+    bare = [
+        c for c in _BARE_ATTRS
+        if c in columns and not any(c in a for a in groups.values()) and _foldable(c, rows)
+    ]
+    if bare:
+        owner = next((c for c in _BARE_ENTITY if c in columns), None)
+        if owner:
+            groups.setdefault(owner, []).extend(bare)
+    return groups
+
+
+class _SymbolTable:
+    """
+    Entities by name. A row's new entities are staged and committed only if
+    the row is kept; a later row may fill in a missing label / description.
+    """
+
+    def __init__(self):
+        self._entries: dict = {}        # name → [symbol, label, description]
+
+    def ref(self, name: str, label: str, description: str, staged: dict) -> str:
+        """The entity's symbol, followed by any label / description it already has a different one of."""
+        entry = self._entries.get(name) or staged.get(name)
+        if entry is None:
+            entry = staged[name] = [f"E{len(self._entries) + len(staged) + 1}", "", ""]
+        ref = entry[0]
+        if label and entry[1] and label != entry[1]:
+            ref += f" [{label}]"
+        if description and entry[2] and description != entry[2]:
+            ref += f" — {description}"
+        entry[1] = entry[1] or label
+        entry[2] = entry[2] or description
+        return ref
+
+    def commit(self, staged: dict) -> None:
+        self._entries.update(staged)
+
+    @staticmethod
+    def line(name: str, entry: list) -> str:
+        sym, label, description = entry
+        return f"{sym} {name}" + (f" [{label}]" if label else "") + (f" — {description}" if description else "")
+
+    @property
+    def lines(self) -> list[str]:
+        return [self.line(name, entry) for name, entry in self._entries.items()]
+
+
+def _describe(row: dict, attrs: list) -> tuple[str, str]:
+    """(label, description) of an entity from its describing columns."""
+    label, parts = "", []
+    for col in attrs:
+        text = _flatten(row.get(col))
+        if not text:
+            continue
+        if _is_label_column(col):
+            label = label or text
+        else:
+            parts.append(text)
+    return label, " / ".join(parts)
+
+
+def _encode_row(row: dict, columns: list, groups: dict, table: _SymbolTable) -> tuple[dict, dict]:
+    """Row cells with entities replaced by symbols, plus the entities it would add."""
+    attr_cols = {c for attrs in groups.values() for c in attrs}
+    cells, staged = {}, {}
+    for col in columns:
+        if col in attr_cols:
+            continue
+        value = row.get(col)
+        if isinstance(value, dict) and value.get("name"):
+            # a whole node returned (RETURN n) — its properties describe it
+            others = {k: v for k, v in value.items() if k not in ("name", "id", "embedding")}
+            cells[col] = table.ref(_flatten(value["name"]), "", _flatten(others), staged)
+        elif col in groups and _flatten(value):
+            label, description = _describe(row, groups[col])
+            cells[col] = table.ref(_flatten(value), label, description, staged)
+        else:
+            cells[col] = _flatten(value)
+    return cells, staged
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def _relevance(row: dict, terms: set) -> int:
+    """Question words found anywhere in the row."""
+    if not terms:
+        return 0
+    return len(terms & _words(" ".join(_flatten(v) for v in row.values())))
+
+
+def encode_context(
+    rows: list,
+    question: str,
+    counter: TokenCounter,
+    max_tokens: Optional[int] = None,
+) -> EncodedContext:
+    """Compact, budgeted text for the answer prompt."""
+    max_tokens = settings.GRAPH_CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    if not rows:
+        return EncodedContext("[]", 0, 0, 0, 1)
+
+    columns: list = []
+    for row in rows:
+        for col in row:
+            if col not in columns:
+                columns.append(col)
+    groups = _entity_columns(columns, rows)
+
+    # Most relevant rows first; stable, so ties keep query order
+    terms = {w for w in _words(question) if len(w) > 2 and w not in FILLER_WORDS}
+    order = sorted(range(len(rows)), key=lambda i: -_relevance(rows[i], terms))
+
+    table = _SymbolTable()
+    kept: dict = {}                 # original index → encoded cells
+    seen: set  = set()
+    over_budget = 0
+    used = counter.count(" | ".join(columns)) + 16      # section headers + column header
+    for idx in order:
+        cells, staged = _encode_row(rows[idx], columns, groups, table)
+        key = tuple(cells.values())
+        if key in seen:             # identical once entities are symbols (differing attributes stay in the cells)
+            continue
+        cost = 1 + counter.count(" | ".join(cells.values())) + sum(counter.count(table.line(n, e)) for n, e in staged.items())
+        if kept and used + cost > max_tokens:
+            over_budget += 1
+            continue
+        table.commit(staged)
+        kept[idx] = cells
+        seen.add(key)
+        used += cost
+
+    shown = [c for c in columns if any(cells.get(c) for cells in kept.values())]
+    out = []
+    entity_lines = table.lines
+    if entity_lines:
+        out.append("## Entities")
+        out.extend(entity_lines)
+    scope = f"{len(kept)}, {over_budget} less relevant rows left out" if over_budget else str(len(kept))
+    out.append(f"## Rows ({scope})")
+    out.append(" | ".join(shown))
+    for idx in sorted(kept):
+        out.append(" | ".join(kept[idx].get(c, "") for c in shown))
+    text = "\n".join(out)
+    return EncodedContext(text, len(rows), len(kept), len(entity_lines), counter.count(text))
@@ -0,0 +1,233 @@
+"""
+FinAgent — Cypher Cost Guard
+Pre-flight check of LLM-generated Cypher before it reaches AuraDB. Router
+templates are vetted and skip it.
+
+  1. rewrite  — unbounded / over-long variable-length patterns are capped at
+                CYPHER_GUARD_MAX_HOPS ([*] → [*1..4], [*2..] → [*2..4]); a
+                final RETURN without LIMIT (or with a larger one) gets
+                LIMIT CYPHER_GUARD_ROW_LIMIT
+  2. EXPLAIN  — the (rewritten) query is planned, never run
+  3. reject   — writes, invalid Cypher, cartesian products estimated above
+                CYPHER_GUARD_MAX_CARTESIAN_ROWS, any operator estimated above
+                CYPHER_GUARD_MAX_ESTIMATED_ROWS, or an expansion that is still
+                unbounded → run_query takes the fallback path instead
+
+Verdicts are cached per query shape (normalised text, string literals
+blanked) and graph version, so a repeated question costs no EXPLAIN.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from neo4j.exceptions import ClientError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.query_cache import graph_version, normalize_cypher
+
+logger = get_logger(__name__)
+
+# EXPLAIN summary query types that change the graph (r = read only)
+_WRITE_QUERY_TYPES = ("w", "rw", "s")
+
+_STRING_LITERAL = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\"""")
+# -[r:TYPE*lo..hi]-  (only inside relationship patterns, not arithmetic)
+_VAR_LENGTH = re.compile(
+    r"(-\s*\[[^\[\]]*?)\*\s*(\d*)\s*(\.\.)?\s*(\d*)(\s*(?:\{[^{}]*\})?\s*\]\s*-)"
+)
+# Var-length expansion without an upper bound, as printed in plan Details
+_UNBOUNDED_DETAIL = re.compile(r"\*(?:\d*\.\.)?\]")
+_FINAL_LIMIT      = re.compile(r"\bLIMIT\s+(\d+|\$\w+)\s*$", re.IGNORECASE)
+_RETURN           = re.compile(r"\bRETURN\b", re.IGNORECASE)
+_CLAUSE_AFTER     = re.compile(r"\b(?:MATCH|WITH|UNWIND|CALL)\b|}", re.IGNORECASE)
+_UNION            = re.compile(r"\bUNION\b", re.IGNORECASE)
+
+ACTIONS = ("ok", "rewrite", "reject", "unchecked")
+
+
+@dataclass
+class GuardVerdict:
+    action:         str                     # one of ACTIONS
+    reasons:        list = field(default_factory=list)
+    estimated_rows: int  = 0                # largest operator estimate in the plan
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def query_shape(query: str) -> str:
+    """Normalised Cypher with string literals blanked — the verdict cache key."""
+    return _STRING_LITERAL.sub("''", normalize_cypher(query))
+
+
+# ── Rewrites ─────────────────────────────────────────────────────────────────
+
+def cap_var_length(query: str, max_hops: int) -> tuple[str, bool]:
+    """Give every variable-length pattern an upper bound ≤ max_hops."""
+    changed = False
+
+    def _cap(m: "re.Match") -> str:
+        nonlocal changed
+        head, lo, dots, hi, tail = m.groups()
+        if not dots and lo:                                 # *3 — exact length
+            return m.group(0)
+        low = int(lo) if lo else 1
+        if low > max_hops or (hi and int(hi) <= max_hops):
+            return m.group(0)
+        changed = True
+        return f"{head}*{low}..{max_hops}{tail}"
+
+    return _VAR_LENGTH.sub(_cap, query), changed
+
+
+def cap_limit(query: str, row_limit: int) -> tuple[str, bool]:
+    """Add / lower the LIMIT of a final RETURN; UNION and subquery tails are left alone."""
+    flat = normalize_cypher(query)
+    m = _FINAL_LIMIT.search(flat)
+    if m:
+        if m.group(1).isdigit() and int(m.group(1)) > row_limit:
+            return flat[: m.start(1)] + str(row_limit), True
+        return query, False
+    returns = list(_RETURN.finditer(flat))
+    if not returns or _UNION.search(flat) or _CLAUSE_AFTER.search(flat, returns[-1].end()):
+        return query, False
+    return f"{flat} LIMIT {row_limit}", True
+
+
+# ── Plan inspection ──────────────────────────────────────────────────────────
+
+def _operators(plan: Optional[dict]):
+    """Every operator of an EXPLAIN plan (Bolt metadata dict), depth first."""
+    stack = [plan] if plan else []
+    while stack:
+        op = stack.pop()
+        yield op.get("operatorType", ""), op.get("args") or {}
+        stack.extend(op.get("children") or [])
+
+
+def judge(plan: Optional[dict], query_type: Optional[str]) -> GuardVerdict:
+    reasons, worst = [], 0
+    if query_type in _WRITE_QUERY_TYPES:
+        reasons.append(f"writes to the graph (query type {query_type})")
+    for op_type, args in _operators(plan):
+        estimated = int(float(args.get("EstimatedRows") or 0))
+        worst     = max(worst, estimated)
+        if op_type.startswith("CartesianProduct") and estimated > settings.CYPHER_GUARD_MAX_CARTESIAN_ROWS:
+            reasons.append(f"cartesian product (~{estimated:,} rows)")
+        if op_type.startswith("VarLengthExpand") and _UNBOUNDED_DETAIL.search(str(args.get("Details", ""))):
+            reasons.append("unbounded variable-length expansion")
+    if worst > settings.CYPHER_GUARD_MAX_ESTIMATED_ROWS:
+        reasons.append(f"~{worst:,} estimated rows (max {settings.CYPHER_GUARD_MAX_ESTIMATED_ROWS:,})")
+    return GuardVerdict("reject" if reasons else "ok", reasons, worst)
+
+
+# ── Guard ────────────────────────────────────────────────────────────────────
+
+class CypherGuard:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._verdicts: "OrderedDict[str, tuple]" = OrderedDict()   # shape → (version, verdict)
+        self._lock = threading.Lock()
+        self.counts = {a: 0 for a in ACTIONS}
+        self.cache_hits = 0
+
+    def rewrite(self, query: str) -> tuple[str, list]:
+        """The query with hop bounds and LIMIT applied, plus what was changed."""
+        notes = []
+        query, capped = cap_var_length(query, settings.CYPHER_GUARD_MAX_HOPS)
+        if capped:
+            notes.append(f"variable-length paths capped at {settings.CYPHER_GUARD_MAX_HOPS} hops")
+        query, limited = cap_limit(query, settings.CYPHER_GUARD_ROW_LIMIT)
+        if limited:
+            notes.append(f"LIMIT {settings.CYPHER_GUARD_ROW_LIMIT}")
+        return query, notes
+
+    def _cached(self, shape: str) -> Optional[GuardVerdict]:
+        with self._lock:
+            entry = self._verdicts.get(shape)
+            if entry is None or entry[0] != graph_version():
+                return None
+            self._verdicts.move_to_end(shape)
+            self.cache_hits += 1
+            return entry[1]
+
+    def _finish(self, shape: str, version: int, verdict: GuardVerdict, query: str) -> tuple[str, GuardVerdict]:
+        with self._lock:
+            self.counts[verdict.action] += 1
+            if verdict.action != "unchecked":
+                self._verdicts[shape] = (version, verdict)
+                self._verdicts.move_to_end(shape)
+                while len(self._verdicts) > self.max_entries:
+                    self._verdicts.popitem(last=False)
+        icon = {"ok": "🛡️", "rewrite": "✂️", "reject": "⛔", "unchecked": "⚠️"}[verdict.action]
+        logger.info(f"{icon} Cypher guard: {verdict.action} {'; '.join(verdict.reasons)}".rstrip())
+        return query, verdict
+
+    def _verdict(self, notes: list, explained: Optional[tuple], error: Optional[Exception]) -> GuardVerdict:
+        if error is not None:
+            if isinstance(error, ClientError) and (error.code or "").startswith("Neo.ClientError.Statement"):
+                return GuardVerdict("reject", [f"invalid Cypher: {getattr(error, 'message', None) or error}"])
+            return GuardVerdict("unchecked", [f"EXPLAIN failed: {error}"])
+        verdict = judge(*explained)
+        if verdict.action == "ok" and notes:
+            verdict.action, verdict.reasons = "rewrite", notes
+        return verdict
+
+    def check(
+        self, query: str, params: Optional[dict], explain: Callable[[str, Optional[dict]], tuple],
+    ) -> tuple[str, GuardVerdict]:
+        """(query to run, verdict); explain(query, params) → (plan, query_type)."""
+        shape, version = query_shape(query), graph_version()
+        rewritten, notes = self.rewrite(query)
+        cached = self._cached(shape)
+        if cached is not None:
+            with self._lock:
+                self.counts[cached.action] += 1
+            return rewritten, cached
+        explained, error = None, None
+        try:
+            explained = explain(rewritten, params)
+        except Exception as exc:
+            error = exc
+        return self._finish(shape, version, self._verdict(notes, explained, error), rewritten)
+
+    async def acheck(
+        self, query: str, params: Optional[dict], aexplain: Callable[[str, Optional[dict]], Awaitable[tuple]],
+    ) -> tuple[str, GuardVerdict]:
+        """check() with an async EXPLAIN."""
+        shape, version = query_shape(query), graph_version()
+        rewritten, notes = self.rewrite(query)
+        cached = self._cached(shape)
+        if cached is not None:
+            with self._lock:
+                self.counts[cached.action] += 1
+            return rewritten, cached
+        explained, error = None, None
+        try:
+            explained = await aexplain(rewritten, params)
+        except Exception as exc:
+            error = exc
+        return self._finish(shape, version, self._verdict(notes, explained, error), rewritten)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"shapes": len(self._verdicts), "cache_hits": self.cache_hits, **self.counts}
+
+
+_guard: Optional[CypherGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_cypher_guard() -> Optional[CypherGuard]:
+    """Process-wide guard, or None when disabled."""
+    global _guard
+    if not settings.CYPHER_GUARD_ENABLED:
+        return None
+    with _guard_lock:
+        if _guard is None:
+            _guard = CypherGuard(settings.CYPHER_GUARD_CACHE_SIZE)
+        return _guard
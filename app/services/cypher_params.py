@@ -0,0 +1,301 @@
+"""
+FinAgent — Cypher Auto-Parameterisation
+Rewrites LLM-generated Cypher so equivalent questions produce the same query
+text. Neo4j caches execution plans by query text, so
+
+  MATCH (c:Company) WHERE toLower(c.name) CONTAINS toLower("nebula") RETURN c.name
+  MATCH (x:Company) WHERE toLower(x.name) CONTAINS toLower('orion')  RETURN x.name
+
+both become one planned shape, run with different parameters:
+
+  MATCH (v0:Company) WHERE toLower(v0.name) CONTAINS toLower($lit0) RETURN v0.name AS `c.name`
+
+  1. literals   — string and number literals become $lit0, $lit1, …; LIMIT /
+                  SKIP counts (the cost guard caps them) and variable-length
+                  bounds (*1..4, which cannot be parameters) stay literal
+  2. whitespace — comments dropped, whitespace collapsed
+  3. variables  — pattern / WITH / UNWIND variables renamed v0, v1, … in order
+                  of appearance; unaliased final RETURN items get `AS <original
+                  text>` so the result columns do not change. Skipped for UNION,
+                  CALL … YIELD (procedure field names), `*` projections and
+                  backtick identifiers
+
+Reuse is tracked per query text (/api/metrics → cypher_params): a text seen
+before has a cached plan on the server, barring eviction.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_TOKEN = re.compile(
+    r"""
+      (?P<str>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<bt>`[^`]*`)
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<param>\$\w+)
+    | (?P<num>\d+\.\d+(?:[eE][-+]?\d+)?|\d+(?:[eE][-+]?\d+)?)
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<space>\s+)
+    | (?P<other>\.\.|.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+_KEYWORDS = {
+    "match", "optional", "where", "return", "with", "unwind", "as", "and", "or",
+    "xor", "not", "in", "is", "null", "true", "false", "distinct", "order", "by",
+    "asc", "desc", "ascending", "descending", "skip", "limit", "call", "yield",
+    "union", "all", "case", "when", "then", "else", "end", "contains", "starts",
+    "ends", "exists", "count", "create", "merge", "set", "delete", "detach",
+    "remove", "foreach", "on", "any", "none", "single",
+}
+# Clauses after which `AS x` introduces a variable later clauses read
+_BINDING_CLAUSES = {"with", "unwind"}
+_CLAUSES = _BINDING_CLAUSES | {"match", "where", "return", "order", "call", "yield", "create", "merge", "set", "delete"}
+# Keywords that end a RETURN's item list
+_RETURN_END = {"order", "skip", "limit", "union"}
+
+
+@dataclass
+class Parameterized:
+    text:    str
+    params:  dict = field(default_factory=dict)
+    lifted:  int  = 0           # literals turned into parameters
+    renamed: int  = 0           # variables renamed
+
+
+class _Tok:
+    __slots__ = ("kind", "text", "out")
+
+    def __init__(self, kind: str, text: str):
+        self.kind, self.text, self.out = kind, text, text
+
+    @property
+    def word(self) -> str:
+        return self.text.lower() if self.kind == "ident" else ""
+
+
+def _tokens(query: str) -> list[_Tok]:
+    """Tokens with comments dropped and every whitespace run as one space."""
+    toks: list[_Tok] = []
+    for m in _TOKEN.finditer(query.strip().rstrip(";")):
+        kind = m.lastgroup
+        if kind in ("comment", "space"):
+            if toks and toks[-1].kind != "space":
+                toks.append(_Tok("space", " "))
+            continue
+        toks.append(_Tok(kind, m.group()))
+    while toks and toks[-1].kind == "space":
+        toks.pop()
+    return toks
+
+
+def _unescape(literal: str) -> str:
+    body = literal[1:-1]
+    return re.sub(
+        r"\\(u[0-9a-fA-F]{4}|.)",
+        lambda m: chr(int(m.group(1)[1:], 16)) if len(m.group(1)) == 5 else _ESCAPES.get(m.group(1), m.group(0)),
+        body,
+    )
+
+
+def _neighbours(sig: list[_Tok], i: int) -> tuple[Optional[_Tok], Optional[_Tok]]:
+    return (sig[i - 1] if i > 0 else None), (sig[i + 1] if i + 1 < len(sig) else None)
+
+
+# ── 1. Literals ──────────────────────────────────────────────────────────────
+
+def _lift_literals(sig: list[_Tok], prefix: str) -> dict:
+    params: dict = {}
+    for i, tok in enumerate(sig):
+        if tok.kind not in ("str", "num"):
+            continue
+        prev, nxt = _neighbours(sig, i)
+        if tok.kind == "num":
+            if (prev and (prev.word in ("limit", "skip") or prev.text in ("*", ".."))) \
+                    or (nxt and nxt.text == ".."):
+                continue
+            value = float(tok.text) if re.search(r"[.eE]", tok.text) else int(tok.text)
+        else:
+            value = _unescape(tok.text)
+        name = f"{prefix}{len(params)}"
+        params[name] = value
+        tok.out = f"${name}"
+    return params
+
+
+# ── 3. Variables ─────────────────────────────────────────────────────────────
+
+def _final_return_items(sig: list[_Tok]) -> list[list[_Tok]]:
+    """Items of the last top-level RETURN, split at top-level commas."""
+    starts = [i for i, t in enumerate(sig) if t.word == "return"]
+    if not starts:
+        return []
+    i = starts[-1] + 1
+    if i < len(sig) and sig[i].word == "distinct":
+        i += 1
+    items, current, depth = [], [], 0
+    for tok in sig[i:]:
+        if depth == 0 and tok.word in _RETURN_END:
+            break
+        if tok.text in "([{":
+            depth += 1
+        elif tok.text in ")]}":
+            depth -= 1
+        if depth == 0 and tok.text == ",":
+            items.append(current)
+            current = []
+            continue
+        current.append(tok)
+    if current:
+        items.append(current)
+    return items
+
+
+def _can_rename(sig: list[_Tok]) -> bool:
+    words = {t.word for t in sig}
+    return not (
+        {"union", "yield", "call"} & words
+        or any(t.kind == "bt" for t in sig)
+        or any(t.kind == "ident" and re.fullmatch(r"v\d+", t.text) for t in sig)
+        or any(t.text == "*" and p and (p.word in ("return", "with", "distinct")) for p, t in zip(sig, sig[1:]))
+    )
+
+
+def _declared(sig: list[_Tok], final_aliases: set) -> list[str]:
+    """Variables bound by patterns, path assignments, WITH / UNWIND aliases."""
+    names, clause = [], ""
+    for i, tok in enumerate(sig):
+        if tok.word in _CLAUSES:
+            clause = tok.word
+        if tok.kind != "ident" or tok.word in _KEYWORDS or id(tok) in final_aliases:
+            continue
+        prev, nxt = _neighbours(sig, i)
+        bound = (
+            (prev and prev.text in ("(", "[") and nxt and nxt.text in (":", ")", "{", "]", "*"))
+            or (prev and prev.word == "as" and clause in _BINDING_CLAUSES)
+            or (prev and (prev.word == "match" or prev.text == ",") and clause == "match" and nxt and nxt.text == "=")
+        )
+        if bound and tok.text not in names:
+            names.append(tok.text)
+    return names
+
+
+def _rename_variables(sig: list[_Tok]) -> int:
+    items = _final_return_items(sig)
+    final_aliases = {
+        id(item[j + 1]) for item in items for j, t in enumerate(item[:-1]) if t.word == "as"
+    }
+    mapping = {name: f"v{n}" for n, name in enumerate(_declared(sig, final_aliases))}
+    if not mapping:
+        return 0
+    for i, tok in enumerate(sig):
+        if tok.kind != "ident" or tok.text not in mapping or id(tok) in final_aliases:
+            continue
+        prev, nxt = _neighbours(sig, i)
+        if prev and prev.text in (".", ":", "$"):
+            continue                                        # property / label / type
+        if nxt and nxt.text == "(":
+            continue                                        # function name
+        if prev and prev.text in ("{", ",") and nxt and nxt.text == ":":
+            continue                                        # map key
+        tok.out = mapping[tok.text]
+    return len(mapping)
+
+
+def _alias_final_items(toks: list[_Tok], sig: list[_Tok]) -> None:
+    """Keep the column names of rewritten, unaliased final RETURN items."""
+    pos = {id(t): k for k, t in enumerate(toks)}
+    for item in _final_return_items(sig):
+        if any(t.word == "as" for t in item) or all(t.out == t.text for t in item):
+            continue
+        column = "".join(t.text for t in toks[pos[id(item[0])]:pos[id(item[-1])] + 1])
+        alias  = column if re.fullmatch(r"[A-Za-z_]\w*", column) else "`" + column.replace("`", "``") + "`"
+        item[-1].out += f" AS {alias}"
+
+
+# ── Entry point ──────────────────────────────────────────────────────────────
+
+def parameterize(query: str, rename: Optional[bool] = None) -> Parameterized:
+    """Query text with literals lifted into parameters and variables canonicalised."""
+    rename = settings.CYPHER_AUTOPARAM_RENAME if rename is None else rename
+    toks = _tokens(query)
+    sig  = [t for t in toks if t.kind != "space"]
+    taken  = {t.text[1:] for t in sig if t.kind == "param"}
+    prefix = "lit" if not any(p.startswith("lit") for p in taken) else "autolit"
+
+    params  = _lift_literals(sig, prefix)
+    renamed = _rename_variables(sig) if rename and _can_rename(sig) else 0
+    if params or renamed:
+        _alias_final_items(toks, sig)
+    text = "".join(t.out for t in toks)
+    return Parameterized(text, params, len(params), renamed)
+
+
+# ── Reuse tracking ───────────────────────────────────────────────────────────
+
+class _ShapeStats:
+    """
+    Query texts seen recently, as a proxy for the server plan cache (keyed by
+    text). The unparameterised text is tracked too, for the before / after.
+    """
+
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: "OrderedDict[str, None]" = OrderedDict()
+        self._raw:    "OrderedDict[str, None]" = OrderedDict()
+        self._lock    = threading.Lock()
+        self._counts  = {"queries": 0, "plan_cache_hits": 0, "raw_hits": 0, "literals_lifted": 0, "renamed": 0}
+
+    def _seen(self, store: OrderedDict, key: str) -> bool:
+        hit = key in store
+        store[key] = None
+        store.move_to_end(key)
+        while len(store) > self.max_shapes:
+            store.popitem(last=False)
+        return hit
+
+    def record(self, raw: str, result: Parameterized) -> bool:
+        """Count one query; True when its parameterised text was seen before."""
+        with self._lock:
+            hit = self._seen(self._shapes, result.text)
+            self._counts["queries"]         += 1
+            self._counts["plan_cache_hits"] += int(hit)
+            self._counts["raw_hits"]        += int(self._seen(self._raw, " ".join(raw.split())))
+            self._counts["literals_lifted"] += result.lifted
+            self._counts["renamed"]         += int(bool(result.renamed))
+            return hit
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._counts["queries"]
+            return {
+                **self._counts,
+                "hit_rate":     round(self._counts["plan_cache_hits"] / n, 3) if n else 0.0,
+                "raw_hit_rate": round(self._counts["raw_hits"] / n, 3) if n else 0.0,
+                "shapes":       len(self._shapes),
+            }
+
+
+_stats: Optional[_ShapeStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_shape_stats() -> Optional[_ShapeStats]:
+    """Process-wide reuse tracker, or None when auto-parameterisation is off."""
+    global _stats
+    if not settings.CYPHER_AUTOPARAM_ENABLED:
+        return None
+    with _stats_lock:
+        if _stats is None:
+            _stats = _ShapeStats(settings.CYPHER_AUTOPARAM_TRACKED_SHAPES)
+        return _stats
@@ -0,0 +1,117 @@
+"""
+FinAgent — Local Text Embeddings
+Question / entity-name vectors computed in-process — no API call, no GPU.
+
+  • default: feature hashing of word unigrams + character trigrams into a
+    fixed-size, L2-normalised vector (numpy). Robust to word order, case,
+    accents, punctuation and small spelling differences.
+  • EMBEDDING_MODEL set and sentence-transformers installed: that model.
+
+Vectors are unit length, so cosine similarity is a dot product.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# ── Optional sentence-transformers (graceful degradation) ────────────────────
+try:
+    from sentence_transformers import SentenceTransformer as _SentenceTransformer
+    _HAS_ST = True
+except ImportError:
+    _HAS_ST = False
+
+HASH_DIM = 1024
+_WORD_WEIGHT    = 2.0   # a whole matching word counts more than one trigram
+_TRIGRAM_WEIGHT = 1.0
+
+# Words that carry no meaning for matching a question against stored text
+QUESTION_WORDS = {
+    "siapa", "apa", "apakah", "bagaimana", "dimana", "mana", "berapa", "kapan",
+    "mengapa", "kenapa", "tolong", "jelaskan", "sebutkan", "tunjukkan", "cari",
+    "who", "what", "which", "where", "when", "why", "how", "is", "are", "does",
+    "do", "list", "show", "find", "tell", "the",
+}
+FILLER_WORDS = QUESTION_WORDS | {
+    "saja", "yang", "dari", "di", "ke", "adalah", "itu", "ini", "dengan", "untuk",
+    "dan", "nya", "of", "for", "at", "in", "a", "an", "please", "me",
+}
+
+
+def _tokens(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"\w+", text)
+
+
+def _bucket(feature: str) -> tuple[int, float]:
+    """Stable hash → (index, ±1 sign); Python's hash() is salted per process."""
+    h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+    return h % HASH_DIM, (1.0 if (h >> 63) & 1 else -1.0)
+
+
+class TextEmbedder:
+    def __init__(self, model_name: str = ""):
+        self.model_name = model_name
+        self._model     = None
+        if model_name:
+            if _HAS_ST:
+                try:
+                    self._model = _SentenceTransformer(model_name)
+                    logger.info(f"✅ Embedding model loaded: {model_name}")
+                except Exception as exc:
+                    logger.warning(f"Embedding model {model_name} unavailable ({exc}) — using hashing embeddings")
+            else:
+                logger.warning("sentence-transformers not installed — using hashing embeddings")
+
+    @property
+    def dim(self) -> int:
+        if self._model is not None:
+            return self._model.get_sentence_embedding_dimension()
+        return HASH_DIM
+
+    @property
+    def name(self) -> str:
+        return self.model_name if self._model is not None else f"hashing-{HASH_DIM}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of unit vectors."""
+        if self._model is not None:
+            return np.asarray(
+                self._model.encode(texts, normalize_embeddings=True), dtype=np.float32
+            )
+        out = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _tokens(text):
+                idx, sign = _bucket("w:" + word)
+                out[row, idx] += sign * _WORD_WEIGHT
+                padded = f" {word} "
+                for i in range(len(padded) - 2):
+                    idx, sign = _bucket("c:" + padded[i:i + 3])
+                    out[row, idx] += sign * _TRIGRAM_WEIGHT
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+_embedder: Optional[TextEmbedder] = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> TextEmbedder:
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = TextEmbedder(settings.EMBEDDING_MODEL)
+        return _embedder
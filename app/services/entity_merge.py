@@ -0,0 +1,373 @@
+"""
+FinAgent — Cross-Document Entity Merge
+Collapses graph nodes of the same label that share `name_normalized`,
+the cross-document counterpart of the in-batch dedup done at ingestion.
+
+  • index-backed  — candidates come from the `updated_at` and
+                    `name_normalized` range indexes (app/db/schema.py),
+                    never from a MATCH (a), (b) cartesian product
+  • incremental   — only names of nodes written since the last successful
+                    run (watermark in ENTITY_MERGE_STATE_PATH) are examined
+  • batched       — names are resolved ENTITY_MERGE_BATCH_SIZE at a time,
+                    each batch in one managed write transaction
+  • lossless      — relationships are re-created on the surviving node with
+                    their original type and properties (one per distinct
+                    property set — the survivor's own are left untouched,
+                    and one between two merged-away nodes joins their
+                    survivors);
+                    properties the survivor lacks are copied over; alias
+                    index entries are re-pointed; merged-away nodes leave
+                    the entity vector store (app/db/vector_store.py)
+
+The oldest node (created_at, then id) of each group survives.
+
+    POST /api/graph/merge   → EntityMergeJob.start()
+    GET  /api/graph/merge   → EntityMergeJob.status()
+    python -m app.services.entity_merge [--full] [--batch-size N]
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.neo4j_client import Neo4jClient
+from app.db.query_cache import bump_graph_version
+from app.db.schema import ALIAS_LABEL, ENTITY_LABELS
+from app.db.vector_store import get_vector_store
+
+logger = get_logger(__name__)
+
+
+class MergeAlreadyRunning(Exception):
+    """Raised by start() while a merge run is in progress."""
+
+
+# ── Watermark ────────────────────────────────────────────────────────────────
+
+def _load_watermark() -> Optional[int]:
+    try:
+        with open(settings.ENTITY_MERGE_STATE_PATH, encoding="utf-8") as f:
+            return json.load(f).get("watermark")
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning(f"Unreadable merge state ({exc}) — running a full merge")
+        return None
+
+
+def _save_watermark(watermark: int) -> None:
+    path = settings.ENTITY_MERGE_STATE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"watermark": watermark, "saved_at": time.time()}, f)
+    os.replace(tmp, path)
+
+
+# ── Transaction work ─────────────────────────────────────────────────────────
+
+def _merge_batch_tx(tx, label: str, norms: list[str]) -> dict:
+    """
+    Resolve one batch of normalised names inside a single write transaction:
+    find the duplicate groups, move relationships and missing properties to
+    the survivor, re-point aliases, delete the duplicates.
+    """
+    groups = [
+        rec["ids"] for rec in tx.run(
+            f"""
+            UNWIND $norms AS norm
+            MATCH (n:{label} {{name_normalized: norm}})
+            WITH norm, n ORDER BY coalesce(n.created_at, 0), n.id
+            WITH norm, collect(n.id) AS ids
+            WHERE size(ids) > 1
+            RETURN ids
+            """,
+            norms=norms,
+        )
+    ]
+    stats = {"groups": len(groups), "nodes_merged": 0, "relationships_moved": 0, "merged_ids": []}
+    if not groups:
+        return stats
+
+    pairs = [
+        {"dup": dup, "canon": ids[0], "group": ids}
+        for ids in groups for dup in ids[1:]
+    ]
+
+    # ── Relationships of the duplicates, grouped by (type, direction) ─────
+    # Types cannot be parameterised without APOC, so one statement per type.
+    # An endpoint that is itself merged in this batch is re-pointed to its
+    # survivor (matched by id — it is deleted below); a relationship whose
+    # two ends share a survivor would become a self-loop and is dropped.
+    # Rows identical in (survivor, endpoint, properties) carry one fact and
+    # are moved once; rows that differ stay separate relationships.
+    canon_of = {p["dup"]: p["canon"] for p in pairs}
+    canon_of.update({ids[0]: ids[0] for ids in groups})
+    rels: dict = defaultdict(dict)
+    for rec in tx.run(
+        f"""
+        UNWIND $pairs AS p
+        MATCH (b:{label} {{id: p.dup}})-[r]-(x)
+        RETURN p.canon AS canon, type(r) AS type, startNode(r) = b AS outgoing,
+               elementId(x) AS other, x.id AS other_id, x:{label} AS same_label,
+               properties(r) AS props
+        """,
+        pairs=pairs,
+    ):
+        canon, other, outgoing = rec["canon"], rec["other"], rec["outgoing"]
+        other_canon = canon_of.get(rec["other_id"]) if rec["same_label"] else None
+        if other_canon == canon:
+            continue
+        if other_canon is not None:
+            # Seen from both merged ends — orient it once, start → end
+            other = other_canon
+            if not outgoing:
+                canon, other, outgoing = other, canon, True
+        key = (canon, other, json.dumps(rec["props"], sort_keys=True, default=str))
+        rels[(rec["type"], outgoing, other_canon is not None)][key] = {
+            "canon": canon, "other": other, "props": rec["props"],
+        }
+
+    # A relationship the survivor already has with the same properties is
+    # reused; any other one is created as its own relationship, so neither
+    # parallel relationships nor the survivor's own properties are folded.
+    for (rtype, outgoing, by_id), by_key in rels.items():
+        arrow = "(a)-[{0}:`{1}`]->(x)" if outgoing else "(x)-[{0}:`{1}`]->(a)"
+        match = f"MATCH (x:{label} {{id: row.other}})" if by_id else "MATCH (x) WHERE elementId(x) = row.other"
+        rtype = rtype.replace("`", "")
+        tx.run(
+            f"""
+            UNWIND $rows AS row
+            MATCH (a:{label} {{id: row.canon}})
+            {match}
+            OPTIONAL MATCH {arrow.format("r", rtype)} WHERE properties(r) = row.props
+            WITH a, x, row, count(r) AS same
+            WHERE same = 0
+            CREATE {arrow.format("nr", rtype)}
+            SET nr = row.props
+            """,
+            rows=list(by_key.values()),
+        )
+        stats["relationships_moved"] += len(by_key)
+
+    # ── Properties the survivor lacks ─────────────────────────────────────
+    updates = []
+    for rec in tx.run(
+        f"""
+        UNWIND $groups AS ids
+        MATCH (a:{label} {{id: head(ids)}})
+        MATCH (b:{label}) WHERE b.id IN tail(ids)
+        RETURN a.id AS canon, properties(a) AS canon_props, collect(properties(b)) AS dup_props
+        """,
+        groups=groups,
+    ):
+        extra: dict = {}
+        for props in rec["dup_props"]:
+            for key, value in props.items():
+                if key not in rec["canon_props"] and key not in extra:
+                    extra[key] = value
+        updates.append({"canon": rec["canon"], "extra": extra})
+
+    tx.run(
+        f"""
+        UNWIND $updates AS u
+        MATCH (a:{label} {{id: u.canon}})
+        SET a += u.extra, a.updated_at = timestamp()
+        """,
+        updates=updates,
+    )
+
+    # ── Alias index → survivor, then drop the duplicates ─────────────────
+    tx.run(
+        f"""
+        UNWIND $pairs AS p
+        MATCH (al:{ALIAS_LABEL} {{canonical_id: p.dup}})
+        SET al.canonical_id = p.canon
+        """,
+        pairs=pairs,
+    )
+    summary = tx.run(
+        f"""
+        UNWIND $pairs AS p
+        MATCH (b:{label} {{id: p.dup}})
+        DETACH DELETE b
+        """,
+        pairs=pairs,
+    ).consume()
+    stats["nodes_merged"] = summary.counters.nodes_deleted
+    stats["merged_ids"]   = [p["dup"] for p in pairs]
+    return stats
+
+
+# ── Job ──────────────────────────────────────────────────────────────────────
+
+class EntityMergeJob:
+    IDLE     = "IDLE"
+    RUNNING  = "RUNNING"
+    COMPLETE = "COMPLETE"
+    FAILED   = "FAILED"
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._running = False
+        self._metrics = {"status": self.IDLE}
+
+    def status(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        if metrics.get("status") == self.RUNNING:
+            metrics["elapsed_s"] = round(time.time() - metrics["started_at"], 2)
+        return metrics
+
+    def start(self, full: bool = False, batch_size: Optional[int] = None) -> dict:
+        """Run in a background thread; raises MergeAlreadyRunning if one is active."""
+        self._claim()
+        threading.Thread(
+            target=self._run_claimed, args=(full, batch_size),
+            name="entity-merge", daemon=True,
+        ).start()
+        return self.status()
+
+    def run(self, full: bool = False, batch_size: Optional[int] = None) -> dict:
+        """Run in the calling thread; returns the final metrics."""
+        self._claim()
+        self._run_claimed(full, batch_size)
+        return self.status()
+
+    def _claim(self) -> None:
+        with self._lock:
+            if self._running:
+                raise MergeAlreadyRunning("An entity merge is already running")
+            self._running = True
+            self._metrics = {
+                "status":              self.RUNNING,
+                "started_at":          time.time(),
+                "mode":                None,
+                "since":               None,
+                "label":               None,
+                "names_examined":      0,
+                "names_total":         0,
+                "batches_done":        0,
+                "batches_total":       0,
+                "groups":              0,
+                "nodes_merged":        0,
+                "relationships_moved": 0,
+                "error":               None,
+            }
+
+    def _set(self, **values) -> None:
+        with self._lock:
+            self._metrics.update(values)
+
+    def _add(self, **deltas) -> None:
+        with self._lock:
+            for key, delta in deltas.items():
+                self._metrics[key] += delta
+
+    def _run_claimed(self, full: bool, batch_size: Optional[int]) -> None:
+        batch_size = max(1, batch_size or settings.ENTITY_MERGE_BATCH_SIZE)
+        client     = Neo4jClient()
+        try:
+            since = None if full else _load_watermark()
+            now   = client.execute_query("RETURN timestamp() AS now")
+            if not now or not now.get("data"):
+                raise RuntimeError("Neo4j unavailable")
+            run_started = now["data"][0]["now"]
+            self._set(mode="incremental" if since is not None else "full", since=since)
+            logger.info(
+                f"🔗 Entity merge started | mode={'incremental' if since is not None else 'full'} "
+                f"| batch_size={batch_size}"
+            )
+
+            for label in ENTITY_LABELS:
+                norms = self._touched_names(client, label, since)
+                batches = [norms[i:i + batch_size] for i in range(0, len(norms), batch_size)]
+                self._set(label=label)
+                self._add(names_total=len(norms), batches_total=len(batches))
+                for batch in batches:
+                    stats = client.execute_write(_merge_batch_tx, label, batch)
+                    if stats["groups"]:
+                        bump_graph_version(f"entity merge ({label})")
+                        self._unindex(label, stats["merged_ids"])
+                    self._add(
+                        names_examined      = len(batch),
+                        batches_done        = 1,
+                        groups              = stats["groups"],
+                        nodes_merged        = stats["nodes_merged"],
+                        relationships_moved = stats["relationships_moved"],
+                    )
+
+            _save_watermark(run_started)
+            self._finish(self.COMPLETE)
+        except Exception as exc:
+            logger.error(f"❌ Entity merge failed: {exc}", exc_info=True)
+            self._finish(self.FAILED, error=str(exc))
+
+    @staticmethod
+    def _unindex(label: str, ids: list[str]) -> None:
+        """Drop merged-away nodes from the entity vector store (best effort)."""
+        store = get_vector_store()
+        if store is None:
+            return
+        try:
+            store.remove(label, ids)
+        except Exception as exc:
+            logger.warning(f"Vector store update failed ({exc}) — run python -m app.db.vector_store --rebuild")
+
+    @staticmethod
+    def _touched_names(client: Neo4jClient, label: str, since: Optional[int]) -> list[str]:
+        """Distinct normalised names of nodes written after `since` (all when None)."""
+        if since is None:
+            q = f"""
+            MATCH (n:{label}) WHERE n.name_normalized IS NOT NULL
+            RETURN DISTINCT n.name_normalized AS norm
+            """
+        else:
+            q = f"""
+            MATCH (n:{label}) WHERE n.updated_at > $since AND n.name_normalized IS NOT NULL
+            RETURN DISTINCT n.name_normalized AS norm
+            """
+        # Streamed: only the names are kept, not a dict per row. The list is
+        # read in full first so the merge writes don't run inside this read.
+        return [row["norm"] for row in client.stream(q, {"since": since}) if row["norm"]]
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._running = False
+            self._metrics.update(
+                status      = status,
+                error       = error,
+                label       = None,
+                finished_at = time.time(),
+                elapsed_s   = round(time.time() - self._metrics["started_at"], 2),
+            )
+            m = dict(self._metrics)
+        logger.info(
+            f"Entity merge {status} | names={m['names_examined']}/{m['names_total']} "
+            f"groups={m['groups']} merged={m['nodes_merged']} "
+            f"rels_moved={m['relationships_moved']} | {m['elapsed_s']}s"
+        )
+
+
+# ── Singleton ─────────────────────────────────────────────────────────────────
+entity_merge_job = EntityMergeJob()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="Merge cross-document duplicate entities in Neo4j.")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark, examine every node")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"names per transaction (default {settings.ENTITY_MERGE_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    setup_logging()
+    print(json.dumps(entity_merge_job.run(full=args.full, batch_size=args.batch_size), indent=2))
@@ -0,0 +1,277 @@
+"""
+FinAgent — Entity Resolution
+ICIJ-style name normalisation and in-batch duplicate detection:
+  1. normalize_name()      — Unicode → ASCII, lowercase, strip legal suffixes
+  2. _is_duplicate()       — pairwise rule: exact │ rapidfuzz ≥ 90 │ same Soundex
+  3. resolve_duplicates()  — the same rule applied to a whole batch through a
+                             blocking index + vectorised rapidfuzz scoring,
+                             instead of comparing every pair in Python
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# ── Optional similarity libs (graceful degradation) ──────────────────────────
+try:
+    from rapidfuzz import fuzz as _fuzz
+    _HAS_RAPIDFUZZ = True
+except ImportError:
+    _HAS_RAPIDFUZZ = False
+    logger.warning("rapidfuzz not installed — fuzzy dedup disabled")
+
+try:
+    import jellyfish as _jf
+    _HAS_JELLYFISH = True
+except ImportError:
+    _HAS_JELLYFISH = False
+    logger.warning("jellyfish not installed — phonetic dedup disabled")
+
+try:
+    import numpy as np
+    from rapidfuzz import process as _rf_process
+    _HAS_CDIST = _HAS_RAPIDFUZZ
+except ImportError:
+    _HAS_CDIST = False
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 1. TEXT NORMALISATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+_LEGAL_SUFFIXES = re.compile(
+    r'\b(limited|ltd\.?|incorporated|inc\.?|corporation|corp\.?|'
+    r's\.?a\.?|tbk\.?|pt\.?|cv\.?|llc\.?|llp\.?|plc\.?|'
+    r'perseroan terbatas|persero)\b',
+    re.IGNORECASE,
+)
+
+def normalize_name(text: str) -> str:
+    """
+    ICIJ-style normalisation:
+      - Unicode → ASCII
+      - Lowercase
+      - Remove legal suffixes (Ltd, PT, Inc …)
+      - Strip punctuation & collapse whitespace
+    """
+    # Strip accents
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = text.lower().strip()
+    # Remove legal entity markers
+    text = _LEGAL_SUFFIXES.sub("", text)
+    # Remove non-word characters (keep spaces)
+    text = re.sub(r'[^\w\s]', '', text)
+    # Collapse whitespace
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 2. STRING SIMILARITY — pairwise rule
+# ══════════════════════════════════════════════════════════════════════════════
+
+FUZZY_THRESHOLD  = 90   # rapidfuzz token_sort_ratio
+PHONETIC_ENABLED = True  # also match via Soundex
+
+_NO_PHONETIC = ("", "0000")
+
+def _phonetic(name: str) -> str:
+    """Return Soundex code if jellyfish available."""
+    if _HAS_JELLYFISH:
+        return _jf.soundex(name)
+    return name
+
+def _is_duplicate(a: str, b: str) -> bool:
+    """True if two normalised names refer to the same entity."""
+    if a == b:
+        return True
+    if _HAS_RAPIDFUZZ and _fuzz.token_sort_ratio(a, b) >= FUZZY_THRESHOLD:
+        return True
+    if PHONETIC_ENABLED and _phonetic(a) == _phonetic(b) and _phonetic(a) not in _NO_PHONETIC:
+        return True
+    return False
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 3. BATCH ENGINE — blocking index + matrix scoring
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Rows scored per cdist call inside one block (bounds the score matrix memory)
+_SCORE_ROWS = 2048
+
+
+@dataclass(frozen=True)
+class NameFeatures:
+    """Everything the duplicate rule needs about one name, computed once."""
+    normalized: str
+    phonetic:   Optional[str]   # None when unusable ("", "0000", disabled)
+    tokens:     frozenset
+    block_keys: tuple           # fuzzy blocking keys
+
+    @classmethod
+    def from_normalized(cls, norm: str) -> "NameFeatures":
+        phonetic = None
+        if PHONETIC_ENABLED and _HAS_JELLYFISH:
+            code = _jf.soundex(norm)
+            phonetic = code if code not in _NO_PHONETIC else None
+        tokens = norm.split()
+        # Fuzzy blocking keys: the first token as written, plus the first and
+        # last *word* in sorted order — token_sort_ratio compares sorted
+        # tokens, so reordered names ("abadi sumber rejeki" / "sumber rejeki
+        # abadi") still share a block. Numeric tokens sort first and vary
+        # freely, so they only serve as keys when a name has no words.
+        words = sorted(t for t in tokens if not t.isdigit()) or sorted(tokens)
+        keys  = tuple(dict.fromkeys(
+            ["t:" + tokens[0], "w:" + words[0], "w:" + words[-1]] if tokens else []
+        ))
+        return cls(norm, phonetic, frozenset(tokens), keys)
+
+
+def _earliest_fuzzy_matches(block: List[int], names: List[str], best: List[Optional[int]]) -> None:
+    """
+    Within one block (unique-name indices, ascending), record for every
+    member the earliest *earlier* member whose token_sort_ratio clears
+    FUZZY_THRESHOLD. Scores come from rapidfuzz cdist in row slices.
+    """
+    block_names = [names[k] for k in block]
+    for r0 in range(1, len(block), _SCORE_ROWS):
+        r1 = min(r0 + _SCORE_ROWS, len(block))
+        if _HAS_CDIST:
+            scores = _rf_process.cdist(
+                block_names[r0:r1], block_names[:r1],
+                scorer=_fuzz.token_sort_ratio,
+                score_cutoff=FUZZY_THRESHOLD,
+                dtype=np.uint8,
+                workers=-1,
+            )
+            # keep only columns strictly before each row (earlier names)
+            mask = np.tril(scores >= FUZZY_THRESHOLD, k=r0 - 1)
+            hit_rows = np.flatnonzero(mask.any(axis=1))
+            first_cols = mask[hit_rows].argmax(axis=1)
+            pairs = zip(hit_rows.tolist(), first_cols.tolist())
+        else:
+            pairs = []
+            for i in range(r1 - r0):
+                row = r0 + i
+                for col in range(row):
+                    if _fuzz.token_sort_ratio(block_names[row], block_names[col]) >= FUZZY_THRESHOLD:
+                        pairs.append((i, col))
+                        break
+        for i, col in pairs:
+            k, j = block[r0 + i], block[col]
+            if best[k] is None or j < best[k]:
+                best[k] = j
+
+
+def _earliest_unblocked_matches(names: List[str], best: List[Optional[int]]) -> None:
+    """
+    Exactness pass: blocking only proposes candidates, so score every name
+    against all distinct names before its current best match (before itself
+    when it has none) and keep the earliest that clears FUZZY_THRESHOLD.
+    Soundex matches are dense, so most bounds are small; rows are grouped by
+    bound so each cdist slice only spans the columns its rows need.
+    """
+    bounds = [b if b is not None else k for k, b in enumerate(best)]
+    rows   = sorted((k for k in range(len(names)) if bounds[k] > 0), key=bounds.__getitem__)
+    for s0 in range(0, len(rows), _SCORE_ROWS):
+        chunk = rows[s0:s0 + _SCORE_ROWS]
+        width = bounds[chunk[-1]]
+        if _HAS_CDIST:
+            scores = _rf_process.cdist(
+                [names[k] for k in chunk], names[:width],
+                scorer=_fuzz.token_sort_ratio,
+                score_cutoff=FUZZY_THRESHOLD,
+                dtype=np.uint8,
+                workers=-1,
+            )
+            limit = np.array([bounds[k] for k in chunk])[:, None]
+            mask  = (scores >= FUZZY_THRESHOLD) & (np.arange(width)[None, :] < limit)
+            hit_rows   = np.flatnonzero(mask.any(axis=1))
+            first_cols = mask[hit_rows].argmax(axis=1)
+            pairs = zip(hit_rows.tolist(), first_cols.tolist())
+        else:
+            pairs = []
+            for i, k in enumerate(chunk):
+                for col in range(bounds[k]):
+                    if _fuzz.token_sort_ratio(names[k], names[col]) >= FUZZY_THRESHOLD:
+                        pairs.append((i, col))
+                        break
+        for i, col in pairs:
+            best[chunk[i]] = col
+
+
+def resolve_duplicates(normalized_names: Sequence[str]) -> List[int]:
+    """
+    For each input position return the position of the canonical entry it
+    collapses into (its own position if it is canonical).
+
+    Semantics are those of the original pairwise loop — walk the names in
+    order, compare each against every distinct name seen so far in
+    first-seen order, join the first one _is_duplicate() accepts — but
+    candidates come first from a blocking index, not all previous names:
+
+      • same Soundex code    → every member of the block is a match, the
+                               earliest one wins (no scoring needed)
+      • same first token, or → token_sort_ratio scored as a matrix per block
+        first / last word in
+        sorted order
+
+    Blocks only narrow the search: a final pass scores each name against
+    the earlier names before its best blocked match, so pairs that share no
+    block key are still found and the output is identical to the loop's
+    (benchmarks/bench_dedup.py checks agreement). Features are computed
+    once per distinct name.
+    """
+    # ── Distinct names in first-seen order ───────────────────────────────
+    order: dict[str, int] = {}
+    positions: List[int] = []
+    for norm in normalized_names:
+        positions.append(order.setdefault(norm, len(order)))
+    names = list(order)
+    feats = [NameFeatures.from_normalized(n) for n in names]
+
+    # ── Blocking index ───────────────────────────────────────────────────
+    phonetic_first: dict[str, int] = {}
+    fuzzy_blocks:   dict[str, List[int]] = defaultdict(list)
+    for k, f in enumerate(feats):
+        if f.phonetic is not None:
+            phonetic_first.setdefault(f.phonetic, k)
+        if _HAS_RAPIDFUZZ:
+            for key in f.block_keys:
+                fuzzy_blocks[key].append(k)
+
+    # best[k] = earliest distinct name before k that _is_duplicate() accepts
+    best: List[Optional[int]] = [None] * len(names)
+    for k, f in enumerate(feats):
+        if f.phonetic is not None and phonetic_first[f.phonetic] < k:
+            best[k] = phonetic_first[f.phonetic]
+    for block in fuzzy_blocks.values():
+        if len(block) > 1:
+            _earliest_fuzzy_matches(block, names, best)
+    if _HAS_RAPIDFUZZ:
+        _earliest_unblocked_matches(names, best)
+
+    # ── Greedy pass in input order (same state machine as the loop) ──────
+    canon_of_name: dict[int, int] = {}   # distinct name → canonical position
+    result: List[int] = []
+    for pos, k in enumerate(positions):
+        if k in canon_of_name:
+            # Repeat: the name itself is a candidate, unless an earlier one matches
+            j = best[k] if best[k] is not None else k
+            matched = canon_of_name[j]
+        else:
+            matched = canon_of_name[best[k]] if best[k] is not None else None
+
+        if matched is not None:
+            canon_of_name[k] = matched
+            result.append(matched)
+        else:
+            canon_of_name[k] = pos
+            result.append(pos)
+
+    return result
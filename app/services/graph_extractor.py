@@ -3,43 +3,40 @@ FinAgent — Graph Extractor Service
 ICIJ-grade pipeline:
   1. LLM extracts entities & relations (no hardcoded rules)
   2. Text normalisation (case, punctuation, legal suffixes)
-  3. String-similarity dedup (rapidfuzz + jellyfish Soundex)
+  3. String-similarity dedup (rapidfuzz + jellyfish Soundex, blocked)
   4. Multi-attribute graph MERGE in Neo4j (auto entity-resolution)
 """
 
 import re
 import os
-import unicodedata
 import tempfile
-from collections import defaultdict
-from typing import List, Optional
+import itertools
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 
 from pydantic import BaseModel, Field
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_community.document_loaders import PyMuPDFLoader
 
+from app.core.config import settings
+from app.db.extraction_cache import ExtractionCache, get_extraction_cache
+from app.db.graph_writer import (
+    PHASE_ALIASES, PHASE_NODES, PHASE_RELATIONSHIPS, DocumentWrite, get_graph_writer,
+)
 from app.db.neo4j_client import Neo4jClient
+from app.db.schema import ALIAS_LABEL
+from app.db.vector_store import get_vector_store
+from app.services.chunker import Chunk, OverlapFilter, chunk_token_budget, get_token_counter, iter_chunks
+from app.services.entity_resolution import (  # noqa: F401  (re-exported)
+    FUZZY_THRESHOLD, PHONETIC_ENABLED, _is_duplicate, normalize_name, resolve_duplicates,
+)
+from app.services.ingestion_jobs import IngestionJob, JobCancelled
 from app.services.llm_service import GroqClient
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-# ── Optional similarity libs (graceful degradation) ──────────────────────────
-try:
-    from rapidfuzz import fuzz as _fuzz
-    _HAS_RAPIDFUZZ = True
-except ImportError:
-    _HAS_RAPIDFUZZ = False
-    logger.warning("rapidfuzz not installed — fuzzy dedup disabled")
-
-try:
-    import jellyfish as _jf
-    _HAS_JELLYFISH = True
-except ImportError:
-    _HAS_JELLYFISH = False
-    logger.warning("jellyfish not installed — phonetic dedup disabled")
-
-
 # ══════════════════════════════════════════════════════════════════════════════
 # SCHEMA
 # ══════════════════════════════════════════════════════════════════════════════
@@ -67,6 +64,16 @@ class RelationType(str):
 
 KNOWN_TYPES = {"Person", "Company", "Address", "Document"}
 
+# Alias index: (:EntityAlias {key: "<Label>|<name_normalized>", canonical_id})
+# Lets later documents resolve name variants to an existing node.
+
+def graph_label(node_type: str) -> str:
+    """Neo4j label a node of this extracted type is stored under."""
+    return node_type if node_type in KNOWN_TYPES else "Entity"
+
+def alias_key(label: str, name_normalized: str) -> str:
+    return f"{label}|{name_normalized}"
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # PYDANTIC MODELS
@@ -102,87 +109,44 @@ class ExtractionResult(BaseModel):
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# 1. TEXT NORMALISATION
+# 1 + 2. NORMALISATION & IN-BATCH DEDUP  (see app/services/entity_resolution.py)
 # ══════════════════════════════════════════════════════════════════════════════
 
-_LEGAL_SUFFIXES = re.compile(
-    r'\b(limited|ltd\.?|incorporated|inc\.?|corporation|corp\.?|'
-    r's\.?a\.?|tbk\.?|pt\.?|cv\.?|llc\.?|llp\.?|plc\.?|'
-    r'perseroan terbatas|persero)\b',
-    re.IGNORECASE,
-)
-
-def normalize_name(text: str) -> str:
+def deduplicate_nodes(nodes: List[Node]) -> List[Node]:
     """
-    ICIJ-style normalisation:
-      - Unicode → ASCII
-      - Lowercase
-      - Remove legal suffixes (Ltd, PT, Inc …)
-      - Strip punctuation & collapse whitespace
+    Collapse nodes that refer to the same real-world entity.
+    Keeps the first occurrence of each entity, in input order.
     """
-    # Strip accents
-    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
-    text = text.lower().strip()
-    # Remove legal entity markers
-    text = _LEGAL_SUFFIXES.sub("", text)
-    # Remove non-word characters (keep spaces)
-    text = re.sub(r'[^\w\s]', '', text)
-    # Collapse whitespace
-    return re.sub(r'\s+', ' ', text).strip()
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-# 2. STRING SIMILARITY — in-batch dedup
-# ══════════════════════════════════════════════════════════════════════════════
+    return deduplicate_with_aliases(nodes)[0]
 
-FUZZY_THRESHOLD  = 90   # rapidfuzz token_sort_ratio
-PHONETIC_ENABLED = True  # also match via Soundex
 
-def _phonetic(name: str) -> str:
-    """Return Soundex code if jellyfish available."""
-    if _HAS_JELLYFISH:
-        return _jf.soundex(name)
-    return name
+def deduplicate_with_aliases(nodes: List[Node]) -> tuple[List[Node], dict[str, str]]:
+    """
+    deduplicate_nodes() plus the alias map it implies:
+    {merged-away variant name → canonical node name}.
+    """
+    canonical_of = resolve_duplicates([n.name_normalized for n in nodes])
+    canonical    = [n for i, n in enumerate(nodes) if canonical_of[i] == i]
+    aliases      = {
+        n.name: nodes[canonical_of[i]].name
+        for i, n in enumerate(nodes)
+        if canonical_of[i] != i and n.name != nodes[canonical_of[i]].name
+    }
 
-def _is_duplicate(a: str, b: str) -> bool:
-    """True if two normalised names refer to the same entity."""
-    if a == b:
-        return True
-    if _HAS_RAPIDFUZZ and _fuzz.token_sort_ratio(a, b) >= FUZZY_THRESHOLD:
-        return True
-    if PHONETIC_ENABLED and _phonetic(a) == _phonetic(b) and _phonetic(a) not in ("", "0000"):
-        return True
-    return False
+    logger.info(f"Dedup: {len(nodes)} → {len(canonical)} unique nodes, {len(aliases)} aliases")
+    return canonical, aliases
 
 
-def deduplicate_nodes(nodes: List[Node]) -> List[Node]:
-    """
-    Collapse nodes that refer to the same real-world entity.
-    Keeps the first occurrence; redirects all relationships later.
-    Returns (canonical_nodes, name_to_canonical_id mapping).
-    """
-    canonical: List[Node] = []
-    norm_to_canon: dict[str, str] = {}   # normalised_name → canonical_id
-
-    for node in nodes:
-        norm = node.name_normalized
-        matched_id = None
-        for existing_norm, canon_id in norm_to_canon.items():
-            if _is_duplicate(norm, existing_norm):
-                matched_id = canon_id
-                break
-        if matched_id:
-            norm_to_canon[norm] = matched_id   # map this variant too
-        else:
-            canonical.append(node)
-            norm_to_canon[norm] = node.id
+# ══════════════════════════════════════════════════════════════════════════════
+# 3. CHUNKING  (see app/services/chunker.py)
+# ══════════════════════════════════════════════════════════════════════════════
 
-    logger.info(f"Dedup: {len(nodes)} → {len(canonical)} unique nodes")
-    return canonical
+# Plain-text uploads are read in blocks of this size (PDFs page by page)
+_TEXT_BLOCK_CHARS = 64 * 1024
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# 3. GRAPH EXTRACTOR SERVICE
+# 4. GRAPH EXTRACTOR SERVICE
 # ══════════════════════════════════════════════════════════════════════════════
 
 _EXTRACTION_SYSTEM_PROMPT = """
@@ -314,26 +278,120 @@ Jumlah relasi sedikit dan salah klasifikasi = GAGAL.
 class GraphExtractorService:
     def __init__(self):
         groq_client = GroqClient()
-        self.llm = groq_client.get_llm().with_structured_output(ExtractionResult)
+        base_llm    = groq_client.get_llm()
+        self.model_name = getattr(base_llm, "model_name", None) or getattr(base_llm, "model", "unknown")
+        self.llm = base_llm.with_structured_output(ExtractionResult)
+
+        # Chunk size from the model's real context window, in tokens
+        self.token_counter = get_token_counter(self.model_name)
+        prompt_tokens      = self.token_counter.count(_EXTRACTION_SYSTEM_PROMPT)
+        self.chunk_tokens  = chunk_token_budget(self.model_name, prompt_tokens)
+        logger.info(
+            f"Chunking: {self.chunk_tokens} tokens/chunk "
+            f"(overlap {settings.CHUNK_OVERLAP_TOKENS}, prompt {prompt_tokens}, "
+            f"{'tiktoken' if self.token_counter.exact else 'estimated'})"
+        )
 
     # ── PDF / TXT loading ─────────────────────────────────────────────────
 
+    def iter_document_pages(self, file_path: str, filename: str) -> Iterator[str]:
+        """
+        Yield the document's text lazily — one PDF page at a time, or
+        fixed-size blocks for plain text — so peak memory does not grow
+        with document size.
+        """
+        if filename.lower().endswith('.pdf'):
+            for doc in PyMuPDFLoader(file_path).lazy_load():
+                yield doc.page_content
+        else:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                while block := f.read(_TEXT_BLOCK_CHARS):
+                    yield block
+
     def load_pdf_content(self, file_path: str) -> str:
-        loader    = PyMuPDFLoader(file_path)
-        documents = loader.load()
-        return "\n".join(doc.page_content for doc in documents)
+        return "\n".join(self.iter_document_pages(file_path, file_path))
+
+    def iter_chunks(
+        self,
+        pages: Iterable[str],
+        separator: str = "\n",
+        page_boundaries: bool = True,
+    ) -> Iterator[Chunk]:
+        return iter_chunks(
+            pages, self.token_counter, self.chunk_tokens,
+            overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+            separator=separator, page_boundaries=page_boundaries,
+        )
 
     # ── LLM Extraction ────────────────────────────────────────────────────
 
-    def extract(self, text: str, source_doc: str = "Unknown") -> ExtractionResult:
+    def extract(
+        self,
+        text: str,
+        source_doc: str = "Unknown",
+        job: Optional[IngestionJob] = None,
+    ) -> ExtractionResult:
         logger.info(f"LLM extraction starting | doc={source_doc} | chars={len(text)}")
 
-        # Chunk long documents to stay within LLM context (8k tokens ≈ 24k chars)
-        MAX_CHARS = 20_000
-        if len(text) > MAX_CHARS:
+        # Chunk documents that do not fit one chunk's token budget
+        if self.token_counter.count(text) > self.chunk_tokens:
             logger.info(f"Document too long ({len(text)} chars) — chunking into segments")
-            return self._extract_chunked(text, source_doc, MAX_CHARS)
+            return self._extract_chunked(self.iter_chunks([text]), source_doc, job=job)
+
+        if job:
+            job.set_chunks(1)
+            job.chunk_update(0, "running")
+        result, cached = self._extract_cached(text, source_doc)
+        if job:
+            job.chunk_update(0, "cached" if cached else "done",
+                             len(result.nodes), len(result.relationships))
+        logger.info(f"Extraction cache | doc={source_doc} | hits={int(cached)} misses={int(not cached)}")
+        return result
 
+    def extract_pages(
+        self,
+        pages: Iterable[str],
+        source_doc: str = "Unknown",
+        separator: str = "\n",
+        page_boundaries: bool = True,
+        job: Optional[IngestionJob] = None,
+    ) -> Optional[ExtractionResult]:
+        """
+        Streaming counterpart of extract(): pages are chunked lazily and fed
+        to the LLM as they are read. `page_boundaries` says whether each
+        page is a real page (PDF) or an arbitrary block of text. Returns
+        None if the document has no text.
+        """
+        logger.info(f"LLM extraction starting | doc={source_doc} | streaming pages")
+        chunks = self.iter_chunks(pages, separator=separator, page_boundaries=page_boundaries)
+        first  = next(chunks, None)
+        if first is None:
+            return None
+        return self._extract_chunked(itertools.chain([first], chunks), source_doc, job=job)
+
+    def _extract_cached(self, text: str, source_doc: str) -> tuple[ExtractionResult, bool]:
+        """
+        Resolve a chunk from the on-disk extraction cache, falling back to the LLM.
+        Returns (result, cache_hit).
+        """
+        cache = get_extraction_cache()
+        if cache is None:
+            return self._extract_single(text, source_doc), False
+
+        key     = ExtractionCache.make_key(text, _EXTRACTION_SYSTEM_PROMPT, self.model_name)
+        payload = cache.get(key)
+        if payload is not None:
+            try:
+                return ExtractionResult.model_validate_json(payload), True
+            except Exception as exc:
+                logger.warning(f"Discarding unreadable cache entry {key[:12]}: {exc}")
+
+        result = self._extract_single(text, source_doc)
+        cache.put(key, result.model_dump_json())
+        return result, False
+
+    def _extract_single(self, text: str, source_doc: str) -> ExtractionResult:
+        """One LLM round trip for a text that already fits the context window."""
         messages = [
             SystemMessage(content=_EXTRACTION_SYSTEM_PROMPT),
             HumanMessage(content=f"Dokumen Sumber: {source_doc}\n\n---\n{text}\n---"),
@@ -342,87 +400,226 @@ class GraphExtractorService:
         logger.info(f"LLM extracted {len(result.nodes)} nodes, {len(result.relationships)} rels")
         return result
 
-    def _extract_chunked(self, text: str, source_doc: str, chunk_size: int) -> ExtractionResult:
-        """Process long documents in overlapping chunks and merge results."""
-        overlap  = 500
-        all_nodes: List[Node]         = []
-        all_rels:  List[Relationship] = []
-
-        start = 0
-        chunk_no = 0
-        while start < len(text):
-            chunk = text[start : start + chunk_size]
-            chunk_no += 1
-            logger.info(f"Processing chunk {chunk_no} (chars {start}–{start+len(chunk)})")
+    def _extract_chunked(
+        self,
+        chunks: Iterable[Chunk],
+        source_doc: str,
+        max_concurrency: Optional[int] = None,
+        job: Optional[IngestionJob] = None,
+    ) -> ExtractionResult:
+        """
+        Process the Chunks of a long document and merge results.
+
+        Chunks are sent to the LLM in parallel — at most ``max_concurrency``
+        requests in flight (default: settings.EXTRACTION_MAX_CONCURRENCY,
+        1 = sequential) — and the partial results are merged back in
+        document order. `chunks` is consumed lazily, never more than the
+        in-flight window ahead. A failing chunk is logged and skipped; it
+        never takes the rest of the document down with it. When a job is
+        given, per-chunk progress is reported to it and cancellation is
+        honoured before each chunk starts. Entities a chunk only re-read in
+        its overlap with the previous chunk are filtered at the merge.
+        """
+        workers = max(1, max_concurrency or settings.EXTRACTION_MAX_CONCURRENCY)
+        logger.info(f"Extracting chunks | max_concurrency={workers}")
+
+        def _run(chunk: Chunk) -> tuple[Chunk, Optional[ExtractionResult], bool]:
+            chunk_no = chunk.number
+            if job:
+                job.raise_if_cancelled()
+                job.chunk_update(chunk_no - 1, "running")
+            logger.info(
+                f"Processing chunk {chunk_no} (chars {chunk.start}–{chunk.start + len(chunk.text)}, "
+                f"pages {chunk.first_page}–{chunk.last_page}, {chunk.tokens} tokens)"
+            )
             try:
-                partial = self.extract(chunk, f"{source_doc} [chunk {chunk_no}]")
-                all_nodes.extend(partial.nodes)
-                all_rels.extend(partial.relationships)
+                partial, cached = self._extract_cached(chunk.text, f"{source_doc} [chunk {chunk_no}]")
             except Exception as e:
                 logger.warning(f"Chunk {chunk_no} failed: {e}")
-            start += chunk_size - overlap
+                if job:
+                    job.chunk_update(chunk_no - 1, "failed")
+                return chunk, None, False
+            if job:
+                job.chunk_update(chunk_no - 1, "cached" if cached else "done",
+                                 len(partial.nodes), len(partial.relationships))
+            return chunk, partial, cached
+
+        partials: List[tuple] = []
+        if workers == 1:
+            for item in chunks:
+                if job:
+                    job.add_chunk()
+                partials.append(_run(item))
+        else:
+            # Bounded window of futures, drained oldest-first → document order
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as pool:
+                in_flight: deque = deque()
+                for item in chunks:
+                    if job:
+                        job.add_chunk()
+                    in_flight.append(pool.submit(_run, item))
+                    if len(in_flight) >= workers:
+                        partials.append(in_flight.popleft().result())
+                while in_flight:
+                    partials.append(in_flight.popleft().result())
 
+        all_nodes: List[Node]         = []
+        all_rels:  List[Relationship] = []
+        overlap_filter = OverlapFilter()
+        hits = 0
+        for chunk, partial, cached in partials:
+            if partial is None:
+                overlap_filter.skip()
+                continue
+            hits += cached
+            nodes, rels = overlap_filter.apply(chunk, partial.nodes, partial.relationships)
+            all_nodes.extend(nodes)
+            all_rels.extend(rels)
+
+        total_tokens   = sum(c.tokens for c, _, _ in partials)
+        overlap_tokens = sum(c.overlap_tokens for c, _, _ in partials)
+        logger.info(
+            f"Chunks | doc={source_doc} | chunks={len(partials)} | tokens={total_tokens} "
+            f"(overlap {overlap_tokens}) | overlap-only dropped: "
+            f"{overlap_filter.dropped_nodes} nodes, {overlap_filter.dropped_rels} rels"
+        )
+        logger.info(
+            f"Extraction cache | doc={source_doc} | chunks={len(partials)} | hits={hits} "
+            f"misses={sum(1 for _, p, _ in partials if p is not None) - hits}"
+        )
         return ExtractionResult(nodes=all_nodes, relationships=all_rels)
 
     # ── Main entry point (FastAPI) ────────────────────────────────────────
 
-    def process_uploaded_file_from_api(self, file_path: str, filename: str) -> bool:
+    def process_uploaded_file_from_api(
+        self,
+        file_path: str,
+        filename: str,
+        job: Optional[IngestionJob] = None,
+    ) -> bool:
+        """
+        Full ingestion pipeline for one uploaded file. Runs on an ingestion
+        worker thread; `job` (optional) receives progress and may cancel it.
+        The file is read page by page, never as one string.
+        """
         try:
-            if filename.lower().endswith('.pdf'):
-                text = self.load_pdf_content(file_path)
-            else:
-                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    text = f.read()
-
-            if not text.strip():
+            is_pdf = filename.lower().endswith('.pdf')
+            result = self.extract_pages(
+                self.iter_document_pages(file_path, filename),
+                source_doc=filename,
+                separator="\n" if is_pdf else "",
+                page_boundaries=is_pdf,
+                job=job,
+            )
+            if result is None:
                 logger.warning(f"Empty file: {filename}")
                 return False
 
-            result = self.extract(text, source_doc=filename)
             logger.info(f"Raw: {len(result.nodes)} nodes, {len(result.relationships)} rels")
 
             # ── ICIJ pipeline (dedup in-memory, then save) ─────────────
-            result = self._normalise_and_dedup(result)
-            self.save_to_neo4j(result)
+            result, aliases = self._normalise_and_dedup(result)
+            if job:
+                job.set_counts(len(result.nodes), len(result.relationships))
+                job.raise_if_cancelled()
+            self.save_to_neo4j(result, aliases=aliases, source_doc=filename)
             # Note: _merge_duplicates_in_graph() is intentionally NOT called
             # here — it's a heavy operation and should be triggered manually
             # or via a background job, not on every upload.
             return True
 
+        except JobCancelled:
+            logger.info(f"Ingestion of {filename} cancelled — nothing saved")
+            raise
         except Exception as e:
             logger.error(f"Failed to process {filename}: {e}", exc_info=True)
             return False
 
     # ── ICIJ Step 1 + 2: Normalise & in-batch dedup ──────────────────────
 
-    def _normalise_and_dedup(self, result: ExtractionResult) -> ExtractionResult:
-        """Apply normalisation and fuzzy dedup before saving."""
-        deduped_nodes = deduplicate_nodes(result.nodes)
-        known_names   = {n.name for n in deduped_nodes}
-
-        # Keep only relationships where both endpoints exist as nodes
-        clean_rels = [
-            r for r in result.relationships
-            if r.source in known_names and r.target in known_names
-        ]
+    def _normalise_and_dedup(self, result: ExtractionResult) -> tuple[ExtractionResult, dict[str, str]]:
+        """
+        Apply normalisation and fuzzy dedup before saving.
 
-        logger.info(f"After dedup: {len(deduped_nodes)} nodes, {len(clean_rels)} rels")
-        return ExtractionResult(nodes=deduped_nodes, relationships=clean_rels)
+        Relationship endpoints naming a merged-away variant are rewritten to
+        the canonical node instead of being dropped. Returns the deduplicated
+        result and the variant → canonical alias map.
+        """
+        deduped_nodes, aliases = deduplicate_with_aliases(result.nodes)
+        known_names = {n.name for n in deduped_nodes}
+
+        # Normalised spelling → canonical name, for endpoints the LLM wrote
+        # slightly differently from any node name
+        by_norm: dict[str, str] = {}
+        for n in result.nodes:
+            by_norm.setdefault(n.name_normalized, aliases.get(n.name, n.name))
+
+        def _resolve(name: str) -> Optional[str]:
+            if name in known_names:
+                return name
+            if name in aliases:
+                return aliases[name]
+            return by_norm.get(normalize_name(name))
+
+        # Keep relationships whose endpoints resolve to surviving nodes
+        clean_rels = []
+        rewritten  = 0
+        for r in result.relationships:
+            src, tgt = _resolve(r.source), _resolve(r.target)
+            if not src or not tgt:
+                continue
+            if src == tgt and r.source != r.target:
+                continue   # both ends collapsed into one entity
+            if (src, tgt) != (r.source, r.target):
+                r = r.model_copy(update={"source": src, "target": tgt})
+                rewritten += 1
+            clean_rels.append(r)
+
+        logger.info(
+            f"After dedup: {len(deduped_nodes)} nodes, {len(clean_rels)} rels "
+            f"({rewritten} rels re-pointed via aliases)"
+        )
+        return ExtractionResult(nodes=deduped_nodes, relationships=clean_rels), aliases
 
     # ── Save to Neo4j (pure Cypher, no APOC) ─────────────────────────────
 
-    def save_to_neo4j(self, data: ExtractionResult):
+    def save_to_neo4j(
+        self,
+        data: ExtractionResult,
+        aliases: Optional[dict[str, str]] = None,
+        source_doc: str = "Unknown",
+    ) -> dict:
+        """
+        Write nodes, alias index entries and relationships through the
+        shared bulk writer — as one transaction (or GRAPH_WRITE_BATCH_SIZE
+        sub-batches), so a failure never leaves half a document behind.
+        Nodes whose name is already in the alias index resolve to the
+        existing graph node rather than creating a new one; this document's
+        names and `aliases` (variant → canonical name) are then added to
+        the index. Raises if the write fails.
+        """
         if not data.nodes:
             logger.warning("No entities to save.")
-            return
+            return {}
 
-        client      = Neo4jClient()
-        saved_nodes = 0
-        saved_rels  = 0
+        writer = get_graph_writer()
+        doc    = DocumentWrite(source=source_doc)
+
+        # ── Alias index lookup: name → id of an existing node ────────────
+        existing = self._lookup_aliases(writer.client, data.nodes)
 
         # ── Nodes ────────────────────────────────────────────────────────
         for node_type in ("Person", "Company", "Address", "Document"):
-            batch = [
+            doc.add(PHASE_NODES, f"""
+            MERGE (node:{node_type} {{id: row.id}})
+            ON CREATE SET node.created_at = timestamp()
+            SET node.name            = row.name,
+                node.context         = row.context,
+                node.role            = row.role,
+                node.name_normalized = row.name_normalized,
+                node.type            = '{node_type}',
+                node.updated_at      = timestamp()
+            """, [
                 {
                     "id":              n.id,
                     "name":            n.name,
@@ -430,137 +627,128 @@ class GraphExtractorService:
                     "role":            n.role or "",
                     "name_normalized": n.name_normalized,
                 }
-                for n in data.nodes if n.type == node_type
-            ]
-            if not batch:
-                continue
-            q = f"""
-            UNWIND $nodes AS n
-            MERGE (node:{node_type} {{id: n.id}})
-            SET node.name            = n.name,
-                node.context         = n.context,
-                node.role            = n.role,
-                node.name_normalized = n.name_normalized,
-                node.type            = '{node_type}'
-            RETURN count(node) AS cnt
-            """
-            r = client.execute_query(q, {"nodes": batch})
-            if r and r.get("data"):
-                saved_nodes += r["data"][0].get("cnt", 0)
+                for n in data.nodes if n.type == node_type and n.name not in existing
+            ])
 
         # Fallback for unknown types
-        unknown = [
+        doc.add(PHASE_NODES, """
+            MERGE (node:Entity {id: row.id})
+            ON CREATE SET node.created_at = timestamp()
+            SET node += {name: row.name, context: row.context,
+                         name_normalized: row.name_normalized, type: row.type,
+                         updated_at: timestamp()}
+            """, [
             {"id": n.id, "name": n.name, "context": n.context,
              "name_normalized": n.name_normalized, "type": n.type}
-            for n in data.nodes if n.type not in KNOWN_TYPES
-        ]
-        if unknown:
-            q = """
-            UNWIND $nodes AS n
-            MERGE (node:Entity {id: n.id})
-            SET node += {name: n.name, context: n.context,
-                         name_normalized: n.name_normalized, type: n.type}
-            """
-            client.execute_query(q, {"nodes": unknown})
-
-        # Build name → node lookup for ID resolution
-        node_by_name = {n.name: n for n in data.nodes}
+            for n in data.nodes if n.type not in KNOWN_TYPES and n.name not in existing
+        ])
+
+        # Build name → node id lookup for ID resolution
+        id_by_name = {n.name: existing.get(n.name, n.id) for n in data.nodes}
+        doc.add(PHASE_ALIASES, f"""
+            MERGE (al:{ALIAS_LABEL} {{key: row.key}})
+            ON CREATE SET al.canonical_id = row.canonical_id
+            """, self._alias_rows(data.nodes, aliases or {}, id_by_name))
+        if existing:
+            logger.info(f"Alias index resolved {len(existing)} entities to existing nodes")
+
+        label_by_name = {n.name: graph_label(n.type) for n in data.nodes}
 
         # ── Relationships (dynamic type, no APOC) ────────────────────────
+        # Grouped by (type, source label, target label) so both endpoints
+        # are found through the per-label id uniqueness constraint.
         rels_by_type: dict = defaultdict(list)
         for r in data.relationships:
-            src_node = node_by_name.get(r.source)
-            tgt_node = node_by_name.get(r.target)
-            if not src_node or not tgt_node:
+            src_id = id_by_name.get(r.source)
+            tgt_id = id_by_name.get(r.target)
+            if not src_id or not tgt_id:
                 logger.warning(f"Skipping rel {r.source}→{r.target}: node not found")
                 continue
             rtype = re.sub(r'[^A-Z0-9_]', '_',
                            r.type.upper().replace(" ", "_").replace("-", "_"))
             if not rtype or not rtype.replace("_", "").isalpha():
                 continue
-            rels_by_type[rtype].append({
-                "source_id": src_node.id,
-                "target_id": tgt_node.id,
+            rels_by_type[(rtype, label_by_name[r.source], label_by_name[r.target])].append({
+                "source_id": src_id,
+                "target_id": tgt_id,
                 "details":   r.details or "",
             })
 
-        for rtype, batch in rels_by_type.items():
-            q = f"""
-            UNWIND $rels AS r
-            MATCH (src {{id: r.source_id}})
-            MATCH (tgt {{id: r.target_id}})
+        for (rtype, src_label, tgt_label), batch in rels_by_type.items():
+            doc.add(PHASE_RELATIONSHIPS, f"""
+            MATCH (src:{src_label} {{id: row.source_id}})
+            MATCH (tgt:{tgt_label} {{id: row.target_id}})
             MERGE (src)-[rel:{rtype}]->(tgt)
-            SET rel.details = r.details
-            RETURN count(rel) AS cnt
-            """
-            try:
-                res = client.execute_query(q, {"rels": batch})
-                if res and res.get("data"):
-                    saved_rels += res["data"][0].get("cnt", 0)
-            except Exception as e:
-                logger.warning(f"Could not save relation {rtype}: {e}")
+            SET rel.details = row.details
+            """, batch)
+
+        result = writer.write(doc)
+        logger.info(
+            f"Saved to Neo4j: {result['nodes_created']} new nodes, "
+            f"{result['relationships_created']} new relations ({result['rows']} rows, {result['seconds']}s)"
+        )
+        self._index_entities([n for n in data.nodes if n.name not in existing])
+        return result
 
-        logger.info(f"Saved to Neo4j: {saved_nodes} nodes, {saved_rels} relations")
+    def _index_entities(self, nodes: List[Node]) -> None:
+        """Append saved nodes to the entity vector store (best effort)."""
+        store = get_vector_store()
+        if store is None or not nodes:
+            return
+        try:
+            added = store.add(
+                {"id": n.id, "label": graph_label(n.type), "name": n.name, "context": n.context}
+                for n in nodes
+            )
+            logger.info(f"Vector store: indexed {added} entities")
+        except Exception as exc:
+            logger.warning(f"Vector store update failed ({exc}) — run python -m app.db.vector_store --rebuild")
+
+    def _lookup_aliases(self, client: Neo4jClient, nodes: List[Node]) -> dict[str, str]:
+        """Return {node name → existing canonical id} for nodes found in the alias index."""
+        keys = {alias_key(graph_label(n.type), n.name_normalized): n for n in nodes}
+        q = f"""
+        UNWIND $keys AS k
+        MATCH (al:{ALIAS_LABEL} {{key: k}})
+        RETURN al.key AS key, al.canonical_id AS canonical_id
+        """
+        res = client.execute_query(q, {"keys": list(keys)})
+        found: dict[str, str] = {}
+        for row in (res or {}).get("data", []):
+            node = keys.get(row["key"])
+            if node is not None and row["canonical_id"] and row["canonical_id"] != node.id:
+                found[node.name] = row["canonical_id"]
+        return found
+
+    def _alias_rows(
+        self,
+        nodes: List[Node],
+        aliases: dict[str, str],
+        id_by_name: dict[str, str],
+    ) -> list[dict]:
+        """Index every saved name and merged-away variant; the first mapping wins."""
+        node_by_name = {n.name: n for n in nodes}
+        entries: dict[str, str] = {}
+        for n in nodes:
+            entries[alias_key(graph_label(n.type), n.name_normalized)] = id_by_name[n.name]
+        for variant, canonical in aliases.items():
+            canon_node = node_by_name.get(canonical)
+            if canon_node is None:
+                continue
+            key = alias_key(graph_label(canon_node.type), normalize_name(variant))
+            entries.setdefault(key, id_by_name[canonical])
+        return [{"key": k, "canonical_id": v} for k, v in entries.items()]
 
     # ── ICIJ Step 3: Graph-based multi-attribute MERGE ───────────────────
 
-    def _merge_duplicates_in_graph(self):
+    def _merge_duplicates_in_graph(self, full: bool = False) -> dict:
         """
-        Collapse nodes that share the same normalised name AND
-        at least one common neighbour (address / company / email).
-        Pure Cypher — no GDS / APOC needed.
+        Collapse graph nodes of the same label sharing a normalised name,
+        across documents. Delegates to the incremental, batched merge job
+        (app/services/entity_merge.py); returns its metrics.
         """
-        client = Neo4jClient()
-
-        # Find candidate pairs: same normalised name, different id
-        find_q = """
-        MATCH (a), (b)
-        WHERE id(a) < id(b)
-          AND a.name_normalized IS NOT NULL
-          AND a.name_normalized = b.name_normalized
-          AND a.id <> b.id
-        RETURN a.id AS aid, b.id AS bid, a.name AS aname, b.name AS bname
-        LIMIT 100
-        """
-        result = client.execute_query(find_q)
-        if not result or not result.get("data"):
-            logger.info("No cross-document duplicates found.")
-            return
-
-        pairs = result["data"]
-        logger.info(f"Found {len(pairs)} candidate duplicate pairs — resolving...")
-
-        for pair in pairs:
-            aid, bid = pair["aid"], pair["bid"]
-            # Redirect all relationships from b to a, then delete b
-            merge_q = f"""
-            MATCH (a {{id: $aid}}), (b {{id: $bid}})
-            // Redirect outgoing rels
-            WITH a, b
-            MATCH (b)-[r]->(x)
-            WHERE x <> a
-            WITH a, b, collect({{type: type(r), target: x, props: properties(r)}}) AS out_rels
-            FOREACH (rel IN out_rels |
-                MERGE (a)-[nr:RELATED_TO]->(rel.target)
-                SET nr += rel.props
-            )
-            WITH a, b
-            // Redirect incoming rels
-            MATCH (y)-[r2]->(b)
-            WHERE y <> a
-            WITH a, b, collect({{type: type(r2), src: y, props: properties(r2)}}) AS in_rels
-            FOREACH (rel IN in_rels |
-                MERGE (rel.src)-[nr2:RELATED_TO]->(a)
-                SET nr2 += rel.props
-            )
-            WITH a, b
-            DETACH DELETE b
-            """
-            try:
-                client.execute_query(merge_q, {"aid": aid, "bid": bid})
-                logger.info(f"Merged duplicate: '{pair['bname']}' → '{pair['aname']}'")
-            except Exception as e:
-                logger.warning(f"Could not merge {aid} ↔ {bid}: {e}")
+        from app.services.entity_merge import entity_merge_job
+        return entity_merge_job.run(full=full)
 
 
 # ── Singleton ─────────────────────────────────────────────────────────────────
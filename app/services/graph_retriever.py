@@ -1,22 +1,48 @@
+import functools
 import re
+import threading
 import time
 from typing import TypedDict, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_neo4j import Neo4jGraph
+from neo4j.exceptions import ClientError
+from pydantic import BaseModel, Field
 from app.core.config import settings
+from app.db.schema import ALIAS_LABEL
 from app.services.graph_extractor import NodeType, RelationType
 from app.services.llm_service import GroqClient
 from app.services.graph_extractor import ExtractionResult, GraphExtractorService
-from app.db.neo4j_client import Neo4jClient
+from app.db.neo4j_client import AsyncNeo4jClient, Neo4jClient
+from app.db.query_cache import acached_query, cached_query, graph_version
+from app.db.schema import ENTITY_LABELS, FULLTEXT_INDEX
+from app.db.vector_store import get_vector_store
+from app.services import query_router
+from app.services.chunker import get_token_counter
+from app.services.context_encoder import encode_context
+from app.services.cypher_guard import get_cypher_guard
+from app.services.cypher_params import get_shape_stats, parameterize
 from app.core.logging import get_logger, setup_logging
 
 setup_logging()
 logger = get_logger(__name__)
 
+def _fulltext_unavailable(exc: ClientError) -> bool:
+    """The full-text procedure failed (index missing / not online), not the query."""
+    return "Procedure" in (exc.code or "") or "Index" in (exc.code or "")
+
+
 # ── Schema cache (refresh every 5 minutes) ────────────────────────────────────
 _SCHEMA_CACHE: dict = {}
 _SCHEMA_TTL   = 300   # seconds
 
+_LABELS_QUERY    = "CALL db.labels() YIELD label RETURN label"
+_REL_TYPES_QUERY = "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+_DEFAULT_SCHEMA  = {
+    "labels":    ["Person", "Company", "Address", "Document"],
+    "rel_types": ["DIRECTOR_OF", "WORKS_AT", "OWNS_SHARE", "TRANSFERRED_TO",
+                  "REGISTERED_AT", "LIVES_AT", "FAMILY_OF", "MARRIED_TO",
+                  "USES_EMAIL", "BENEFICIAL_OWNER_OF", "MENTIONED_IN"],
+}
+
 # 1. Definisi State agar data mengalir dengan konsisten
 class AgentState(TypedDict):
     question: str
@@ -25,57 +51,94 @@ class AgentState(TypedDict):
     answer: Optional[str]
     query_decomposition : str
     query_advice : str
+    linked_entities : Optional[list]
+    route : Optional[str]
+    cypher_params : Optional[dict]
+    planning_mode : Optional[str]
+    row_count : Optional[int]
+    cypher_guard : Optional[dict]
+
+# Planning modes: "two_step" = planning → write_query (two LLM calls),
+# "single" = plan_and_write (one structured-output call)
+PLANNING_MODES = ("two_step", "single")
+
+
+def resolve_planning_mode(depth: str, requested: Optional[str] = None) -> str:
+    """The request's own mode if valid, else the configured mode for its depth."""
+    if requested in PLANNING_MODES:
+        return requested
+    mode = settings.PLANNING_MODE_DEEP if depth == "deep" else settings.PLANNING_MODE_BASIC
+    return mode if mode in PLANNING_MODES else "two_step"
+
+
+class PlannedQuery(BaseModel):
+    plan:   str = Field(..., description="Rencana pencarian singkat: entitas, relasi, kedalaman path.")
+    cypher: str = Field(..., description="Satu query Cypher murni yang menjalankan rencana, tanpa markdown.")
+
 
 class GraphRetrieverService:
     def __init__(self):
-        # Lazy Neo4j connection — don't crash app startup if AuraDB is paused
-        self._graph: Optional[Neo4jGraph] = None
+        # Sessions from the shared, lazily-connected driver pool — app startup
+        # doesn't fail if AuraDB is paused. Both apply the per-call-site
+        # timeouts / row caps (app/db/query_limits.py).
+        self.async_client = AsyncNeo4jClient()     # async investigation path
+        self.sync_client  = Neo4jClient()          # sync path, graph view, stats
 
         # LLM untuk generate Cypher
         groq_client = GroqClient()
         self.llm = groq_client.get_llm()
+        self._planner = None     # structured-output LLM for the single-call mode
+        model_name = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "unknown")
+        self._token_counter = get_token_counter(model_name)     # graph_context budget
 
-    @property
-    def graph(self) -> Neo4jGraph:
-        """Connect on first use so the app starts even if Neo4j is temporarily down."""
-        if self._graph is None:
-            logger.info("Connecting to Neo4j AuraDB...")
-            self._graph = Neo4jGraph(
-                url=settings.NEO4J_URI,
-                username=settings.NEO4J_USERNAME,
-                password=settings.NEO4J_PASSWORD,
-                database=settings.NEO4J_DATABASE,
-            )
-            logger.info("Neo4j connected successfully.")
-        return self._graph
+        # Latency of the LLM planning path per mode, for comparing the two
+        self._planning_stats = {m: {"calls": 0, "seconds": 0.0, "fallbacks": 0} for m in PLANNING_MODES}
+
+        # Fallback search: graph snapshot per graph version, and its use
+        self._snapshot: tuple = (-1, 0.0, [])       # (graph version, built at, rows)
+        self._snapshot_lock = threading.Lock()
+        self._fallback_stats = {"calls": 0, "snapshot_builds": 0, "snapshot_hits": 0}
+
+    def _query(self, query: str, params: Optional[dict] = None, site: str = "investigation") -> list:
+        """Read query through the graph-versioned result cache (app/db/query_cache.py)."""
+        return cached_query(functools.partial(self.sync_client.query, site=site), query, params)
+
+    async def _aquery(self, query: str, params: Optional[dict] = None, site: str = "investigation") -> list:
+        """Async _query over the async Neo4j driver, same cache."""
+        return await acached_query(functools.partial(self.async_client.query, site=site), query, params)
 
     def _get_live_schema(self) -> dict:
         """Query actual labels and rel types from Neo4j — cached for 5 minutes."""
-        global _SCHEMA_CACHE
-        now = time.time()
-
-        if _SCHEMA_CACHE.get("ts", 0) + _SCHEMA_TTL > now:
+        if _SCHEMA_CACHE.get("ts", 0) + _SCHEMA_TTL > time.time():
             return _SCHEMA_CACHE["data"]
+        try:
+            labels    = self.sync_client.query(_LABELS_QUERY)
+            rel_types = self.sync_client.query(_REL_TYPES_QUERY)
+        except Exception:
+            labels = rel_types = []
+        return self._store_schema(labels, rel_types)
 
-        _DEFAULT = {
-            "labels":    ["Person", "Company", "Address", "Document"],
-            "rel_types": ["DIRECTOR_OF", "WORKS_AT", "OWNS_SHARE", "TRANSFERRED_TO",
-                          "REGISTERED_AT", "LIVES_AT", "FAMILY_OF", "MARRIED_TO",
-                          "USES_EMAIL", "BENEFICIAL_OWNER_OF", "MENTIONED_IN"],
-        }
+    async def _aget_live_schema(self) -> dict:
+        """Async _get_live_schema; warms the cache the prompt builders read."""
+        if _SCHEMA_CACHE.get("ts", 0) + _SCHEMA_TTL > time.time():
+            return _SCHEMA_CACHE["data"]
         try:
-            labels    = [r["label"] for r in
-                         self.graph.query("CALL db.labels() YIELD label RETURN label")]
-            rel_types = [r["relationshipType"] for r in
-                         self.graph.query("CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType")]
-            data = {
-                "labels":    labels    or _DEFAULT["labels"],
-                "rel_types": rel_types or _DEFAULT["rel_types"],
-            }
+            labels    = await self.async_client.query(_LABELS_QUERY)
+            rel_types = await self.async_client.query(_REL_TYPES_QUERY)
         except Exception:
-            data = _DEFAULT
+            labels = rel_types = []
+        return self._store_schema(labels, rel_types)
 
-        _SCHEMA_CACHE = {"ts": now, "data": data}
+    @staticmethod
+    def _store_schema(label_rows: list, rel_rows: list) -> dict:
+        global _SCHEMA_CACHE
+        labels    = [r["label"] for r in label_rows if r["label"] != ALIAS_LABEL]
+        rel_types = [r["relationshipType"] for r in rel_rows]
+        data = {
+            "labels":    labels    or _DEFAULT_SCHEMA["labels"],
+            "rel_types": rel_types or _DEFAULT_SCHEMA["rel_types"],
+        }
+        _SCHEMA_CACHE = {"ts": time.time(), "data": data}
         logger.info(f"Schema refreshed: {len(data['labels'])} labels, {len(data['rel_types'])} rel types")
         return data
 
@@ -197,63 +260,221 @@ class GraphRetrieverService:
         - Output harus mudah dimengerti oleh agent Cypher writer
         """
         
-    def generate_cypher(self, state: AgentState):
+    def link_entities(self, state: AgentState):
+        """Resolve entity names in the question to node ids via the vector store."""
+        store = get_vector_store()
+        if store is None:
+            return {**state, "linked_entities": []}
+        try:
+            linked = store.link(state.get("question", ""))
+        except Exception as exc:
+            logger.warning(f"Entity linking failed: {exc}")
+            linked = []
+        if linked:
+            logger.info(
+                "🔗 Linked entities: "
+                + ", ".join(f"{e['label']}:{e['name']} ({e['score']})" for e in linked)
+            )
+        return {**state, "linked_entities": linked}
+
+    def route_question(self, state: AgentState):
+        """
+        Fast path (app/services/query_router.py): a recognised intent about one
+        linked entity gets a vetted Cypher template, skipping planning and
+        write_query. Leaves `route` empty when the LLM path must be taken.
+        """
+        if not settings.ROUTER_ENABLED or state.get("query_advice"):
+            return {**state, "route": None}
+        match = query_router.route(state.get("question", ""), state.get("linked_entities"))
+        if match is None:
+            logger.info("🧭 Router: no template — LLM planning path")
+            return {**state, "route": None}
+        logger.info(
+            f"🧭 Router: intent={match.intent.name} entity={match.entity['label']}:"
+            f"{match.entity['name']} ({match.entity['score']}) — skipping planning + write_query"
+        )
+        return {
+            **state,
+            "route":               match.intent.name,
+            "cypher_query":        match.cypher.strip(),
+            "cypher_params":       match.params,
+            "query_decomposition": (
+                f"[fast path] intent={match.intent.name} | "
+                f"{match.entity['label']} \"{match.entity['name']}\" (id={match.entity['id']})"
+            ),
+        }
+
+    @staticmethod
+    def _linked_block(linked: Optional[list]) -> str:
+        if not linked:
+            return ""
+        lines = "\n".join(
+            f'- {e["label"]} "{e["name"]}" → MATCH (n:{e["label"]} {{id: "{e["id"]}"}})'
+            for e in linked
+        )
+        return (
+            "\n\nENTITAS TERVERIFIKASI (hasil entity linking, gunakan id ini "
+            "alih-alih CONTAINS bila relevan):\n" + lines
+        )
+
+    def _cypher_messages(self, state: AgentState) -> list:
         from langchain_core.messages import SystemMessage, HumanMessage
-        
+
         system_content = self._get_system_prompt()
-        
-        messages = [
+        linked_block   = self._linked_block(state.get("linked_entities"))
+        return [
             SystemMessage(content=system_content),
-            HumanMessage(content=f"Pertanyaan: {state['query_decomposition']}")
+            HumanMessage(content=f"Pertanyaan: {state['query_decomposition']}{linked_block}")
         ]
-        
-        # Eksekusi model
-        response = self.llm.invoke(messages)
+
+    def _after_cypher(self, state: AgentState, response, t0: float) -> dict:
         logger.info(f"✅ LLM Menghasilkan Response")
-        
-        
+        self._record_planning("two_step", time.perf_counter() - t0)
+
+        clean_query = self._clean_cypher(response.content)
+        logger.info(f"🔍 Generated Cypher query: {clean_query}") # Debugging
+
+        return {**state, "cypher_query": clean_query}
+
+    def generate_cypher(self, state: AgentState):
+        messages = self._cypher_messages(state)
+        t0 = time.perf_counter()
+        return self._after_cypher(state, self.llm.invoke(messages), t0)
+
+    async def agenerate_cypher(self, state: AgentState):
+        await self._aget_live_schema()
+        messages = self._cypher_messages(state)
+        t0 = time.perf_counter()
+        return self._after_cypher(state, await self.llm.ainvoke(messages), t0)
+
+    @staticmethod
+    def _clean_cypher(text: str) -> str:
         # Pembersihan teks tambahan jika LLM tetap bandel memberikan markdown
-        clean_query = response.content.strip()
+        clean_query = text.strip()
         if "```" in clean_query:
             clean_query = clean_query.split("```")[1]
             if clean_query.startswith("cypher"):
                 clean_query = clean_query[6:]
-        
-        clean_query = clean_query.strip()
-        logger.info(f"🔍 Generated Cypher query: {clean_query}") # Debugging
-        
-        return {**state, "cypher_query": clean_query}
+        return clean_query.strip()
 
-    def query_decomposition(self, state: AgentState):
+    def _plan_messages(self, state: AgentState) -> list:
         from langchain_core.messages import SystemMessage, HumanMessage
 
-        system_content = self._get_query_decomposition(state)
+        saran       = state.get("query_advice", "")
+        saran_block = f"\nSARAN TAMBAHAN DARI USER:\n{saran}\n" if saran else ""
+        system_content = self._get_system_prompt() + f"""
+        ═══ MODE RENCANA + QUERY ═══
+        Isi dua field:
+        - plan  : rencana pencarian singkat (entitas yang dicari, relasi relevan,
+                  perlu path kepemilikan berlapis atau tidak, risiko nama duplikat)
+        - cypher: satu query Cypher yang menjalankan rencana tersebut
+        {saran_block}"""
+        return [
+            SystemMessage(content=system_content),
+            HumanMessage(
+                content=f"Pertanyaan: {state['question']}{self._linked_block(state.get('linked_entities'))}"
+            ),
+        ]
+
+    def _get_planner(self):
+        if self._planner is None:
+            self._planner = self.llm.with_structured_output(PlannedQuery)
+        return self._planner
 
-        messages = [
+    def _after_plan(self, state: AgentState, planned: PlannedQuery, t0: float) -> dict:
+        self._record_planning("single", time.perf_counter() - t0)
+        clean_query = self._clean_cypher(planned.cypher)
+        logger.info(f"✅ Plan + Cypher in one call ({time.perf_counter() - t0:.2f}s)")
+        logger.info(f"🔍 Generated Cypher query: {clean_query}")
+        return {**state, "query_decomposition": planned.plan.strip(), "cypher_query": clean_query}
+
+    def _plan_failed(self, exc: Exception) -> None:
+        logger.warning(f"Single-call planning failed ({exc}) — falling back to two-step")
+        self._planning_stats["single"]["fallbacks"] += 1
+
+    def plan_and_write(self, state: AgentState):
+        """
+        Single-call mode: one structured-output call returns both the plan
+        and the Cypher, replacing planning → write_query. Falls back to the
+        two-step path if the structured call fails.
+        """
+        messages = self._plan_messages(state)
+        t0 = time.perf_counter()
+        try:
+            planned = self._get_planner().invoke(messages)
+        except Exception as exc:
+            self._plan_failed(exc)
+            return self.generate_cypher(self.query_decomposition(state))
+        return self._after_plan(state, planned, t0)
+
+    async def aplan_and_write(self, state: AgentState):
+        await self._aget_live_schema()
+        messages = self._plan_messages(state)
+        t0 = time.perf_counter()
+        try:
+            planned = await self._get_planner().ainvoke(messages)
+        except Exception as exc:
+            self._plan_failed(exc)
+            return await self.agenerate_cypher(await self.aquery_decomposition(state))
+        return self._after_plan(state, planned, t0)
+
+    def _record_planning(self, mode: str, seconds: float) -> None:
+        stats = self._planning_stats[mode]
+        stats["calls"]   += 1
+        stats["seconds"] += seconds
+
+    def planning_stats(self) -> dict:
+        """
+        LLM seconds spent per planning mode. two_step counts the planning and
+        write_query calls together, once per question.
+        """
+        return {
+            mode: {
+                **s,
+                "seconds":     round(s["seconds"], 3),
+                "avg_seconds": round(s["seconds"] / s["calls"], 3) if s["calls"] else 0.0,
+            }
+            for mode, s in self._planning_stats.items()
+        }
+
+    def _decomposition_messages(self, state: AgentState) -> list:
+        from langchain_core.messages import SystemMessage, HumanMessage
+
+        system_content = self._get_query_decomposition(state)
+        return [
             SystemMessage(content=system_content),
             HumanMessage(content=f"Pertanyaan: {state['question']}")
         ]
-        
-        # Eksekusi model
-        response = self.llm.invoke(messages)
+
+    def _after_decomposition(self, state: AgentState, response, t0: float) -> dict:
         logger.info(f"✅ Decomposition Menghasilkan Response")
-        
+        self._planning_stats["two_step"]["seconds"] += time.perf_counter() - t0
+
         clean_query = response.content.strip()
-    
-        clean_query = clean_query.strip()
         logger.info(f"🔍 Generated Query: {clean_query}") # Debugging
-        
+
         return {**state, "query_decomposition": clean_query}
-    
-    def execute_query(self, state: AgentState):
-        """Execute the LLM-generated Cypher and store rich context."""
-        query = state.get("cypher_query", "").strip()
-        question = state.get("question", "")
 
+    def query_decomposition(self, state: AgentState):
+        messages = self._decomposition_messages(state)
+        t0 = time.perf_counter()
+        return self._after_decomposition(state, self.llm.invoke(messages), t0)
+
+    async def aquery_decomposition(self, state: AgentState):
+        await self._aget_live_schema()
+        messages = self._decomposition_messages(state)
+        t0 = time.perf_counter()
+        return self._after_decomposition(state, await self.llm.ainvoke(messages), t0)
+
+    def _prepare_query(self, state: AgentState) -> Optional[tuple]:
+        """(query, params) ready to run, or None when the Cypher is unusable."""
+        query = (state.get("cypher_query") or "").strip()
         if not query or query.lower().startswith("error"):
             logger.warning("Invalid or empty Cypher — using fallback query")
-            fallback = self._fallback_query(question)
-            return {**state, "graph_context": str(fallback) if fallback else "[]"}
+            return None
+        if (state.get("cypher_guard") or {}).get("action") == "reject":
+            logger.warning("Cypher rejected by the cost guard — using fallback query")
+            return None
 
         # Strip markdown fences if LLM still wraps them
         if "```" in query:
@@ -263,31 +484,131 @@ class GraphRetrieverService:
                 query = query[6:]
             query = query.strip()
 
-        # Auto-fix: if RETURN contains 'r.' but 'r' is not bound, strip those references
-        query = self._sanitize_cypher(query)
+        # Auto-fix: if RETURN contains 'r.' but 'r' is not bound, strip those references.
+        # Only raw LLM Cypher (cypher_params None) is sanitised: router templates
+        # are vetted, and guard_query hands on its sanitised + parameterised text
+        # with a dict — possibly empty — that must run exactly as guarded.
+        params = state.get("cypher_params")
+        if params is None:
+            query = self._sanitize_cypher(query)
+        return query, params
+
+    @staticmethod
+    def _parameterize(prepared: tuple) -> tuple:
+        """LLM Cypher with its literals lifted into parameters (app/services/cypher_params.py)."""
+        query, params = prepared
+        stats = get_shape_stats()
+        if stats is None or params is not None:     # prepared already (router template)
+            return prepared
+        result = parameterize(query)
+        reused = stats.record(query, result)
+        logger.info(
+            f"🧩 Cypher parameterised: {result.lifted} literals, {result.renamed} variables "
+            f"— {'known shape' if reused else 'new shape'}"
+        )
+        return result.text, result.params
+
+    def guard_query(self, state: AgentState):
+        """
+        Auto-parameterisation, then the cost guard (app/services/cypher_guard.py)
+        between the LLM Cypher and run_query: bounds / LIMIT are applied, then
+        EXPLAIN decides whether the query runs or the fallback path is taken.
+        """
+        prepared = self._prepare_query(state)
+        if prepared is None:
+            return {**state, "cypher_guard": None}
+        query, params = self._parameterize(prepared)
+        verdict = None
+        guard   = get_cypher_guard()
+        if guard is not None:
+            query, verdict = guard.check(query, params, self.sync_client.explain)
+        return {
+            **state,
+            "cypher_query":  query,
+            "cypher_params": params or {},     # {} = prepared, never re-sanitised
+            "cypher_guard":  verdict.to_dict() if verdict else None,
+        }
+
+    async def aguard_query(self, state: AgentState):
+        """guard_query with EXPLAIN over the async Neo4j driver."""
+        prepared = self._prepare_query(state)
+        if prepared is None:
+            return {**state, "cypher_guard": None}
+        query, params = self._parameterize(prepared)
+        verdict = None
+        guard   = get_cypher_guard()
+        if guard is not None:
+            query, verdict = await guard.acheck(query, params, self.async_client.explain)
+        return {
+            **state,
+            "cypher_query":  query,
+            "cypher_params": params or {},     # {} = prepared, never re-sanitised
+            "cypher_guard":  verdict.to_dict() if verdict else None,
+        }
+
+    def _with_context(self, state: AgentState, rows: Optional[list]) -> AgentState:
+        """State with the query rows encoded as the answer context (see context_encoder)."""
+        rows = rows or []
+        if rows and settings.GRAPH_CONTEXT_COMPACT:
+            encoded = encode_context(rows, state.get("question", ""), self._token_counter)
+            context = encoded.text
+            logger.info(
+                f"🗜️ Context: {encoded.rows_kept}/{encoded.rows_in} rows, {encoded.entities} entities "
+                f"→ {encoded.tokens} tokens ({len(context)} chars vs {len(str(rows))} as repr)"
+            )
+        else:
+            context = str(rows) if rows else "[]"
+        return {**state, "graph_context": context, "row_count": len(rows)}
+
+    def execute_query(self, state: AgentState):
+        """Execute the LLM-generated Cypher and store rich context."""
+        question = state.get("question", "")
+        linked   = state.get("linked_entities")
+        prepared = self._prepare_query(state)
+        if prepared is None:
+            fallback = self._fallback_query(question, linked)
+            return self._with_context(state, fallback)
+        query, params = prepared
 
         try:
-            results = self.graph.query(query)
+            results = self._query(query, params)
             logger.info(f"Query returned {len(results)} rows")
+            if results:
+                return self._with_context(state, results)
+            # Fallback: broad search using name fragments from question
+            logger.info("No results — trying fallback broad search")
+        except Exception as e:
+            # On any Cypher error: use fallback broad search, never expose error to LLM
+            logger.error(f"Query execution error: {e} | Query: {query[:200]}")
 
-            if not results:
-                # Fallback: broad search using name fragments from question
-                logger.info("No results — trying fallback broad search")
-                fallback = self._fallback_query(question)
-                if fallback:
-                    logger.info(f"Fallback returned {len(fallback)} rows")
-                    return {**state, "graph_context": str(fallback)}
+        fallback = self._fallback_query(question, linked)
+        if fallback:
+            logger.info(f"Fallback returned {len(fallback)} rows")
+        return self._with_context(state, fallback)
 
-            return {**state, "graph_context": str(results) if results else "[]"}
+    async def aexecute_query(self, state: AgentState):
+        """execute_query over the async Neo4j driver."""
+        question = state.get("question", "")
+        linked   = state.get("linked_entities")
+        prepared = self._prepare_query(state)
+        if prepared is None:
+            fallback = await self._afallback_query(question, linked)
+            return self._with_context(state, fallback)
+        query, params = prepared
 
+        try:
+            results = await self._aquery(query, params)
+            logger.info(f"Query returned {len(results)} rows")
+            if results:
+                return self._with_context(state, results)
+            logger.info("No results — trying fallback broad search")
         except Exception as e:
             logger.error(f"Query execution error: {e} | Query: {query[:200]}")
-            # On any Cypher error: use fallback broad search, never expose error to LLM
-            fallback = self._fallback_query(question)
-            if fallback:
-                logger.info(f"Error fallback returned {len(fallback)} rows")
-                return {**state, "graph_context": str(fallback)}
-            return {**state, "graph_context": "[]"}
+
+        fallback = await self._afallback_query(question, linked)
+        if fallback:
+            logger.info(f"Fallback returned {len(fallback)} rows")
+        return self._with_context(state, fallback)
 
     def _sanitize_cypher(self, query: str) -> str:
         """
@@ -365,52 +686,179 @@ class GraphRetrieverService:
     # Minimum number of rows from keyword search to be considered "useful context"
     _MIN_USEFUL_ROWS = 5
 
-    def _fallback_query(self, question: str) -> list:
+    # Keywords as Lucene terms against the name + context full-text index,
+    # ranked by score. The text never changes, so the server plans it once.
+    _Q_KEYWORDS = """
+        CALL db.index.fulltext.queryNodes($index, $terms) YIELD node AS n, score
+        WITH n, score ORDER BY score DESC LIMIT 20
+        OPTIONAL MATCH (n)-[r]->(m)
+        RETURN labels(n)[0] AS node_label, n.name AS entity, n.context AS context,
+               type(r) AS rel, r.details AS rel_details,
+               m.name AS connected, m.context AS connected_context
+        ORDER BY score DESC
+        LIMIT 50
         """
-        Broad MATCH fallback with two-tier strategy:
-        1. Keyword search on entity names (Title Case proper nouns preferred)
-        2. If keyword search found < _MIN_USEFUL_ROWS, ALWAYS supplement with all-nodes query
-           This handles questions where no entity name appears (e.g. "Di mana lokasi cangkang?")
+    # Same search without the index (NEO4J_SCHEMA_BOOTSTRAP off / index still building)
+    _Q_KEYWORDS_SCAN = """
+        MATCH (n) WHERE any(w IN $keywords WHERE toLower(n.name) CONTAINS w)
+        OPTIONAL MATCH (n)-[r]->(m)
+        RETURN labels(n)[0] AS node_label, n.name AS entity, n.context AS context,
+               type(r) AS rel, r.details AS rel_details,
+               m.name AS connected, m.context AS connected_context
+        LIMIT 50
         """
-        q_all = """
-        MATCH (n)
+
+    # Graph snapshot: the best-connected entities and their edges. Built once
+    # per graph version (query_cache.graph_version), not per question; like
+    # the query result cache it expires after QUERY_CACHE_TTL_S, which covers
+    # writers outside this process (entity merge CLI, other replicas).
+    _Q_SNAPSHOT = f"""
+        MATCH (n:{'|'.join(ENTITY_LABELS)})
         WHERE NOT (n.name IS NULL OR n.name = '')
+        WITH n, COUNT {{ (n)--() }} AS degree
+        ORDER BY degree DESC LIMIT 30
         OPTIONAL MATCH (n)-[r]->(m)
         RETURN labels(n)[0] AS node_label, n.name AS entity, n.context AS context,
                type(r) AS rel, r.details AS rel_details,
                m.name AS connected, m.context AS connected_context
-        ORDER BY node_label
+        ORDER BY degree DESC
         LIMIT 80
         """
 
+    @staticmethod
+    def _linked_statement(linked: Optional[list]) -> Optional[tuple]:
+        """Neighbourhood of linked entities, looked up by id per label (index-backed)."""
+        ids_by_label: dict = {}
+        for e in linked or []:
+            if e["label"] in ENTITY_LABELS:
+                ids_by_label.setdefault(e["label"], []).append(e["id"])
+        parts = [
+            f"""
+            MATCH (n:{label}) WHERE n.id IN $ids_{label}
+            OPTIONAL MATCH (n)-[r]->(m)
+            RETURN labels(n)[0] AS node_label, n.name AS entity, n.context AS context,
+                   type(r) AS rel, r.details AS rel_details,
+                   m.name AS connected, m.context AS connected_context
+            """
+            for label in ids_by_label
+        ]
+        if not parts:
+            return None
+        q = (
+            "CALL {" + "UNION ALL".join(parts) + "}\n"
+            "RETURN node_label, entity, context, rel, rel_details, connected, connected_context\n"
+            "LIMIT 50"
+        )
+        return q, {f"ids_{label}": ids for label, ids in ids_by_label.items()}
+
+    def _keywords(self, question: str) -> list[str]:
+        """Name fragments of the question, lower-cased, most entity-like first."""
+        raw_words = re.sub(r'[^\w\s]', '', question).split()
+
+        # 1st priority: Title Case words that are likely proper nouns / entity names
+        proper  = [w for w in raw_words
+                   if len(w) > 2 and w[0].isupper()
+                   and w.lower() not in self._STOP_WORDS]
+        # 2nd priority: long lowercase words not in stop list
+        general = [w for w in raw_words
+                   if len(w) > 5 and w.lower() not in self._STOP_WORDS
+                   and w not in proper]
+
+        return [w.lower() for w in (proper + general)[:5]]
+
+    @staticmethod
+    def _lucene_terms(keywords: list[str]) -> str:
+        """Exact term (boosted) or prefix per keyword — `nebula^2 OR nebula*`."""
+        return " OR ".join(f"{w}^2 OR {w}*" for w in keywords)
+
+    def _keyword_rows(self, keywords: list[str]) -> list:
+        """Full-text keyword search; a parameterised scan if the index is unusable."""
         try:
-            raw_words = re.sub(r'[^\w\s]', '', question).split()
-
-            # 1st priority: Title Case words that are likely proper nouns / entity names
-            proper  = [w for w in raw_words
-                       if len(w) > 2 and w[0].isupper()
-                       and w.lower() not in self._STOP_WORDS]
-            # 2nd priority: long lowercase words not in stop list
-            general = [w for w in raw_words
-                       if len(w) > 5 and w.lower() not in self._STOP_WORDS
-                       and w not in proper]
-
-            keywords = (proper + general)[:5]
-
+            return self._query(self._Q_KEYWORDS, {"index": FULLTEXT_INDEX, "terms": self._lucene_terms(keywords)})
+        except ClientError as exc:
+            if not _fulltext_unavailable(exc):
+                raise
+            logger.warning(f"⚠️ Full-text index {FULLTEXT_INDEX} unavailable ({exc}) — scanning names")
+            return self._query(self._Q_KEYWORDS_SCAN, {"keywords": keywords})
+
+    async def _akeyword_rows(self, keywords: list[str]) -> list:
+        """Async _keyword_rows."""
+        try:
+            return await self._aquery(self._Q_KEYWORDS, {"index": FULLTEXT_INDEX, "terms": self._lucene_terms(keywords)})
+        except ClientError as exc:
+            if not _fulltext_unavailable(exc):
+                raise
+            logger.warning(f"⚠️ Full-text index {FULLTEXT_INDEX} unavailable ({exc}) — scanning names")
+            return await self._aquery(self._Q_KEYWORDS_SCAN, {"keywords": keywords})
+
+    def _snapshot_cached(self) -> Optional[list]:
+        with self._snapshot_lock:
+            version, built_at, rows = self._snapshot
+            ttl_s = settings.QUERY_CACHE_TTL_S
+            if version == graph_version() and not (ttl_s and time.time() - built_at > ttl_s):
+                self._fallback_stats["snapshot_hits"] += 1
+                return rows
+        return None
+
+    def _snapshot_store(self, version: int, built_at: float, rows: list) -> list:
+        with self._snapshot_lock:
+            self._snapshot = (version, built_at, rows)
+            self._fallback_stats["snapshot_builds"] += 1
+        logger.info(f"📸 Graph snapshot rebuilt: {len(rows)} rows (graph version {version})")
+        return rows
+
+    def _graph_snapshot(self) -> list:
+        """Snapshot rows for the current graph version, built on first use."""
+        cached = self._snapshot_cached()
+        if cached is not None:
+            return cached
+        version, built_at = graph_version(), time.time()
+        return self._snapshot_store(version, built_at, self._query(self._Q_SNAPSHOT))
+
+    async def _agraph_snapshot(self) -> list:
+        """Async _graph_snapshot."""
+        cached = self._snapshot_cached()
+        if cached is not None:
+            return cached
+        version, built_at = graph_version(), time.time()
+        return self._snapshot_store(version, built_at, await self._aquery(self._Q_SNAPSHOT))
+
+    def fallback_stats(self) -> dict:
+        with self._snapshot_lock:
+            return {**self._fallback_stats, "snapshot_rows": len(self._snapshot[2])}
+
+    @staticmethod
+    def _merge_fallback(keyword_results: list, all_results: list) -> list:
+        """Keyword results first (more relevant), then broad context."""
+        seen = {r.get("entity") for r in keyword_results}
+        merged = list(keyword_results)
+        for row in all_results:
+            if row.get("entity") not in seen:
+                merged.append(row)
+                seen.add(row.get("entity"))
+        logger.info(f"Fallback merged result: {len(merged)} rows")
+        return merged
+
+    def _fallback_query(self, question: str, linked: Optional[list] = None) -> list:
+        """
+        Broad MATCH fallback with three-tier strategy:
+        0. Entities linked by the vector store, matched by id
+        1. Full-text keyword search on entity names + context (Title Case proper
+           nouns preferred), ranked by Lucene score
+        2. If keyword search found < _MIN_USEFUL_ROWS, ALWAYS supplement with the
+           cached graph snapshot (best-connected entities)
+           This handles questions where no entity name appears (e.g. "Di mana lokasi cangkang?")
+        """
+        try:
+            self._fallback_stats["calls"] += 1
             keyword_results = []
-            if keywords:
-                contains_clause = " OR ".join(
-                    f'toLower(n.name) CONTAINS toLower("{w}")' for w in keywords
-                )
-                q_kw = f"""
-                MATCH (n) WHERE {contains_clause}
-                OPTIONAL MATCH (n)-[r]->(m)
-                RETURN labels(n)[0] AS node_label, n.name AS entity, n.context AS context,
-                       type(r) AS rel, r.details AS rel_details,
-                       m.name AS connected, m.context AS connected_context
-                LIMIT 50
-                """
-                keyword_results = self.graph.query(q_kw)
+            linked_st = self._linked_statement(linked)
+            if linked_st:
+                keyword_results = self._query(*linked_st)
+                logger.info(f"Fallback linked-entity search found {len(keyword_results)} rows")
+            keywords = self._keywords(question)
+            if keywords and len(keyword_results) < self._MIN_USEFUL_ROWS:
+                keyword_results += self._keyword_rows(keywords)
                 logger.info(f"Fallback keyword search found {len(keyword_results)} rows for: {keywords}")
 
             # If keyword search gave useful results, return them
@@ -423,18 +871,34 @@ class GraphRetrieverService:
                 f"Fallback: {'keyword rows < threshold' if keyword_results else 'no keywords matched'}"
                 " — returning full graph snapshot"
             )
-            all_results = self.graph.query(q_all)
+            return self._merge_fallback(keyword_results, self._graph_snapshot())
 
-            # Merge: put keyword results first (more relevant), then broad context
-            seen = {r.get("entity") for r in keyword_results}
-            merged = list(keyword_results)
-            for row in all_results:
-                if row.get("entity") not in seen:
-                    merged.append(row)
-                    seen.add(row.get("entity"))
+        except Exception as exc:
+            logger.error(f"Fallback query error: {exc}")
+            return []
+
+    async def _afallback_query(self, question: str, linked: Optional[list] = None) -> list:
+        """_fallback_query over the async Neo4j driver."""
+        try:
+            self._fallback_stats["calls"] += 1
+            keyword_results = []
+            linked_st = self._linked_statement(linked)
+            if linked_st:
+                keyword_results = await self._aquery(*linked_st)
+                logger.info(f"Fallback linked-entity search found {len(keyword_results)} rows")
+            keywords = self._keywords(question)
+            if keywords and len(keyword_results) < self._MIN_USEFUL_ROWS:
+                keyword_results += await self._akeyword_rows(keywords)
+                logger.info(f"Fallback keyword search found {len(keyword_results)} rows for: {keywords}")
 
-            logger.info(f"Fallback merged result: {len(merged)} rows")
-            return merged
+            if len(keyword_results) >= self._MIN_USEFUL_ROWS:
+                return keyword_results
+
+            logger.info(
+                f"Fallback: {'keyword rows < threshold' if keyword_results else 'no keywords matched'}"
+                " — returning full graph snapshot"
+            )
+            return self._merge_fallback(keyword_results, await self._agraph_snapshot())
 
         except Exception as exc:
             logger.error(f"Fallback query error: {exc}")
@@ -463,7 +927,7 @@ class GraphRetrieverService:
             else:
                 return "generate"
             
-    def generate_answer(self, state: AgentState):
+    def _answer_chain(self):
         from app.services.llm_service import B2B_SYSTEM_PROMPT
 
         SYSTEM_PROMPT = (
@@ -488,10 +952,19 @@ PANDUAN LAPORAN:
             ("human", "Pertanyaan Investigasi: {question}\n\nData dari Knowledge Graph:\n{context}")
         ])
 
-        chain  = prompt | self.llm
+        return prompt | self.llm
+
+    def generate_answer(self, state: AgentState):
+        chain    = self._answer_chain()
         response = chain.invoke({"question": state["question"], "context": state.get("graph_context", "[]")})
         logger.info("Final investigation answer generated")
         return {**state, "answer": response.content}
+
+    async def agenerate_answer(self, state: AgentState):
+        chain    = self._answer_chain()
+        response = await chain.ainvoke({"question": state["question"], "context": state.get("graph_context", "[]")})
+        logger.info("Final investigation answer generated")
+        return {**state, "answer": response.content}
     
      ## HUMAN IN THE LOOP
      
@@ -541,9 +1014,10 @@ PANDUAN LAPORAN:
         try:
             # ── Node query — generic, works with any labels ──────────────
             if entity_filter:
-                node_query = """
+                node_query = f"""
                 MATCH (n)
-                WHERE any(prop IN keys(n) WHERE toString(n[prop]) CONTAINS $filter)
+                WHERE NOT n:{ALIAS_LABEL}
+                  AND any(prop IN keys(n) WHERE toString(n[prop]) CONTAINS $filter)
                 WITH n
                 OPTIONAL MATCH (n)-[*1..2]-(connected)
                 WITH COLLECT(DISTINCT n) + COLLECT(DISTINCT connected) AS all_nodes
@@ -557,8 +1031,9 @@ PANDUAN LAPORAN:
                 """
                 params = {"filter": entity_filter}
             else:
-                node_query = """
+                node_query = f"""
                 MATCH (n)
+                WHERE NOT n:{ALIAS_LABEL}
                 RETURN
                     coalesce(n.id, elementId(n))                 AS id,
                     coalesce(n.name, n.id, elementId(n))         AS name,
@@ -568,7 +1043,7 @@ PANDUAN LAPORAN:
                 """
                 params = {}
 
-            node_rows = self.graph.query(node_query, params)
+            node_rows = self._query(node_query, params, site="visualization")
 
             # ── Edge query — generic ─────────────────────────────────────
             edge_query = """
@@ -580,7 +1055,7 @@ PANDUAN LAPORAN:
                 coalesce(m.id, elementId(m)) AS target
             LIMIT 500
             """
-            edge_rows = self.graph.query(edge_query)
+            edge_rows = self._query(edge_query, site="visualization")
 
             # ── Build vis.js data ────────────────────────────────────────
             GROUP_COLORS = {
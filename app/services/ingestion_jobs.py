@@ -0,0 +1,204 @@
+"""
+FinAgent — Ingestion Job Queue
+Uploads are accepted immediately and extracted on a bounded worker pool,
+so one large PDF never blocks the event loop serving /api/result polling,
+webhooks and investigations.
+
+  POST /api/upload          → IngestionJobManager.submit()  (job id)
+  GET  /api/jobs/{job_id}   → IngestionJob.to_dict()        (progress)
+  DELETE /api/jobs/{job_id} → IngestionJobManager.cancel()
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Finished jobs kept in memory for status polling
+_MAX_FINISHED_JOBS = 200
+
+
+class JobCancelled(Exception):
+    """Raised inside the extraction pipeline once a job has been cancelled."""
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the queue-depth limit is reached."""
+
+
+class IngestionJob:
+    QUEUED    = "QUEUED"
+    RUNNING   = "RUNNING"
+    COMPLETE  = "COMPLETE"
+    FAILED    = "FAILED"
+    CANCELLED = "CANCELLED"
+
+    def __init__(self, filepath: str, filename: str):
+        self.id            = str(uuid.uuid4())
+        self.filepath      = filepath
+        self.filename      = filename
+        self.status        = self.QUEUED
+        self.error:        Optional[str] = None
+        self.created_at    = time.time()
+        self.started_at:   Optional[float] = None
+        self.finished_at:  Optional[float] = None
+        self.chunks:       list[str] = []     # per-chunk status, document order
+        self.nodes         = 0
+        self.relationships = 0
+        self._cancel       = threading.Event()
+        self._lock         = threading.Lock()
+        self._future:      Optional[Future] = None
+
+    # ── Progress hooks (called from the extractor) ───────────────────────
+
+    def set_chunks(self, count: int) -> None:
+        with self._lock:
+            self.chunks = ["pending"] * count
+
+    def add_chunk(self) -> int:
+        """Register one more chunk (documents are chunked lazily); returns its index."""
+        with self._lock:
+            self.chunks.append("pending")
+            return len(self.chunks) - 1
+
+    def chunk_update(self, index: int, status: str, nodes: int = 0, relationships: int = 0) -> None:
+        with self._lock:
+            if 0 <= index < len(self.chunks):
+                self.chunks[index] = status
+            self.nodes         += nodes
+            self.relationships += relationships
+
+    def set_counts(self, nodes: int, relationships: int) -> None:
+        with self._lock:
+            self.nodes, self.relationships = nodes, relationships
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.COMPLETE, self.FAILED, self.CANCELLED)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            chunks = list(self.chunks)
+        summary: dict = {}
+        for s in chunks:
+            summary[s] = summary.get(s, 0) + 1
+        return {
+            "job_id":        self.id,
+            "filename":      self.filename,
+            "status":        self.status,
+            "error":         self.error,
+            "chunks":        chunks,
+            "chunk_summary": summary,
+            "nodes":         self.nodes,
+            "relationships": self.relationships,
+            "elapsed_s":     round(self.elapsed, 2),
+            "created_at":    self.created_at,
+        }
+
+
+class IngestionJobManager:
+    def __init__(self, worker: Callable[[IngestionJob], bool], max_workers: int, max_queue: int):
+        """
+        worker      : runs one job to completion; returns True on success.
+        max_workers : extraction jobs running in parallel.
+        max_queue   : jobs allowed to be queued or running at once.
+        """
+        self._worker    = worker
+        self._max_queue = max_queue
+        self._pool      = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs:     "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock      = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if not j.finished)
+
+    def submit(self, filepath: str, filename: str) -> IngestionJob:
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.finished)
+            if active >= self._max_queue:
+                raise QueueFullError(f"Ingestion queue full ({active}/{self._max_queue})")
+            job = IngestionJob(filepath, filename)
+            self._jobs[job.id] = job
+            self._prune()
+            job._future = self._pool.submit(self._run, job)
+        logger.info(f"📥 Queued ingestion job {job.id} | file={filename} | depth={active + 1}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[IngestionJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            # Never started — finalise here, the worker won't run
+            job.status      = IngestionJob.CANCELLED
+            job.finished_at = time.time()
+        logger.info(f"🛑 Cancellation requested for job {job_id}")
+        return job
+
+    def _run(self, job: IngestionJob) -> None:
+        if job.cancelled:
+            # Cancelled after the future started but before any work
+            job.status      = IngestionJob.CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status     = IngestionJob.RUNNING
+        job.started_at = time.time()
+        logger.info(f"⚙️ Ingestion job {job.id} started | file={job.filename}")
+        try:
+            ok = self._worker(job)
+            if ok:
+                job.status = IngestionJob.COMPLETE
+            elif job.cancelled:
+                job.status = IngestionJob.CANCELLED
+            else:
+                job.status = IngestionJob.FAILED
+                job.error  = job.error or "Failed to extract text from document"
+        except JobCancelled:
+            job.status = IngestionJob.CANCELLED
+        except Exception as exc:
+            logger.error(f"❌ Ingestion job {job.id} crashed: {exc}", exc_info=True)
+            job.status = IngestionJob.FAILED
+            job.error  = str(exc)
+        finally:
+            job.finished_at = time.time()
+            logger.info(
+                f"Ingestion job {job.id} {job.status} | nodes={job.nodes} "
+                f"rels={job.relationships} | {job.elapsed:.1f}s"
+            )
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond _MAX_FINISHED_JOBS."""
+        finished = [jid for jid, j in self._jobs.items() if j.finished]
+        for jid in finished[: max(0, len(finished) - _MAX_FINISHED_JOBS)]:
+            del self._jobs[jid]
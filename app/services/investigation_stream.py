@@ -0,0 +1,148 @@
+"""
+FinAgent — Investigation Event Stream
+Turns a LangGraph run into server-sent events, so analysts see progress
+and the report as it is produced instead of after the whole run.
+
+  event: node    {node, status: "start" | "end", ...details}   per graph node
+  event: token   {text}                                          answer_user tokens
+  event: done    {status, answer, cypher_used, row_count, ...}   final summary
+  event: error   {message}
+
+    GET /api/investigate/stream          → a new investigation, streamed
+    GET /api/result/{session_id}/stream  → the paid resume of a session,
+                                           replayed from its event log
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+TERMINAL_EVENTS = ("done", "error")
+
+_MAX_LOGS = 200     # session event logs kept in memory
+
+
+def sse(event: str, data: dict) -> str:
+    """One server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _node_details(node: str, output: dict) -> dict:
+    """What the UI shows for a finished node — never the raw graph context."""
+    if not isinstance(output, dict):
+        return {}
+    if node == "payment_gatekeeper":
+        return {"blocked": bool(output.get("doku_link"))}
+    if node == "link_entities":
+        return {"entities": [e["name"] for e in output.get("linked_entities") or []]}
+    if node == "router":
+        return {"route": output.get("route")}
+    if node == "planning":
+        return {"query_decomposition": output.get("query_decomposition")}
+    if node in ("write_query", "plan_and_write"):
+        return {
+            "query_decomposition": output.get("query_decomposition"),
+            "cypher":              output.get("cypher_query"),
+        }
+    if node == "guard_query":
+        return {"cypher": output.get("cypher_query"), "guard": output.get("cypher_guard")}
+    if node == "run_query":
+        return {"cypher": output.get("cypher_query"), "row_count": output.get("row_count", 0)}
+    return {}
+
+
+async def stream_investigation(agent, inputs: dict) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Run the graph with astream_events and yield (event, data): node progress,
+    answer tokens, and finally ("result", final_state).
+    """
+    t0 = time.perf_counter()
+    async for ev in agent.astream_events(inputs, version="v2"):
+        kind = ev["event"]
+        node = ev.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream" and node == "answer_user":
+            text = getattr(ev["data"].get("chunk"), "content", "")
+            if text:
+                yield "token", {"text": text}
+
+        elif kind in ("on_chain_start", "on_chain_end") and node and ev["name"] == node \
+                and len(ev.get("parent_ids", [])) == 1:
+            if kind == "on_chain_start":
+                yield "node", {"node": node, "status": "start"}
+            else:
+                yield "node", {
+                    "node":      node,
+                    "status":    "end",
+                    "elapsed_s": round(time.perf_counter() - t0, 2),
+                    **_node_details(node, ev["data"].get("output")),
+                }
+
+        elif kind == "on_chain_end" and not ev.get("parent_ids"):
+            yield "result", ev["data"].get("output") or {}
+
+
+# ── Per-session event log (paid resume runs in the background) ──────────────
+
+class _EventLog:
+    def __init__(self):
+        self.events:  list[tuple[str, dict]] = []
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.events) and self.events[-1][0] in TERMINAL_EVENTS
+
+
+class SessionEventLogs:
+    """
+    Events of background investigations, kept per session so a client that
+    connects late (or reconnects) gets the full history, then live events.
+    Used from the event loop only.
+    """
+
+    def __init__(self, max_logs: int = _MAX_LOGS):
+        self.max_logs = max_logs
+        self._logs: "OrderedDict[str, _EventLog]" = OrderedDict()
+
+    def open(self, session_id: str) -> None:
+        """Start a fresh log for a new run of the session."""
+        self._logs[session_id] = _EventLog()
+        self._logs.move_to_end(session_id)
+        while len(self._logs) > self.max_logs:
+            self._logs.popitem(last=False)
+
+    def has(self, session_id: str) -> bool:
+        return session_id in self._logs
+
+    def publish(self, session_id: str, event: str, data: dict) -> None:
+        log = self._logs.get(session_id)
+        if log is None:
+            return
+        log.events.append((event, data))
+        log.changed.set()
+        log.changed = asyncio.Event()
+
+    async def follow(self, session_id: str) -> AsyncIterator[tuple[str, dict]]:
+        """Replay the session's events, then wait for new ones until done/error."""
+        log: Optional[_EventLog] = self._logs.get(session_id)
+        if log is None:
+            return
+        sent = 0
+        while True:
+            waiter = log.changed
+            while sent < len(log.events):
+                yield log.events[sent]
+                sent += 1
+            if log.finished:
+                return
+            await waiter.wait()
+
+
+session_event_logs = SessionEventLogs()
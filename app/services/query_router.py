@@ -0,0 +1,167 @@
+"""
+FinAgent — Fast-Path Query Router
+Answers the common question shapes without the two LLM hops (planning +
+write_query): a keyword rule picks the intent, entity linking
+(app/db/vector_store.py) picks the node, and a vetted, parameterised Cypher
+template fetches the data.
+
+  intent       triggers (id / en)                          entity labels
+  ─────────    ──────────────────────────────────────────  ──────────────────
+  directors    direktur, direksi, komisaris, director…     Company
+  owners       pemilik, pemegang saham, UBO, owner…        Company
+  address      alamat, domisili, terdaftar, registered…    Company, Person
+  money_flows  aliran dana, transfer, pinjaman, funds…     Company, Person, Entity
+  connections  hubungan, koneksi, jaringan, connections…   any
+
+A question is routed only when it is unambiguous: exactly one specific
+intent (or only `connections`), exactly one confidently linked entity of
+an accepted label, and no planning advice from the user. Everything else
+takes the LLM path unchanged.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.schema import ENTITY_LABELS
+
+logger = get_logger(__name__)
+
+# Questions longer than this are rarely one of the simple shapes
+_MAX_WORDS = 20
+
+
+@dataclass(frozen=True)
+class Intent:
+    name:    str
+    pattern: "re.Pattern"
+    labels:  tuple          # labels of the linked entity the template accepts
+    cypher:  str            # `{label}` is filled from ENTITY_LABELS; $id is a parameter
+
+
+def _words(*alternatives: str) -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+DIRECTORS = Intent(
+    name    = "directors",
+    pattern = _words(r"direktur\w*", "direksi", "dirut", r"komisaris\w*", "pengurus",
+                     r"directors?", r"commissioners?", "board", "management"),
+    labels  = ("Company",),
+    cypher  = """
+    MATCH (c:{label} {{id: $id}})
+    OPTIONAL MATCH (p)-[r:DIRECTOR_OF|COMMISSIONER_OF]->(c)
+    RETURN c.name AS company, c.context AS company_context,
+           p.name AS person, p.context AS person_context, p.role AS role,
+           type(r) AS position, r.details AS details
+    LIMIT 50
+    """,
+)
+
+OWNERS = Intent(
+    name    = "owners",
+    pattern = _words(r"pemilik\w*", "pemegang saham", "kepemilikan", "dimiliki", r"mengendalikan",
+                     "ubo", r"beneficial owners?", r"owners?", "owned", r"shareholders?", r"controls?"),
+    labels  = ("Company",),
+    cypher  = """
+    MATCH (c:{label} {{id: $id}})
+    OPTIONAL MATCH path = (o)-[:OWNS_SHARE|BENEFICIAL_OWNER_OF*1..3]->(c)
+    RETURN c.name AS company, c.context AS company_context,
+           o.name AS owner, labels(o)[0] AS owner_type, o.context AS owner_context,
+           [r IN relationships(path) | type(r) + ': ' + coalesce(r.details, '')] AS chain,
+           length(path) AS depth
+    ORDER BY depth
+    LIMIT 50
+    """,
+)
+
+ADDRESS = Intent(
+    name    = "address",
+    pattern = _words(r"alamat\w*", "domisili", r"lokasi\w*", "terdaftar", "berkantor", "berlokasi",
+                     "kantor pusat", "registered", r"address(?:es)?", "located", r"headquarter\w*"),
+    labels  = ("Company", "Person"),
+    cypher  = """
+    MATCH (n:{label} {{id: $id}})
+    OPTIONAL MATCH (n)-[r:REGISTERED_AT|LIVES_AT]->(a)
+    OPTIONAL MATCH (other)-[:REGISTERED_AT|LIVES_AT]->(a) WHERE other <> n
+    RETURN n.name AS entity, n.context AS context, type(r) AS rel,
+           a.name AS address, a.context AS address_detail,
+           collect(DISTINCT other.name)[..20] AS others_at_address
+    LIMIT 20
+    """,
+)
+
+MONEY_FLOWS = Intent(
+    name    = "money_flows",
+    pattern = _words("aliran dana", "aliran uang", r"transfer\w*", "transaksi", r"pinjam\w*", "utang",
+                     "hutang", "pembayaran", r"money", r"funds?", r"flows?", r"payments?", r"loans?"),
+    labels  = ("Company", "Person", "Entity"),
+    cypher  = """
+    MATCH (n:{label} {{id: $id}})
+    OPTIONAL MATCH (n)-[r:TRANSFERRED_TO|PAYS_DEBT_TO|LENDS_TO|BORROWS_FROM]-(x)
+    RETURN n.name AS entity,
+           CASE WHEN startNode(r) = n THEN 'out' ELSE 'in' END AS direction,
+           type(r) AS flow_type, r.details AS amount,
+           x.name AS counterparty, labels(x)[0] AS counterparty_type
+    LIMIT 50
+    """,
+)
+
+CONNECTIONS = Intent(
+    name    = "connections",
+    pattern = _words("hubungan", "koneksi", "terhubung", "relasi", "jaringan", r"terkait",
+                     r"connections?", "connected", "related", "network", "linked"),
+    labels  = ENTITY_LABELS,
+    cypher  = """
+    MATCH (n:{label} {{id: $id}})
+    OPTIONAL MATCH (n)-[r]-(x)
+    RETURN n.name AS entity, n.context AS context, labels(n)[0] AS type,
+           type(r) AS rel, CASE WHEN startNode(r) = n THEN 'out' ELSE 'in' END AS direction,
+           r.details AS rel_details, x.name AS connected, labels(x)[0] AS connected_type,
+           x.context AS connected_context
+    LIMIT 60
+    """,
+)
+
+SPECIFIC_INTENTS = (DIRECTORS, OWNERS, ADDRESS, MONEY_FLOWS)
+
+
+@dataclass(frozen=True)
+class Route:
+    intent: Intent
+    entity: dict            # linked entity {id, label, name, score, span}
+    cypher: str
+    params: dict
+
+
+def match_intent(question: str) -> Optional[Intent]:
+    """The single intent the question asks for, or None when none / several match."""
+    specific = [i for i in SPECIFIC_INTENTS if i.pattern.search(question)]
+    if len(specific) == 1:
+        return specific[0]
+    if not specific and CONNECTIONS.pattern.search(question):
+        return CONNECTIONS
+    return None
+
+
+def route(question: str, linked: Optional[list], min_score: Optional[float] = None) -> Optional[Route]:
+    """A template route for the question, or None to take the LLM path."""
+    min_score = settings.ROUTER_MIN_LINK_SCORE if min_score is None else min_score
+    if len(question.split()) > _MAX_WORDS:
+        return None
+    intent = match_intent(question)
+    if intent is None:
+        return None
+
+    confident = [e for e in (linked or []) if e["score"] >= min_score]
+    if len(confident) != 1 or confident[0]["label"] not in intent.labels:
+        return None
+    entity = confident[0]
+    return Route(
+        intent = intent,
+        entity = entity,
+        cypher = intent.cypher.format(label=entity["label"]),
+        params = {"id": entity["id"]},
+    )
@@ -1,5 +1,7 @@
+import asyncio
 import uuid
-from typing import TypedDict, Optional
+from typing import Callable, TypedDict, Optional
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from app.services.graph_retriever import retriever_service
@@ -27,6 +29,12 @@ class KYCAgentState(TypedDict):
     answer:              Optional[str]
     query_decomposition: Optional[str]
     query_advice:        Optional[str]
+    linked_entities:     Optional[list]   # [{id, label, name, score, span}] from the vector store
+    route:               Optional[str]    # fast-path intent chosen by the router, None = LLM path
+    cypher_params:       Optional[dict]   # router template / guarded LLM Cypher parameters; None = raw LLM Cypher
+    planning_mode:       Optional[str]    # "two_step" | "single" (see resolve_planning_mode)
+    row_count:           Optional[int]    # rows behind graph_context (set by run_query)
+    cypher_guard:        Optional[dict]   # EXPLAIN verdict on LLM Cypher {action, reasons, estimated_rows}
 
 
 # ============================================================
@@ -79,39 +87,77 @@ def _route_after_payment(state: KYCAgentState) -> str:
     return "PROCEED"
 
 
+def _route_after_router(state: KYCAgentState) -> str:
+    if state.get("route"):
+        return "TEMPLATE"
+    return "SINGLE" if state.get("planning_mode") == "single" else "LLM"
+
+
 # ============================================================
 # GRAPH BUILDER
 # ============================================================
 
+def _node(func: Callable, afunc: Optional[Callable] = None) -> RunnableLambda:
+    """
+    Node usable from both invoke() and ainvoke(). Without a native coroutine
+    the sync body runs in a worker thread, so it never blocks the event loop.
+    """
+    async def _in_thread(state):
+        return await asyncio.to_thread(func, state)
+
+    return RunnableLambda(func, afunc=afunc or _in_thread, name=func.__name__)
+
+
 def build_kyc_graph():
     """
-    KYC LangGraph:
+    KYC LangGraph (invoke() or ainvoke(); async nodes use the async LLM
+    and Neo4j clients, the rest run in worker threads):
 
       payment_gatekeeper
           ├─[BLOCKED]──► END           (returns doku_link)
-          └─[PROCEED]──► planning
-                            └── write_query
-                                  └── run_query
-                                        └── answer_user ──► END
+          └─[PROCEED]──► link_entities
+                            └── router
+                                  ├─[TEMPLATE]──► run_query   (vetted Cypher template)
+                                  ├─[SINGLE]──► plan_and_write ──► guard_query
+                                  └─[LLM]──► planning                   │
+                                               └── write_query ──► guard_query
+                                                                     └── run_query
+                                                                           └── answer_user ──► END
+
+    guard_query EXPLAINs the LLM Cypher; a rejected query makes run_query
+    take the fallback search.
     """
     workflow = StateGraph(KYCAgentState)
 
-    workflow.add_node("payment_gatekeeper", payment_gatekeeper)
-    workflow.add_node("planning",    retriever_service.query_decomposition)
-    workflow.add_node("write_query", retriever_service.generate_cypher)
-    workflow.add_node("run_query",   retriever_service.execute_query)
-    workflow.add_node("answer_user", retriever_service.generate_answer)
+    rs = retriever_service
+    workflow.add_node("payment_gatekeeper", _node(payment_gatekeeper))
+    workflow.add_node("link_entities",  _node(rs.link_entities))
+    workflow.add_node("router",         _node(rs.route_question))
+    workflow.add_node("planning",       _node(rs.query_decomposition, rs.aquery_decomposition))
+    workflow.add_node("plan_and_write", _node(rs.plan_and_write,      rs.aplan_and_write))
+    workflow.add_node("write_query",    _node(rs.generate_cypher,     rs.agenerate_cypher))
+    workflow.add_node("guard_query",    _node(rs.guard_query,         rs.aguard_query))
+    workflow.add_node("run_query",      _node(rs.execute_query,       rs.aexecute_query))
+    workflow.add_node("answer_user",    _node(rs.generate_answer,     rs.agenerate_answer))
 
     workflow.set_entry_point("payment_gatekeeper")
 
     workflow.add_conditional_edges(
         "payment_gatekeeper",
         _route_after_payment,
-        {"BLOCKED": END, "PROCEED": "planning"},
+        {"BLOCKED": END, "PROCEED": "link_entities"},
     )
 
+    workflow.add_edge("link_entities", "router")
+    workflow.add_conditional_edges(
+        "router",
+        _route_after_router,
+        {"TEMPLATE": "run_query", "SINGLE": "plan_and_write", "LLM": "planning"},
+    )
     workflow.add_edge("planning",    "write_query")
-    workflow.add_edge("write_query", "run_query")
+    workflow.add_edge("write_query", "guard_query")
+    workflow.add_edge("plan_and_write", "guard_query")
+    workflow.add_edge("guard_query", "run_query")
     workflow.add_edge("run_query",   "answer_user")
     workflow.add_edge("answer_user", END)
 
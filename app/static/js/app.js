@@ -421,20 +421,42 @@ async function uploadFile(file, context = 'dashboard') {
     const r    = await fetch('/api/upload', { method: 'POST', body: fd });
     const data = await r.json();
 
-    if (r.ok) {
-      if (statusEl) { statusEl.className = 'upload-status success'; statusEl.textContent = `✅ ${data.message}`; }
-      addProcessedFile(file.name);
-      showToast(`✅ ${file.name} ingested into Knowledge Graph!`, 'success');
-      setTimeout(() => { loadGraph(); loadGraphStats(); loadDocuments(); }, 1000);
-    } else {
-      throw new Error(data.detail || 'Upload failed');
-    }
+    if (!r.ok) throw new Error(data.detail || 'Upload failed');
+
+    const job = await pollIngestionJob(data.job_id, statusEl, file.name);
+    if (job.status !== 'COMPLETE') throw new Error(job.error || `Ingestion ${job.status.toLowerCase()}`);
+
+    const msg = `${file.name} ingested into Knowledge Graph! (${job.nodes} entities, ${job.relationships} relations)`;
+    if (statusEl) { statusEl.className = 'upload-status success'; statusEl.textContent = `✅ ${msg}`; }
+    addProcessedFile(file.name);
+    showToast(`✅ ${file.name} ingested into Knowledge Graph!`, 'success');
+    setTimeout(() => { loadGraph(); loadGraphStats(); loadDocuments(); }, 1000);
   } catch (e) {
     if (statusEl) { statusEl.className = 'upload-status error'; statusEl.textContent = `❌ ${e.message}`; }
     showToast(`❌ Upload failed: ${e.message}`, 'error');
   }
 }
 
+// Poll an ingestion job until it finishes, mirroring chunk progress into statusEl
+async function pollIngestionJob(jobId, statusEl, fileName) {
+  while (true) {
+    await new Promise(res => setTimeout(res, 2000));
+    const r   = await fetch(`/api/jobs/${jobId}`);
+    const job = await r.json();
+    if (!r.ok) throw new Error(job.detail || 'Job lookup failed');
+
+    if (['COMPLETE', 'FAILED', 'CANCELLED'].includes(job.status)) return job;
+
+    if (statusEl) {
+      const total = job.chunks.length;
+      const done  = job.chunks.filter(c => ['done', 'cached', 'failed'].includes(c)).length;
+      statusEl.textContent = job.status === 'QUEUED'
+        ? `⏳ ${fileName} queued…`
+        : `⏳ Processing ${fileName}… ${done}/${total || '?'} chunks · ${job.nodes} entities · ${Math.round(job.elapsed_s)}s`;
+    }
+  }
+}
+
 function addProcessedFile(name) {
   const container = document.getElementById('processed-files');
   const div = document.createElement('div');
@@ -479,6 +501,40 @@ async function submitQuestion() {
 
   const typingId = addTypingIndicator();
 
+  // Server-sent events when the browser has them; plain POST otherwise
+  // (and when the stream cannot be opened at all)
+  if (window.EventSource) {
+    const params = new URLSearchParams({ question, investigation_depth: depth });
+    let streaming = null;
+    openInvestigationStream(`/api/investigate/stream?${params}`, {
+      onToken(text) {
+        if (!streaming) { removeTypingIndicator(typingId); streaming = addStreamingMessage(); }
+        streaming.append(text);
+      },
+      onDone(data) {
+        removeTypingIndicator(typingId);
+        showInvestigationResult(question, data, streaming);
+      },
+      onPaymentRequired(data) {
+        removeTypingIndicator(typingId);
+        showInvestigationResult(question, data, streaming);
+      },
+      onError(message) {
+        removeTypingIndicator(typingId);
+        streaming?.discard();
+        addMessage('assistant', `❌ Error: ${message || 'Unexpected response'}`);
+      },
+      onUnavailable() {
+        streaming?.discard();
+        submitQuestionFetch(question, depth, typingId);
+      },
+    });
+    return;
+  }
+  submitQuestionFetch(question, depth, typingId);
+}
+
+async function submitQuestionFetch(question, depth, typingId) {
   try {
     const r = await fetch('/api/investigate', {
       method:  'POST',
@@ -492,34 +548,7 @@ async function submitQuestion() {
 
     const data = await r.json();
     removeTypingIndicator(typingId);
-
-    if (data.status === 'PAYMENT_REQUIRED') {
-      // ── Payment wall ──────────────────────────────────────
-      setPipelineStep('payment_gatekeeper', 'blocked');
-      _pendingSessionId = data.session_id;
-      _pendingQuestion  = question;
-      _pendingDokuLink  = data.doku_link;
-      _pendingInvoice   = data.invoice_number;
-      // Persist so page refresh / server reload doesn't lose session
-      localStorage.setItem('_pendingSessionId', data.session_id);
-      localStorage.setItem('_pendingQuestion',  question);
-      openPaywall(data.session_id, data.doku_link, data.invoice_number);
-      addMessage('assistant',
-        '🔒 **Deep Investigation is a Premium Feature**\n\n' +
-        'Full entity-relationship mapping requires a one-time payment of **Rp 50.000** via DOKU. ' +
-        'Complete the payment in the popup to unlock your analysis.'
-      );
-
-    } else if (data.status === 'SUCCESS') {
-      // ── All nodes done ────────────────────────────────────
-      setPipelineStep('payment_gatekeeper', 'done');
-      ['planning', 'write_query', 'run_query', 'answer_user'].forEach(n => setPipelineStep(n, 'done'));
-      addMessage('assistant', data.answer);
-      setTimeout(() => { loadGraph(); loadGraphStats(); }, 800);
-
-    } else {
-      addMessage('assistant', `❌ Error: ${data.message || 'Unexpected response'}`);
-    }
+    showInvestigationResult(question, data, null);
 
   } catch (e) {
     removeTypingIndicator(typingId);
@@ -527,6 +556,141 @@ async function submitQuestion() {
   }
 }
 
+// Render the outcome of /api/investigate (or the stream's final event);
+// `streaming` is the bubble answer tokens were streamed into, if any
+function showInvestigationResult(question, data, streaming) {
+  if (data.status === 'PAYMENT_REQUIRED') {
+    // ── Payment wall ──────────────────────────────────────
+    setPipelineStep('payment_gatekeeper', 'blocked');
+    _pendingSessionId = data.session_id;
+    _pendingQuestion  = question;
+    _pendingDokuLink  = data.doku_link;
+    _pendingInvoice   = data.invoice_number;
+    // Persist so page refresh / server reload doesn't lose session
+    localStorage.setItem('_pendingSessionId', data.session_id);
+    localStorage.setItem('_pendingQuestion',  question);
+    openPaywall(data.session_id, data.doku_link, data.invoice_number);
+    addMessage('assistant',
+      '🔒 **Deep Investigation is a Premium Feature**\n\n' +
+      'Full entity-relationship mapping requires a one-time payment of **Rp 50.000** via DOKU. ' +
+      'Complete the payment in the popup to unlock your analysis.'
+    );
+
+  } else if (data.status === 'SUCCESS') {
+    // ── All nodes done ────────────────────────────────────
+    setPipelineStep('payment_gatekeeper', 'done');
+    ['planning', 'write_query', 'run_query', 'answer_user'].forEach(n => setPipelineStep(n,
+      data.cached || (data.route && (n === 'planning' || n === 'write_query')) ? 'skipped' : 'done'));
+    const content = data.cached ? `⚡ *${data.message}*\n\n${data.answer}` : data.answer;
+    if (streaming) streaming.finish(content);
+    else addMessage('assistant', content);
+    setTimeout(() => { loadGraph(); loadGraphStats(); }, 800);
+
+  } else {
+    streaming?.discard();
+    addMessage('assistant', `❌ Error: ${data.message || 'Unexpected response'}`);
+  }
+}
+
+// ════════════════════════════════════════════════════════════
+// INVESTIGATION STREAM (server-sent events)
+// ════════════════════════════════════════════════════════════
+// Graph node → pipeline step it lights up
+const _STREAM_STEPS = {
+  payment_gatekeeper: 'payment_gatekeeper',
+  planning:           'planning',
+  write_query:        'write_query',
+  plan_and_write:     'write_query',
+  run_query:          'run_query',
+  answer_user:        'answer_user',
+};
+
+/*
+ * Follow an investigation event stream. Handlers: onNode(ev), onToken(text),
+ * onDone(data), onPaymentRequired(data), onError(message), onUnavailable().
+ * onUnavailable fires when the stream dies before a final event (or the
+ * server has nothing to stream) — callers fall back to the plain endpoints.
+ */
+function openInvestigationStream(url, handlers) {
+  const es = new EventSource(url);
+  let finished = false;
+  const finish = () => { finished = true; es.close(); };
+  const parse  = e => { try { return JSON.parse(e.data); } catch { return {}; } };
+
+  es.addEventListener('node', e => {
+    const ev = parse(e);
+    applyNodeEvent(ev);
+    applyGuardEvent(ev);
+    handlers.onNode?.(ev);
+  });
+  es.addEventListener('token', e => handlers.onToken?.(parse(e).text || ''));
+  es.addEventListener('done', e => { finish(); handlers.onDone?.(parse(e)); });
+  es.addEventListener('payment_required', e => { finish(); handlers.onPaymentRequired?.(parse(e)); });
+  es.addEventListener('pending', () => { finish(); handlers.onUnavailable?.(); });
+  // Named `error` events carry data; a bare error is the connection failing
+  es.addEventListener('error', e => {
+    if (finished) return;
+    finish();
+    if (e.data) handlers.onError?.(parse(e).message);
+    else handlers.onUnavailable?.();
+  });
+  return es;
+}
+
+function applyNodeEvent(ev) {
+  if (ev.node === 'router' && ev.status === 'end' && ev.route) {
+    setPipelineStep('planning', 'skipped');
+    setPipelineStep('write_query', 'skipped');
+    setPipelineDetail('planning', `Template: ${ev.route}`);
+    return;
+  }
+  if (ev.node === 'plan_and_write' && ev.status === 'start') setPipelineStep('planning', 'skipped');
+
+  const step = _STREAM_STEPS[ev.node];
+  if (!step) return;
+  if (ev.node === 'payment_gatekeeper' && ev.status === 'end' && ev.blocked) {
+    setPipelineStep(step, 'blocked');
+    return;
+  }
+  setPipelineStep(step, ev.status === 'start' ? 'running' : 'done');
+  if (ev.status === 'end' && ev.node === 'run_query') setPipelineDetail(step, `${ev.row_count || 0} rows retrieved`);
+  if (ev.status === 'end' && step === 'write_query' && ev.cypher) setPipelineDetail(step, ev.cypher);
+}
+
+// Cost guard verdict on the generated Cypher, shown under the Cypher step
+function applyGuardEvent(ev) {
+  if (ev.node !== 'guard_query' || ev.status !== 'end' || !ev.guard) return;
+  const g = ev.guard;
+  if (g.action === 'reject') {
+    setPipelineStep('write_query', 'blocked');
+    setPipelineDetail('write_query', `Guard rejected: ${g.reasons.join('; ')} — fallback search`);
+  } else if (g.action === 'rewrite') {
+    setPipelineDetail('write_query', `Guard: ${g.reasons.join(', ')}`);
+  }
+}
+
+// Paid deep run in the background: stream it when possible.
+// Returns false when the browser cannot stream (caller polls instead).
+function streamDeepResult(sessionId, { onStart, onComplete, onFailed, onUnavailable }) {
+  if (!window.EventSource) return false;
+  let started   = false;
+  let streaming = null;
+  const start = () => { if (!started) { started = true; onStart?.(); } };
+
+  openInvestigationStream(`/api/result/${sessionId}/stream`, {
+    onNode: start,
+    onToken(text) {
+      start();
+      if (!streaming) streaming = addStreamingMessage('🔓 **Deep Investigation — Premium Analysis**\n\n');
+      streaming.append(text);
+    },
+    onDone(data) { start(); onComplete(data, streaming); },
+    onError(message) { streaming?.discard(); onFailed(message); },
+    onUnavailable() { streaming?.discard(); onUnavailable(); },
+  });
+  return true;
+}
+
 // ════════════════════════════════════════════════════════════
 // PIPELINE UI
 // ════════════════════════════════════════════════════════════
@@ -534,9 +698,20 @@ function resetPipeline() {
   document.querySelectorAll('.pipeline-step').forEach(el => {
     el.className = 'pipeline-step step-idle';
     el.querySelector('.step-status').innerHTML = '<i class="fa-regular fa-circle"></i>';
+    const desc = el.querySelector('.step-desc');
+    if (desc?.dataset.default) { desc.textContent = desc.dataset.default; desc.title = ''; }
   });
 }
 
+// Live detail under a step name (row count, generated Cypher…)
+function setPipelineDetail(node, text) {
+  const desc = document.querySelector(`.pipeline-step[data-node="${node}"] .step-desc`);
+  if (!desc) return;
+  if (!desc.dataset.default) desc.dataset.default = desc.textContent;
+  desc.textContent = text.length > 60 ? text.slice(0, 57) + '…' : text;
+  desc.title       = text;
+}
+
 function setPipelineStep(node, state) {
   const el = document.querySelector(`.pipeline-step[data-node="${node}"]`);
   if (!el) return;
@@ -545,6 +720,7 @@ function setPipelineStep(node, state) {
     running: '<i class="fa-solid fa-circle-notch fa-spin"></i>',
     done:    '<i class="fa-solid fa-circle-check"></i>',
     blocked: '<i class="fa-solid fa-circle-xmark"></i>',
+    skipped: '<i class="fa-solid fa-bolt"></i>',
     idle:    '<i class="fa-regular fa-circle"></i>',
   };
 
@@ -723,9 +899,52 @@ async function simulatePayment() {
   }
 }
 
+// Deep result message with agent trace + export button; reuses the bubble
+// the answer was streamed into, if any
+function showDeepResult(sessionId, data, streaming) {
+  const content = '🔓 **Deep Investigation Complete — Premium Analysis Unlocked**\n\n' + data.answer;
+  const msgEl   = streaming ? streaming.finish(content) : addMessage('assistant', content, { isDeep: true, sessionId });
+  if (msgEl) {
+    const bubble = msgEl.querySelector('.msg-bubble');
+    if (bubble) {
+      bubble.insertBefore(buildTraceAccordion(data), bubble.querySelector('.msg-meta'));
+      const exportBtn = document.createElement('button');
+      exportBtn.className = 'btn-export-report';
+      exportBtn.innerHTML = '<i class="fa-solid fa-file-arrow-down"></i> Export Laporan (HTML)';
+      exportBtn.onclick = () => exportReport(sessionId, content);
+      bubble.appendChild(exportBtn);
+    }
+  }
+  _lastDeepResult = { sessionId, content };
+  setTimeout(() => { loadGraph(); loadGraphStats(); loadDocuments(); renderMiniGraph(); }, 800);
+  showToast('✅ Deep investigation complete!', 'success');
+}
+
 function pollResultAfterPayment(sessionId, typingId, pipelineInterval) {
   clearTimeout(_pollTimer);
 
+  const streamed = streamDeepResult(sessionId, {
+    // Real node events replace the simulated pipeline animation
+    onStart() {
+      clearInterval(pipelineInterval);
+      resetPipeline();
+      setPipelineStep('payment_gatekeeper', 'done');
+    },
+    onComplete(data, streaming) {
+      clearInterval(pipelineInterval);
+      removeTypingIndicator(typingId);
+      showDeepResult(sessionId, data, streaming);
+      _pendingSessionId = null;
+    },
+    onFailed(message) {
+      clearInterval(pipelineInterval);
+      removeTypingIndicator(typingId);
+      addMessage('assistant', `❌ Investigation error: ${message || 'Unknown error'}`);
+      showToast('❌ Investigation failed', 'error');
+    },
+    onUnavailable() { _pollTimer = setTimeout(check, 2000); },
+  });
+
   async function check() {
     try {
       const r    = await fetch(`/api/result/${sessionId}`);
@@ -735,23 +954,7 @@ function pollResultAfterPayment(sessionId, typingId, pipelineInterval) {
         clearInterval(pipelineInterval);
         setPipelineStep('answer_user', 'done');
         removeTypingIndicator(typingId);
-
-        const content = '🔓 **Deep Investigation Complete — Premium Analysis Unlocked**\n\n' + data.answer;
-        const msgEl   = addMessage('assistant', content, { isDeep: true, sessionId });
-        if (msgEl) {
-          const bubble = msgEl.querySelector('.msg-bubble');
-          if (bubble) {
-            bubble.insertBefore(buildTraceAccordion(data), bubble.querySelector('.msg-meta'));
-            const exportBtn = document.createElement('button');
-            exportBtn.className = 'btn-export-report';
-            exportBtn.innerHTML = '<i class="fa-solid fa-file-arrow-down"></i> Export Laporan (HTML)';
-            exportBtn.onclick = () => exportReport(sessionId, content);
-            bubble.appendChild(exportBtn);
-          }
-        }
-        _lastDeepResult = { sessionId, content };
-        setTimeout(() => { loadGraph(); loadGraphStats(); loadDocuments(); renderMiniGraph(); }, 800);
-        showToast('✅ Deep investigation complete!', 'success');
+        showDeepResult(sessionId, data, null);
         _pendingSessionId = null;
 
       } else if (data.status === 'ERROR') {
@@ -767,48 +970,43 @@ function pollResultAfterPayment(sessionId, typingId, pipelineInterval) {
       _pollTimer = setTimeout(check, 3000);
     }
   }
-  _pollTimer = setTimeout(check, 2000);
+  if (!streamed) _pollTimer = setTimeout(check, 2000);
 }
 
 function pollResult(sessionId, onComplete) {
   clearTimeout(_pollTimer);
 
+  function complete(data, streaming) {
+    // ── Close paywall IMMEDIATELY before anything else ──────
+    closePaywall();
+    if (onComplete) onComplete();
+    showDeepResult(sessionId, data, streaming);
+    _pendingSessionId = null; _pendingQuestion = null;
+    localStorage.removeItem('_pendingSessionId'); localStorage.removeItem('_pendingQuestion');
+
+    // Auto-switch to chat view to show result
+    switchView('chat');
+  }
+
+  function fail(message) {
+    closePaywall();
+    addMessage('assistant', `❌ Investigation error: ${message || 'Unknown error'}`);
+    showToast('❌ Investigation failed', 'error');
+  }
+
   async function check() {
     try {
       const r    = await fetch(`/api/result/${sessionId}`);
       const data = await r.json();
 
       if (data.status === 'COMPLETE') {
-        // ── Close paywall IMMEDIATELY before anything else ──────
-        closePaywall();
-        if (onComplete) onComplete();
-
-        const content = '🔓 **Deep Investigation Complete — Premium Analysis Unlocked**\n\n' + data.answer;
-        const msgEl = addMessage('assistant', content, { isDeep: true, sessionId });
-        if (msgEl) {
-          const bubble = msgEl.querySelector('.msg-bubble');
-          if (bubble) {
-            bubble.insertBefore(buildTraceAccordion(data), bubble.querySelector('.msg-meta'));
-            const btn = document.createElement('button');
-            btn.className = 'btn-export-report';
-            btn.innerHTML = '<i class="fa-solid fa-file-arrow-down"></i> Export Laporan (HTML)';
-            btn.onclick = () => exportReport(sessionId, content);
-            bubble.appendChild(btn);
-          }
-        }
-        _lastDeepResult = { sessionId, content };
-        setTimeout(() => { loadGraph(); loadGraphStats(); loadDocuments(); renderMiniGraph(); }, 800);
-        showToast('✅ Deep investigation complete!', 'success');
-        _pendingSessionId = null; _pendingQuestion = null;
-        localStorage.removeItem('_pendingSessionId'); localStorage.removeItem('_pendingQuestion');
-
-        // Auto-switch to chat view to show result
-        switchView('chat');
+        complete(data, null);
 
       } else if (data.status === 'ERROR') {
-        closePaywall();
-        addMessage('assistant', `❌ Investigation error: ${data.answer || 'Unknown error'}`);
-        showToast('❌ Investigation failed', 'error');
+        fail(data.answer);
+
+      } else if (data.status === 'PROCESSING' && followDeepStream()) {
+        // Payment confirmed — the run is streamed from here on
 
       } else {
         // Still PROCESSING or AWAITING_PAYMENT — keep polling
@@ -819,6 +1017,16 @@ function pollResult(sessionId, onComplete) {
     }
   }
 
+  // Stream the run once it has started; polling resumes if the stream is unavailable
+  function followDeepStream() {
+    return streamDeepResult(sessionId, {
+      onStart:       () => { resetPipeline(); setPipelineStep('payment_gatekeeper', 'done'); },
+      onComplete:    complete,
+      onFailed:      fail,
+      onUnavailable: () => { _pollTimer = setTimeout(check, 2000); },
+    });
+  }
+
   _pollTimer = setTimeout(check, 2000);
 }
 
@@ -1047,6 +1255,43 @@ function addMessage(role, content, opts = {}) {
   return div;
 }
 
+// Assistant bubble filled token by token; finish() renders the final
+// markdown and records it in the chat history, discard() removes it
+function addStreamingMessage(prefix = '') {
+  const container = document.getElementById('chat-messages');
+  const div       = document.createElement('div');
+  div.className   = 'message msg-assistant msg-streaming';
+
+  const tsStr = new Date().toLocaleTimeString('id-ID', { hour: '2-digit', minute: '2-digit' });
+  div.innerHTML = `
+    <div class="msg-avatar"><i class="fa-solid fa-robot"></i></div>
+    <div class="msg-bubble">
+      <div class="msg-stream-body"></div>
+      <div class="msg-meta">${tsStr}</div>
+    </div>
+  `;
+  container.appendChild(div);
+
+  const body = div.querySelector('.msg-stream-body');
+  let text   = prefix;
+  return {
+    append(chunk) {
+      text += chunk;
+      body.innerHTML = formatContent(text);
+      container.scrollTop = container.scrollHeight;
+    },
+    finish(content) {
+      div.classList.remove('msg-streaming');
+      body.outerHTML = formatContent(content);
+      container.scrollTop = container.scrollHeight;
+      _chatHistory.push({ role: 'assistant', content, ts: new Date().toISOString() });
+      try { localStorage.setItem('_chatHistory', JSON.stringify(_chatHistory.slice(-50))); } catch(_){}
+      return div;
+    },
+    discard() { div.remove(); },
+  };
+}
+
 function addTypingIndicator() {
   const id        = `typing-${Date.now()}`;
   const container = document.getElementById('chat-messages');
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: blocked/vectorised dedup engine vs. the original pairwise loop.
+
+    python benchmarks/bench_dedup.py                 # 10k, 50k, 100k names
+    python benchmarks/bench_dedup.py --sizes 5000 --legacy-max 5000
+
+The legacy loop is O(n²) in Python, so it only runs up to --legacy-max
+names; on those sizes the two outputs are also compared.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.entity_resolution import _is_duplicate, resolve_duplicates  # noqa: E402
+
+_FIRST = ["budi", "siti", "andi", "dewi", "rudi", "linda", "hartono", "melinda", "adrianus", "john",
+          "agus", "rina", "yusuf", "kevin", "maria", "surya", "wahyu", "indra", "fajar", "putri"]
+_LAST  = ["santoso", "wijaya", "kusuma", "dananjaya", "pratama", "halim", "tanoto", "salim",
+          "gunawan", "setiawan", "hidayat", "nugroho", "saputra", "lim", "tan", "doe"]
+_CORP  = ["sumber", "rejeki", "abadi", "nebula", "nusantara", "cahaya", "makmur", "vanguard",
+          "nexus", "crestview", "holdings", "mega", "karya", "sentosa", "global", "energi",
+          "mitra", "utama", "jaya", "sejahtera", "blue", "ocean", "capital", "investama"]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+
+
+def synthetic_names(n: int, seed: int = 7) -> list[str]:
+    """Normalised person / company names with ~20% near-duplicate variants."""
+    rng   = random.Random(seed)
+    names: list[str] = []
+    for _ in range(n):
+        if names and rng.random() < 0.2:
+            words = rng.choice(names).split()
+            words[rng.randrange(len(words))] = _typo(words[rng.randrange(len(words))], rng)
+            names.append(" ".join(words))
+        elif rng.random() < 0.5:
+            names.append(f"{rng.choice(_FIRST)} {rng.choice(_LAST)} {rng.randrange(10_000)}")
+        else:
+            names.append(" ".join(rng.sample(_CORP, rng.randint(2, 3))) + f" {rng.randrange(10_000)}")
+    return names
+
+
+def legacy_resolve(names: list[str]) -> list[int]:
+    """The original deduplicate_nodes loop, returning canonical positions."""
+    norm_to_canon: dict[str, int] = {}
+    result: list[int] = []
+    for pos, norm in enumerate(names):
+        matched = None
+        for existing, canon in norm_to_canon.items():
+            if _is_duplicate(norm, existing):
+                matched = canon
+                break
+        if matched is not None:
+            norm_to_canon[norm] = matched
+            result.append(matched)
+        else:
+            norm_to_canon[norm] = pos
+            result.append(pos)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="largest size the O(n²) legacy loop is run on")
+    args = parser.parse_args()
+
+    print(f"{'names':>8} | {'engine s':>9} | {'legacy s':>9} | {'speedup':>8} | {'canonical':>9} | agreement")
+    for n in args.sizes:
+        names = synthetic_names(n)
+
+        t0 = time.perf_counter()
+        fast = resolve_duplicates(names)
+        t_fast = time.perf_counter() - t0
+        canonical = sum(1 for i, c in enumerate(fast) if c == i)
+
+        if n <= args.legacy_max:
+            t0 = time.perf_counter()
+            slow = legacy_resolve(names)
+            t_slow = time.perf_counter() - t0
+            agree = sum(a == b for a, b in zip(fast, slow)) / n
+            print(f"{n:>8} | {t_fast:>9.2f} | {t_slow:>9.2f} | {t_slow / t_fast:>7.0f}x | "
+                  f"{canonical:>9} | {agree:.2%}")
+        else:
+            print(f"{n:>8} | {t_fast:>9.2f} | {'—':>9} | {'—':>8} | {canonical:>9} | —")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# graph_retriever builds its Groq client at import; no call is made in tests
+os.environ.setdefault("GROQ_API_KEY", "test")
@@ -0,0 +1,62 @@
+import time
+
+from app.db.query_cache import bump_graph_version, graph_version
+from app.services.answer_cache import AnswerCache, entity_tokens
+
+_RESULT = {"answer": "Budi Santoso", "cypher_query": "MATCH ...", "graph_context": "..."}
+
+
+def _cache(ttl_s=0):
+    return AnswerCache(threshold=0.8, max_entries=10, ttl_s=ttl_s)
+
+
+def test_rephrased_question_hits():
+    cache = _cache()
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, graph_version())
+    hit = cache.lookup("siapa direksi PT Nebula", "basic")
+    assert hit is not None and hit[0].answer == "Budi Santoso"
+
+
+def test_different_entity_or_depth_misses():
+    cache = _cache()
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, graph_version())
+    assert cache.lookup("siapa direktur PT Orion?", "basic") is None
+    assert cache.lookup("siapa direktur PT Nebula?", "deep") is None
+
+
+def test_graph_write_invalidates():
+    cache = _cache()
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, graph_version())
+    bump_graph_version("test")
+    assert cache.lookup("siapa direktur PT Nebula?", "basic") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_that_raced_a_write_is_not_stored():
+    cache  = _cache()
+    before = graph_version()
+    bump_graph_version("test")
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, before)
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl():
+    cache = _cache(ttl_s=60)
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, graph_version())
+    cache.store("siapa pemilik PT Orion?", "basic", _RESULT, graph_version())
+    cache._entries[0].created_at -= 120
+
+    assert cache.lookup("siapa direktur PT Nebula?", "basic") is None
+    assert cache.lookup("siapa pemilik PT Orion?", "basic") is not None
+    assert cache.stats()["expired"] == 1
+
+
+def test_no_ttl_keeps_entries():
+    cache = _cache(ttl_s=0)
+    cache.store("siapa direktur PT Nebula?", "basic", _RESULT, graph_version())
+    cache._entries[0].created_at = time.time() - 10 ** 6
+    assert cache.lookup("siapa direktur PT Nebula?", "basic") is not None
+
+
+def test_entity_tokens():
+    assert entity_tokens("siapa direktur PT Nebula 2024?") == {"pt", "nebula", "2024"}
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import chunker
+from app.services.chunker import OverlapFilter, TokenCounter, chunk_token_budget, context_window, iter_chunks
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    """Offline chars/4 estimate — deterministic, no tokenizer download."""
+    monkeypatch.setattr(chunker, "_HAS_TIKTOKEN", False)
+    return TokenCounter("test-model")
+
+
+def _paragraph(i: int, sentences: int = 3) -> str:
+    return " ".join(f"Sentence {j} of paragraph {i} names PT Entity{i}." for j in range(sentences))
+
+
+def _document(paragraphs: int = 40) -> list[str]:
+    """Pages of several paragraphs each."""
+    paras = [_paragraph(i) for i in range(paragraphs)]
+    return ["\n\n".join(paras[i:i + 5]) for i in range(0, paragraphs, 5)]
+
+
+def _check_offsets(chunks, doc):
+    for c in chunks:
+        assert doc[c.start:c.start + len(c.text)] == c.text
+
+
+def test_offsets_point_into_the_document(counter):
+    pages  = _document()
+    chunks = list(iter_chunks(pages, counter, max_tokens=120, overlap_tokens=20))
+    assert len(chunks) > 3
+    _check_offsets(chunks, "\n".join(pages))
+
+
+def test_chunks_stay_within_budget(counter):
+    chunks = list(iter_chunks(_document(), counter, max_tokens=120, overlap_tokens=20))
+    assert all(c.tokens <= 120 for c in chunks)
+    assert all(c.overlap_tokens <= 20 for c in chunks)
+
+
+def test_bodies_cover_the_document_once(counter):
+    pages  = _document()
+    chunks = list(iter_chunks(pages, counter, max_tokens=120, overlap_tokens=20))
+    assert "".join(c.body for c in chunks) == "\n".join(pages)
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert cur.start + cur.overlap_chars == prev.start + len(prev.text)
+        assert prev.text.endswith(cur.text[:cur.overlap_chars])
+
+
+def test_paragraphs_that_fit_are_never_cut(counter):
+    paras  = [_paragraph(i) for i in range(12)]
+    chunks = list(iter_chunks(["\n\n".join(paras)], counter, max_tokens=150))
+    for c in chunks:
+        for i, p in enumerate(paras):
+            if f"paragraph {i} " in c.text:
+                assert p in c.text
+
+
+def test_oversized_paragraph_is_split_at_sentences(counter):
+    para   = _paragraph(0, sentences=30)
+    chunks = list(iter_chunks([para], counter, max_tokens=60))
+    assert len(chunks) > 1
+    assert all(c.text.rstrip().endswith(".") for c in chunks)
+    _check_offsets(chunks, para)
+
+
+def test_text_blocks_complete_open_paragraphs(counter):
+    text   = "\n\n".join(_paragraph(i) for i in range(10))
+    blocks = [text[i:i + 97] for i in range(0, len(text), 97)]
+    chunks = list(iter_chunks(blocks, counter, max_tokens=100, separator="", page_boundaries=False))
+    _check_offsets(chunks, text)
+    assert "".join(c.body for c in chunks) == text
+    assert all(c.text.startswith("Sentence 0 of paragraph") for c in chunks)
+
+
+def test_pages_are_numbered(counter):
+    chunks = list(iter_chunks(_document(), counter, max_tokens=400))
+    assert chunks[0].first_page == 1
+    assert chunks[-1].last_page == 8
+    assert all(c.first_page <= c.last_page for c in chunks)
+
+
+def test_budget_follows_the_context_window(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 8000)
+    monkeypatch.setattr(settings, "CHUNK_OUTPUT_RESERVE_TOKENS", 4096)
+    assert context_window("gpt-4o-mini") == 128_000          # longest prefix wins over gpt-4
+    assert chunk_token_budget("gpt-4o-mini", prompt_tokens=2000) == 8000
+    assert chunk_token_budget("gpt-4", prompt_tokens=2000) == 8192 - 2000 - 4096
+    assert chunk_token_budget("gpt-4", prompt_tokens=8000) == 512
+
+
+def test_overlap_filter_drops_entities_only_reread_in_the_overlap(counter):
+    node = lambda name: SimpleNamespace(name=name)  # noqa: E731
+    chunk = SimpleNamespace(
+        text="PT Alpha signed. PT Beta joined later.", overlap_chars=len("PT Alpha signed. "),
+    )
+    chunk.body = chunk.text[chunk.overlap_chars:]
+    filt = OverlapFilter()
+    filt.apply(SimpleNamespace(text="x", overlap_chars=0, body="x"), [node("PT Alpha"), node("PT Beta")], [])
+
+    kept, _ = filt.apply(chunk, [node("PT Alpha"), node("PT Beta")], [])
+    assert [n.name for n in kept] == ["PT Beta"]
+    assert filt.dropped_nodes == 1
@@ -0,0 +1,100 @@
+import pytest
+
+from app.services import chunker
+from app.services.chunker import TokenCounter
+from app.services.context_encoder import encode_context
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    monkeypatch.setattr(chunker, "_HAS_TIKTOKEN", False)
+    return TokenCounter("test-model")
+
+
+def _director_rows(n: int) -> list:
+    return [
+        {
+            "company": "PT Nebula", "company_context": "Perusahaan cangkang di Jakarta",
+            "person": f"Person {i}", "person_context": f"Direktur ke-{i}", "role": None,
+            "position": "DIRECTOR_OF", "details": None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_entities_become_symbols_with_one_description(counter):
+    enc  = encode_context(_director_rows(3), "siapa direktur PT Nebula", counter, max_tokens=10_000)
+    text = enc.text
+    assert text.count("Perusahaan cangkang di Jakarta") == 1
+    assert "E1 PT Nebula — Perusahaan cangkang di Jakarta" in text
+    assert "E1 | E2 | DIRECTOR_OF" in text
+    assert (enc.rows_in, enc.rows_kept, enc.entities) == (3, 3, 4)
+
+
+def test_columns_empty_in_every_row_are_dropped(counter):
+    header = encode_context(_director_rows(2), "q", counter, max_tokens=10_000).text.splitlines()
+    columns = next(line for line in header if "|" in line)
+    assert columns == "company | person | position"
+
+
+def test_identical_rows_appear_once(counter):
+    rows = _director_rows(1) * 4
+    assert encode_context(rows, "q", counter, max_tokens=10_000).rows_kept == 1
+
+
+def test_relationship_type_column_stays_in_the_rows(counter):
+    rows = [
+        {"name": "PT Nebula", "type": "DIRECTOR_OF", "target": "Budi"},
+        {"name": "PT Nebula", "type": "OWNS_SHARE",  "target": "Budi"},
+    ]
+    enc = encode_context(rows, "q", counter, max_tokens=10_000)
+    assert enc.rows_kept == 2
+    assert "[DIRECTOR_OF]" not in enc.text
+    assert "name | type | target" in enc.text and "| OWNS_SHARE |" in enc.text
+
+
+def test_label_type_column_is_folded_into_the_symbol(counter):
+    rows = [{"name": "PT Nebula", "type": "Company", "target": "Budi"}] * 2
+    text = encode_context(rows, "q", counter, max_tokens=10_000).text
+    assert "E1 PT Nebula [Company]" in text and "name | target" in text
+
+
+def test_rows_differing_only_in_entity_description_are_kept(counter):
+    rows = [
+        {"entity": "PT Nebula", "context": "Perusahaan cangkang", "target": "Budi"},
+        {"entity": "PT Nebula", "context": "Nasabah bank",        "target": "Budi"},
+    ]
+    enc = encode_context(rows, "q", counter, max_tokens=10_000)
+    assert enc.rows_kept == 2
+    assert "Perusahaan cangkang" in enc.text and "Nasabah bank" in enc.text
+
+
+def test_budget_keeps_relevant_rows_in_query_order(counter):
+    rows = _director_rows(30)
+    rows[20]["details"] = "pemegang saham mayoritas"
+    enc  = encode_context(rows, "siapa pemegang saham mayoritas", counter, max_tokens=70)
+
+    assert 0 < enc.rows_kept < 30 and enc.tokens <= 70
+    assert f"{30 - enc.rows_kept} less relevant rows left out" in enc.text
+    # the most relevant row made the cut; kept rows print in query order
+    assert "Person 20" in enc.text and "pemegang saham mayoritas" in enc.text
+    entities, rows_out = enc.text.split("## Rows")
+    name_of = dict(line.split(" — ")[0].split(" ", 1) for line in entities.splitlines()[1:])
+    printed = [int(name_of[row.split(" | ")[1]].split()[-1]) for row in rows_out.splitlines()[2:]]
+    assert printed == sorted(printed)
+
+
+def test_whole_nodes_are_described_by_their_properties(counter):
+    rows = [{"n": {"name": "PT Orion", "id": "c9", "context": "Holding"}, "rel": "OWNS"}]
+    text = encode_context(rows, "q", counter, max_tokens=10_000).text
+    assert "E1 PT Orion — context: Holding" in text and "c9" not in text
+
+
+def test_cells_are_single_line_and_pipe_free(counter):
+    rows = [{"entity": "A", "note": "line one\nline | two"}]
+    text = encode_context(rows, "q", counter, max_tokens=10_000).text
+    assert "line one line / two" in text
+
+
+def test_no_rows(counter):
+    assert encode_context([], "q", counter).text == "[]"
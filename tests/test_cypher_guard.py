@@ -0,0 +1,103 @@
+import pytest
+
+from app.core.config import settings
+from app.services.cypher_guard import CypherGuard, cap_limit, cap_var_length, query_shape
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("MATCH (a)-[*]-(b) RETURN b",          "MATCH (a)-[*1..4]-(b) RETURN b"),
+    ("MATCH (a)-[r:OWNS*]->(b) RETURN b",   "MATCH (a)-[r:OWNS*1..4]->(b) RETURN b"),
+    ("MATCH (a)-[*2..]-(b) RETURN b",       "MATCH (a)-[*2..4]-(b) RETURN b"),
+    ("MATCH (a)-[*..9]-(b) RETURN b",       "MATCH (a)-[*1..4]-(b) RETURN b"),
+])
+def test_var_length_patterns_are_capped(query, expected):
+    assert cap_var_length(query, 4) == (expected, True)
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (a)-[*1..3]-(b) RETURN b",       # already within the cap
+    "MATCH (a)-[*3]-(b) RETURN b",          # exact length
+    "MATCH (a)-[*6..]-(b) RETURN b",        # lower bound above the cap
+    "MATCH (a) RETURN a.x * 2",             # arithmetic, not a pattern
+])
+def test_var_length_patterns_left_alone(query):
+    assert cap_var_length(query, 4) == (query, False)
+
+
+def test_limit_added_to_final_return():
+    assert cap_limit("MATCH (n) RETURN n", 200) == ("MATCH (n) RETURN n LIMIT 200", True)
+
+
+def test_larger_limit_is_lowered_smaller_kept():
+    assert cap_limit("MATCH (n) RETURN n LIMIT 5000", 200) == ("MATCH (n) RETURN n LIMIT 200", True)
+    assert cap_limit("MATCH (n) RETURN n LIMIT 10", 200) == ("MATCH (n) RETURN n LIMIT 10", False)
+    assert cap_limit("MATCH (n) RETURN n LIMIT $k", 200) == ("MATCH (n) RETURN n LIMIT $k", False)
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (a:A) RETURN a.id AS id UNION MATCH (b:B) RETURN b.id AS id",
+    "MATCH (n) CALL { WITH n RETURN n.x AS x } MATCH (m) SET m.y = x",
+    "CREATE (n:Person)",
+])
+def test_limit_not_added_where_unsafe(query):
+    assert cap_limit(query, 200) == (query, False)
+
+
+def test_query_shape_ignores_string_literals():
+    assert query_shape("MATCH (n {name: 'Acme'}) RETURN n") == query_shape("MATCH (n {name: \"Globex\"})  RETURN n")
+
+
+class _Explain:
+    def __init__(self, plan=None, query_type="r"):
+        self.plan, self.query_type, self.calls = plan, query_type, []
+
+    def __call__(self, query, params):
+        self.calls.append(query)
+        return self.plan, self.query_type
+
+
+def _plan(op, rows, details=""):
+    return {"operatorType": op, "args": {"EstimatedRows": rows, "Details": details}, "children": []}
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr(settings, "CYPHER_GUARD_MAX_HOPS", 4)
+    monkeypatch.setattr(settings, "CYPHER_GUARD_ROW_LIMIT", 200)
+    return CypherGuard(max_entries=16)
+
+
+def test_check_rewrites_and_explains_the_rewritten_query(guard):
+    explain = _Explain(_plan("ProduceResults@neo4j", 10))
+    query, verdict = guard.check("MATCH (a)-[*]-(b) RETURN b", None, explain)
+
+    assert query == "MATCH (a)-[*1..4]-(b) RETURN b LIMIT 200"
+    assert explain.calls == [query]
+    assert verdict.action == "rewrite" and len(verdict.reasons) == 2
+
+
+def test_check_rejects_writes_and_huge_estimates(guard, monkeypatch):
+    monkeypatch.setattr(settings, "CYPHER_GUARD_MAX_ESTIMATED_ROWS", 1000)
+    _, write = guard.check("CREATE (n:Person)", None, _Explain(query_type="w"))
+    _, huge  = guard.check("MATCH (n) RETURN n", None, _Explain(_plan("AllNodesScan", 5000)))
+
+    assert write.action == "reject" and huge.action == "reject"
+    assert huge.estimated_rows == 5000
+
+
+def test_verdict_cached_per_query_shape(guard):
+    explain = _Explain(_plan("ProduceResults", 1))
+    guard.check("MATCH (n {name: 'Acme'}) RETURN n LIMIT 5", None, explain)
+    _, verdict = guard.check("MATCH (n {name: 'Globex'}) RETURN n LIMIT 5", None, explain)
+
+    assert verdict.action == "ok"
+    assert len(explain.calls) == 1 and guard.stats()["cache_hits"] == 1
+
+
+def test_explain_failure_is_unchecked_and_not_cached(guard):
+    def broken(query, params):
+        raise ConnectionError("down")
+
+    _, verdict = guard.check("MATCH (n) RETURN n LIMIT 5", None, broken)
+    assert verdict.action == "unchecked"
+    assert guard.stats()["shapes"] == 0
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.services import graph_retriever
+from app.services.cypher_params import _ShapeStats, parameterize
+from app.services.graph_retriever import retriever_service
+
+
+def test_literals_become_parameters():
+    result = parameterize(
+        "MATCH (c:Company) WHERE c.name = 'PT Nebula' AND c.score > 0.5 RETURN c.name AS name"
+    )
+    assert "'PT Nebula'" not in result.text and "0.5" not in result.text
+    assert sorted(result.params.values(), key=str) == [0.5, "PT Nebula"]
+    assert result.lifted == 2
+
+
+def test_limit_skip_and_path_bounds_stay_literal():
+    result = parameterize("MATCH p=(a:Person)-[*1..4]-(b) RETURN p SKIP 5 LIMIT 50", rename=False)
+    assert "*1..4" in result.text and "SKIP 5" in result.text and "LIMIT 50" in result.text
+    assert result.params == {}
+
+
+def test_string_escapes_are_unescaped():
+    result = parameterize(r"MATCH (c) WHERE c.name = 'O\'Brien A' RETURN c.name AS n")
+    assert list(result.params.values()) == ["O'Brien A"]
+
+
+def test_existing_lit_parameters_are_not_clobbered():
+    result = parameterize("MATCH (c) WHERE c.id = $lit0 AND c.name = 'x' RETURN c.id AS id", rename=False)
+    assert "$lit0" in result.text and "$autolit0" in result.text
+
+
+def test_equivalent_queries_share_one_text():
+    a = parameterize('MATCH (c:Company) WHERE toLower(c.name) CONTAINS toLower("nebula") RETURN c.name')
+    b = parameterize("MATCH  (x:Company) WHERE toLower(x.name) CONTAINS toLower('orion')\n RETURN x.name")
+    assert a.text != b.text          # result columns differ: c.name / x.name
+    assert a.text.replace("`c.name`", "") == b.text.replace("`x.name`", "")
+    assert a.params == {"lit0": "nebula"} and b.params == {"lit0": "orion"}
+
+
+def test_renamed_return_items_keep_their_column_names():
+    result = parameterize("MATCH (p:Person)-[r:DIRECTOR_OF]->(c:Company) RETURN p.name, r.details, c.name AS company")
+    assert result.renamed == 3
+    assert "v0.name AS `p.name`" in result.text
+    assert "v1.details AS `r.details`" in result.text
+    assert "v2.name AS company" in result.text
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (a) RETURN a.name AS n UNION MATCH (b) RETURN b.name AS n",
+    "MATCH (`my node`) RETURN `my node`.name",
+    "CALL db.labels() YIELD label RETURN label",
+    "MATCH (a) RETURN *",
+])
+def test_renaming_is_skipped_where_unsafe(query):
+    assert parameterize(query).renamed == 0
+
+
+def test_shape_stats_count_reuse():
+    stats = _ShapeStats(max_shapes=10)
+    for name in ("nebula", "orion", "vega"):
+        raw = f"MATCH (c:Company) WHERE c.name = '{name}' RETURN c.name AS name"
+        stats.record(raw, parameterize(raw))
+    s = stats.stats()
+    assert (s["queries"], s["plan_cache_hits"], s["raw_hits"], s["shapes"]) == (3, 2, 0, 1)
+
+
+# ── Interaction with the retriever's Cypher sanitiser ────────────────────────
+
+_DIRECTORS = "MATCH (p:Person)-[r:DIRECTOR_OF]->(c:Company) RETURN p.name, r.details, c.name LIMIT 50"
+
+
+@pytest.fixture
+def no_guard(monkeypatch):
+    monkeypatch.setattr(graph_retriever, "get_cypher_guard", lambda: None)
+    monkeypatch.setattr(graph_retriever, "get_shape_stats", lambda: _ShapeStats(10))
+
+
+def _run_prepared(monkeypatch, state):
+    ran = []
+    monkeypatch.setattr(retriever_service, "_query", lambda q, p=None, site="investigation": ran.append((q, p)) or [{"x": 1}])
+    retriever_service.execute_query(state)
+    return ran[0]
+
+
+def test_guarded_query_without_literals_is_not_sanitised_again(no_guard, monkeypatch):
+    guarded = retriever_service.guard_query({"question": "q", "cypher_query": _DIRECTORS, "cypher_params": None})
+    assert guarded["cypher_params"] == {}
+
+    query, params = _run_prepared(monkeypatch, guarded)
+    assert query == guarded["cypher_query"]
+    assert "v1.details AS `r.details`" in query and "``" not in query
+
+
+def test_async_guarded_query_is_not_sanitised_again(no_guard):
+    guarded = asyncio.run(
+        retriever_service.aguard_query({"question": "q", "cypher_query": _DIRECTORS, "cypher_params": None})
+    )
+    assert retriever_service._prepare_query(guarded) == (guarded["cypher_query"], {})
+
+
+def test_raw_llm_cypher_is_still_sanitised():
+    query, _ = retriever_service._prepare_query({
+        "cypher_query":  "MATCH (p:Person)-[:DIRECTOR_OF]->(c:Company) RETURN p.name, r.details",
+        "cypher_params": None,
+    })
+    assert "r.details" not in query
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from app.services.entity_merge import _merge_batch_tx
+
+
+class _Result(list):
+    def __init__(self, records=(), deleted=0):
+        super().__init__(records)
+        self.deleted = deleted
+
+    def consume(self):
+        return SimpleNamespace(counters=SimpleNamespace(nodes_deleted=self.deleted))
+
+
+class _Tx:
+    """Answers the read statements of _merge_batch_tx from canned records, logs the writes."""
+
+    def __init__(self, groups, rels):
+        self.groups, self.rels = groups, rels
+        self.creates: list = []
+
+    def run(self, query, **params):
+        if "collect(n.id) AS ids" in query:
+            return _Result({"ids": ids} for ids in self.groups)
+        if "startNode(r) = b" in query:
+            return _Result(self.rels)
+        if "CREATE" in query:
+            self.creates.append((query, params["rows"]))
+        if "properties(a) AS canon_props" in query:
+            return _Result(
+                {"canon": ids[0], "canon_props": {}, "dup_props": [{} for _ in ids[1:]]}
+                for ids in self.groups
+            )
+        if "DETACH DELETE" in query:
+            return _Result(deleted=len(params["pairs"]))
+        return _Result()
+
+
+def _rel(canon, outgoing, other_id, same_label=True, props=None, rtype="OWNS_SHARE"):
+    return {
+        "canon": canon, "type": rtype, "outgoing": outgoing, "other": f"element-{other_id}",
+        "other_id": other_id, "same_label": same_label, "props": props or {"pct": 10},
+    }
+
+
+def test_relationship_between_duplicates_of_two_groups_is_kept():
+    # dup1 -[:OWNS_SHARE]-> dup2, seen once from each end
+    tx = _Tx(
+        groups=[["canonA", "dup1"], ["canonB", "dup2"]],
+        rels=[_rel("canonA", True, "dup2"), _rel("canonB", False, "dup1")],
+    )
+    stats = _merge_batch_tx(tx, "Company", ["a", "b"])
+
+    assert len(tx.creates) == 1
+    query, rows = tx.creates[0]
+    assert "(x:Company {id: row.other})" in query and "(a)-[nr:`OWNS_SHARE`]->(x)" in query
+    assert rows == [{"canon": "canonA", "other": "canonB", "props": {"pct": 10}}]
+    assert stats["relationships_moved"] == 1 and stats["nodes_merged"] == 2
+
+
+def test_relationship_within_one_group_is_dropped():
+    tx = _Tx(groups=[["canonA", "dup1"]], rels=[_rel("canonA", True, "canonA")])
+    stats = _merge_batch_tx(tx, "Company", ["a"])
+    assert tx.creates == [] and stats["relationships_moved"] == 0
+
+
+def test_other_endpoints_are_matched_by_element_id():
+    tx = _Tx(
+        groups=[["canonA", "dup1"]],
+        rels=[_rel("canonA", False, "p1", same_label=False, rtype="DIRECTOR_OF"),
+              _rel("canonA", True, "c9")],       # same label, not merged in this batch
+    )
+    _merge_batch_tx(tx, "Company", ["a"])
+
+    assert len(tx.creates) == 2
+    for query, rows in tx.creates:
+        assert "elementId(x) = row.other" in query
+    assert {rows[0]["other"] for _, rows in tx.creates} == {"element-p1", "element-c9"}
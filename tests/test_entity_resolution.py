@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from app.services import entity_resolution as er
+from bench_dedup import legacy_resolve, synthetic_names
+
+
+def test_matches_legacy_loop_on_synthetic_names():
+    names = synthetic_names(3000, seed=11)
+    assert er.resolve_duplicates(names) == legacy_resolve(names)
+
+
+def test_matches_legacy_loop_with_repeats_and_shuffles():
+    rng   = random.Random(3)
+    base  = synthetic_names(800, seed=5)
+    names = [rng.choice(base) for _ in range(1500)]
+    assert er.resolve_duplicates(names) == legacy_resolve(names)
+
+
+def test_finds_fuzzy_pair_sharing_no_block_key(monkeypatch):
+    monkeypatch.setattr(er, "PHONETIC_ENABLED", False)
+    names = ["abcdefghijkl mnopqrstuvwx", "abcdefghijkz mnopqrstuvwz"]
+    a, b  = (er.NameFeatures.from_normalized(n) for n in names)
+    assert not set(a.block_keys) & set(b.block_keys)
+    assert er.resolve_duplicates(names) == legacy_resolve(names) == [0, 0]
+
+
+def test_earliest_match_wins_over_blocked_match(monkeypatch):
+    monkeypatch.setattr(er, "PHONETIC_ENABLED", False)
+    # name 2 shares a block with name 1, but name 0 is earlier and also matches
+    names = ["abcdefghijkz mnopqrstuvwz", "abcdefghijkl mnopqrstuvwy", "abcdefghijkl mnopqrstuvwx"]
+    assert er.resolve_duplicates(names) == legacy_resolve(names)
+
+
+def test_normalize_name_strips_legal_suffixes_and_accents():
+    assert er.normalize_name("PT. Sumber Réjeki Abadi Tbk") == "sumber rejeki abadi"
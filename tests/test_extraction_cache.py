@@ -0,0 +1,57 @@
+import time
+
+from app.db.extraction_cache import ExtractionCache
+
+
+def _cache(tmp_path, max_bytes=10_000):
+    return ExtractionCache(str(tmp_path / "cache.sqlite3"), max_bytes)
+
+
+def test_key_depends_on_prompt_model_and_text():
+    key = ExtractionCache.make_key("chunk", "prompt", "model")
+    assert key == ExtractionCache.make_key("chunk", "prompt", "model")
+    assert key != ExtractionCache.make_key("chunk!", "prompt", "model")
+    assert key != ExtractionCache.make_key("chunk", "prompt v2", "model")
+    assert key != ExtractionCache.make_key("chunk", "prompt", "other-model")
+    # parts are delimited, so shifting text between them changes the key
+    assert ExtractionCache.make_key("ab", "c", "m") != ExtractionCache.make_key("b", "ca", "m")
+
+
+def test_round_trip_and_hit_counts(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", '{"nodes": []}')
+    assert cache.get("k") == '{"nodes": []}'
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_entries_survive_reopen(tmp_path):
+    _cache(tmp_path).put("k", "payload")
+    reopened = _cache(tmp_path)
+    assert reopened.get("k") == "payload"
+    assert reopened.stats()["bytes"] == len("payload")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, key * 100)
+        time.sleep(0.01)
+    # 300 bytes > 250: the oldest entry, a, made room for c
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" * 100 and cache.get("c") == "c" * 100
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_replacing_an_entry_does_not_double_count(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", "x" * 100)
+    cache.put("k", "y" * 40)
+    assert cache.stats()["bytes"] == 40
+    assert cache.stats()["entries"] == 1
+
+
+def test_payload_larger_than_the_store_is_skipped(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10)
+    cache.put("k", "x" * 11)
+    assert cache.get("k") is None
@@ -0,0 +1,36 @@
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.services.graph_retriever import retriever_service
+
+
+@pytest.fixture
+def snapshot_queries(monkeypatch):
+    calls = []
+
+    def fake_query(query, params=None, site="investigation"):
+        calls.append(query)
+        return [{"entity": f"E{len(calls)}"}]
+
+    monkeypatch.setattr(retriever_service, "_query", fake_query)
+    monkeypatch.setattr(retriever_service, "_snapshot", (-1, 0.0, []))
+    monkeypatch.setattr(retriever_service, "_snapshot_lock", threading.Lock())
+    monkeypatch.setattr(settings, "QUERY_CACHE_TTL_S", 300)
+    return calls
+
+
+def test_snapshot_is_reused_within_the_ttl(snapshot_queries):
+    first  = retriever_service._graph_snapshot()
+    second = retriever_service._graph_snapshot()
+    assert first == second and len(snapshot_queries) == 1
+
+
+def test_snapshot_expires_after_the_ttl(snapshot_queries):
+    retriever_service._graph_snapshot()
+    version, built_at, rows = retriever_service._snapshot
+    retriever_service._snapshot = (version, built_at - 301, rows)     # written elsewhere meanwhile
+
+    assert retriever_service._graph_snapshot() == [{"entity": "E2"}]
+    assert len(snapshot_queries) == 2
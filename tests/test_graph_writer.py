@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import graph_writer as gw
+from app.db.graph_writer import PHASE_NODES, PHASE_RELATIONSHIPS, DocumentWrite, GraphWriter
+
+
+class _Tx:
+    """Counts one created node per row of a node statement, one rel per relationship row."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, rows):
+        self.log.append(query)
+        rels  = "MERGE (src)" in query
+        count = SimpleNamespace(
+            nodes_created=0 if rels else len(rows),
+            relationships_created=len(rows) if rels else 0,
+            properties_set=len(rows),
+            nodes_deleted=0,
+        )
+        return SimpleNamespace(consume=lambda: SimpleNamespace(counters=count))
+
+
+class _Client:
+    def __init__(self, fail_on=None):
+        self.transactions = 0
+        self.queries: list = []
+        self.fail_on = fail_on
+
+    def execute_write(self, work, *args, **kwargs):
+        self.transactions += 1
+        docs = args[0]
+        if self.fail_on and any(d.source == self.fail_on for d in docs):
+            raise RuntimeError("boom")
+        return work(_Tx(self.queries), *args, **kwargs)
+
+
+def _doc(source, nodes, rels):
+    doc = DocumentWrite(source)
+    doc.add(PHASE_RELATIONSHIPS, "MERGE (src)-[:R]->(tgt)", [{"i": i} for i in range(rels)])
+    doc.add(PHASE_NODES, "MERGE (node:Person {id: row.id})", [{"id": i} for i in range(nodes)])
+    return doc
+
+
+@pytest.fixture(autouse=True)
+def _no_graph_version(monkeypatch):
+    monkeypatch.setattr(gw, "bump_graph_version", lambda reason: None)
+
+
+def _flush_together(writer, docs):
+    futures = [writer.submit(d) for d in docs]
+    return [f.result(timeout=5) for f in futures]
+
+
+def test_coalesced_documents_get_their_own_counters():
+    client = _Client()
+    writer = GraphWriter(client=client, batch_size=0, coalesce_ms=300, max_rows=10_000)
+    a, b   = _flush_together(writer, [_doc("a.pdf", 3, 1), _doc("b.pdf", 5, 4)])
+
+    assert client.transactions == 1
+    assert (a["nodes_created"], a["relationships_created"], a["rows"]) == (3, 1, 4)
+    assert (b["nodes_created"], b["relationships_created"], b["rows"]) == (5, 4, 9)
+    assert writer.stats()["documents"] == 2
+
+
+def test_nodes_are_written_before_relationships():
+    client = _Client()
+    GraphWriter(client=client, batch_size=0, coalesce_ms=0).write(_doc("a.pdf", 1, 1))
+    assert "Person" in client.queries[0] and "MERGE (src)" in client.queries[1]
+
+
+def test_failed_coalesced_write_is_retried_per_document():
+    client = _Client(fail_on="bad.pdf")
+    writer = GraphWriter(client=client, batch_size=0, coalesce_ms=300, max_rows=10_000)
+    good   = writer.submit(_doc("good.pdf", 2, 0))
+    bad    = writer.submit(_doc("bad.pdf", 2, 0))
+
+    assert good.result(timeout=5)["nodes_created"] == 2
+    with pytest.raises(RuntimeError):
+        bad.result(timeout=5)
+    assert writer.stats()["failed"] == 1
+
+
+def test_empty_document_resolves_without_a_transaction():
+    client = _Client()
+    result = GraphWriter(client=client).write(DocumentWrite("empty.pdf"))
+    assert result["nodes_created"] == 0 and client.transactions == 0
+
+
+def test_sub_batched_statements_use_a_scoped_subquery():
+    statements = []
+
+    class _AutoClient:
+        def execute_autocommit(self, query, params):
+            statements.append(query)
+            return SimpleNamespace(counters=SimpleNamespace(
+                nodes_created=len(params["rows"]), relationships_created=0, properties_set=0, nodes_deleted=0,
+            ))
+
+    result = GraphWriter(client=_AutoClient(), batch_size=2, coalesce_ms=0).write(_doc("a.pdf", 3, 0))
+    assert result["nodes_created"] == 3
+    assert statements[0].startswith("UNWIND $rows AS row\nCALL (row) {\n")
+    assert "WITH row" not in statements[0] and statements[0].endswith("IN TRANSACTIONS OF 2 ROWS")
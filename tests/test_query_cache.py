@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db import query_cache
+from app.db.query_cache import (
+    QueryResultCache, acached_query, bump_graph_version, cached_query, graph_version, normalize_cypher,
+)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    cache = QueryResultCache(max_bytes=1024 * 1024, ttl_s=300)
+    monkeypatch.setattr(query_cache, "_cache", cache)
+    return cache
+
+
+def _runner(rows):
+    calls = []
+
+    def run(query, params):
+        calls.append((query, params))
+        return rows
+    return run, calls
+
+
+def test_normalize_keeps_string_literals():
+    q = "MATCH (n)   // comment\n WHERE n.name = 'A  B'\n RETURN n ;"
+    assert normalize_cypher(q) == "MATCH (n) WHERE n.name = 'A  B' RETURN n"
+
+
+def test_key_covers_text_and_parameters():
+    k = QueryResultCache.make_key("MATCH (n) RETURN n", {"id": 1})
+    assert k == QueryResultCache.make_key("MATCH  (n)\nRETURN n", {"id": 1})
+    assert k != QueryResultCache.make_key("MATCH (n) RETURN n", {"id": 2})
+
+
+def test_repeat_is_served_from_cache(fresh_cache):
+    run, calls = _runner([{"n": 1}])
+    assert cached_query(run, "MATCH (n) RETURN n") == [{"n": 1}]
+    assert cached_query(run, "MATCH (n) RETURN n") == [{"n": 1}]
+    assert len(calls) == 1 and fresh_cache.stats()["hits"] == 1
+
+
+def test_graph_write_invalidates(fresh_cache):
+    run, calls = _runner([{"n": 1}])
+    cached_query(run, "MATCH (n) RETURN n")
+    bump_graph_version("test")
+    cached_query(run, "MATCH (n) RETURN n")
+    assert len(calls) == 2 and fresh_cache.stats()["stale"] == 1
+
+
+def test_rows_read_before_a_write_are_not_stored(fresh_cache):
+    def run(query, params):
+        bump_graph_version("write during the read")
+        return [{"n": 1}]
+
+    cached_query(run, "MATCH (n) RETURN n")
+    assert fresh_cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl(fresh_cache):
+    key = QueryResultCache.make_key("MATCH (n) RETURN n")
+    fresh_cache.put(key, [{"n": 1}], graph_version())
+    version, ts, rows, size = fresh_cache._entries[key]
+    fresh_cache._entries[key] = (version, ts - 301, rows, size)
+    assert fresh_cache.get(key) is None
+
+
+def test_lru_eviction_by_size():
+    cache = QueryResultCache(max_bytes=200)
+    for i in range(5):
+        cache.put(f"k{i}", [{"v": "x" * 40}], graph_version())
+    assert cache.get("k0") is None and cache.get("k4") is not None
+    assert cache.stats()["bytes"] <= 200 and cache.stats()["evictions"] > 0
+
+
+def test_async_cached_query(fresh_cache):
+    calls = []
+
+    async def run(query, params):
+        calls.append(query)
+        return [{"n": 1}]
+
+    for _ in range(2):
+        assert asyncio.run(acached_query(run, "MATCH (n) RETURN n", {"id": 1})) == [{"n": 1}]
+    assert len(calls) == 1
+
+
+def test_disabled_cache_always_runs(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", False)
+    run, calls = _runner([])
+    cached_query(run, "MATCH (n) RETURN n")
+    cached_query(run, "MATCH (n) RETURN n")
+    assert len(calls) == 2
@@ -0,0 +1,56 @@
+import pytest
+
+from app.services import query_router
+from app.services.query_router import route
+
+_NEBULA = {"id": "c1", "label": "Company", "name": "PT Nebula", "score": 0.9, "span": "PT Nebula"}
+_BUDI   = {"id": "p1", "label": "Person", "name": "Budi Santoso", "score": 0.8, "span": "Budi"}
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("siapa direktur PT Nebula?", "directors"),
+    ("Who are the directors of PT Nebula", "directors"),
+    ("siapa pemegang saham PT Nebula", "owners"),
+    ("who is the beneficial owner of PT Nebula", "owners"),
+    ("di mana alamat PT Nebula", "address"),
+    ("aliran dana PT Nebula ke mana saja", "money_flows"),
+    ("hubungan PT Nebula dengan siapa saja", "connections"),
+])
+def test_intent_matching(question, intent):
+    assert query_router.match_intent(question).name == intent
+
+
+def test_several_specific_intents_are_ambiguous():
+    assert query_router.match_intent("direktur dan pemilik PT Nebula") is None
+
+
+def test_connections_gives_way_to_a_specific_intent():
+    assert query_router.match_intent("hubungan direktur PT Nebula").name == "directors"
+
+
+def test_no_intent():
+    assert query_router.match_intent("ceritakan tentang PT Nebula") is None
+
+
+def test_route_fills_label_and_id_parameter():
+    r = route("siapa direktur PT Nebula?", [_NEBULA], min_score=0.5)
+    assert r.intent.name == "directors"
+    assert "MATCH (c:Company {id: $id})" in r.cypher
+    assert r.params == {"id": "c1"}
+
+
+def test_route_needs_exactly_one_confident_entity():
+    weak = {**_BUDI, "label": "Company", "score": 0.3}
+    assert route("siapa direktur PT Nebula?", [], min_score=0.5) is None
+    assert route("siapa direktur PT Nebula?", [_NEBULA, {**_NEBULA, "id": "c2"}], min_score=0.5) is None
+    assert route("siapa direktur PT Nebula?", [_NEBULA, weak], min_score=0.5) is not None
+
+
+def test_route_checks_the_entity_label():
+    assert route("siapa direktur Budi Santoso?", [_BUDI], min_score=0.5) is None
+    assert route("di mana alamat Budi Santoso?", [_BUDI], min_score=0.5).intent.name == "address"
+
+
+def test_long_questions_take_the_llm_path():
+    question = "siapa direktur PT Nebula " + " ".join(["dan"] * 20)
+    assert route(question, [_NEBULA], min_score=0.5) is None